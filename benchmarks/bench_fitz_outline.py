@@ -0,0 +1,121 @@
+# coding: utf-8
+
+"""
+Times building the table of content of a PDF with a huge synthetic outline,
+using the single pass outline builder, and the quadratic builder it replaced.
+
+Usage: python benchmarks/bench_fitz_outline.py [--entries 50000] [--skip-legacy]
+"""
+
+import argparse
+import time
+
+from bookworm.document import Pager, Section
+from bookworm.document.formats.fitz import build_outline_tree
+
+
+def make_synthetic_outline(num_entries, num_pages):
+    """
+    An outline of chapters, sections and subsections, with a few irregularities
+    that are common in generated PDFs: level jumps, and entries without a target page.
+    """
+    outline = []
+    level = 1
+    for index in range(num_entries):
+        if index % 50 == 0:
+            level = 1
+        elif index % 10 == 0:
+            level = 2
+        elif index % 997 == 0:
+            # A deeper entry with no siblings, which makes the quadratic builder scan to the end
+            level = 4
+        else:
+            level = 3
+        page = -1 if index % 211 == 0 else 1 + (index * num_pages) // num_entries
+        outline.append([level, f"Entry {index}", page, {"name": f"dest{index}"}])
+    return outline
+
+
+def legacy_build_outline_tree(root_item, toc_info, max_page):
+    _last_entry = None
+    for (index, (level, title, start_page, infodict)) in enumerate(toc_info):
+        try:
+            curr_index = index
+            next_item = toc_info[curr_index + 1]
+            while next_item[0] != level:
+                curr_index += 1
+                next_item = toc_info[curr_index]
+        except IndexError:
+            next_item = None
+        first_page = start_page - 1
+        last_page = max_page if next_item is None else next_item[2] - 2
+        if first_page < 0:
+            first_page = 0 if _last_entry is None else _last_entry.pager.last
+        if last_page < first_page:
+            last_page += 1
+        if not all(p >= 0 for p in (first_page, last_page)):
+            continue
+        if first_page > last_page:
+            continue
+        pgn = Pager(first=first_page, last=last_page)
+        sect = Section(
+            title=title,
+            pager=pgn,
+            data={"html_file": infodict.get("name")},
+        )
+        if level == 1:
+            root_item.append(sect)
+            _last_entry = sect
+            continue
+        elif not root_item:
+            continue
+        parent = root_item.children[-1]
+        parent_lvl = level - 1
+        while True:
+            if (parent_lvl > 1) and parent.children:
+                parent = parent.children[-1]
+                parent_lvl -= 1
+                continue
+            parent.append(sect)
+            _last_entry = sect
+            break
+    return root_item
+
+
+def dump_tree(section):
+    return (
+        section.title,
+        section.pager.astuple(),
+        [dump_tree(child) for child in section.children],
+    )
+
+
+def time_builder(label, builder, outline, max_page):
+    root_item = Section(title="Root", pager=Pager(first=0, last=max_page))
+    started_at = time.perf_counter()
+    tree = builder(root_item, outline, max_page)
+    elapsed = time.perf_counter() - started_at
+    print(f"{label}: {elapsed:.3f} seconds")
+    return tree
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=50000)
+    parser.add_argument("--pages", type=int, default=20000)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+    outline = make_synthetic_outline(args.entries, args.pages)
+    max_page = args.pages - 1
+    print(f"Outline with {len(outline)} entries, over {args.pages} pages")
+    tree = time_builder("Single pass builder", build_outline_tree, outline, max_page)
+    if not args.skip_legacy:
+        legacy_tree = time_builder(
+            "Legacy builder", legacy_build_outline_tree, outline, max_page
+        )
+        assert dump_tree(tree) == dump_tree(legacy_tree), "The trees are different"
+        print("Both builders produced the same tree")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# coding: utf-8
+
+"""
+Measures the time and memory that preparing one page for OCR takes. The steps match the
+default pipeline: render the page, resize it, binarize it with opencv, then hand it to the OCR engine.
+The current ImageIO is compared with the bytes-based conversions it replaced.
+
+Memory is measured with tracemalloc, which sees python and numpy allocations,
+but not the memory PIL allocates internally, so PIL steps are undercounted for both.
+
+Usage: python benchmarks/bench_image_io.py [--width 1654] [--height 2339] [--pages 10]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from bookworm.image_io import ImageIO
+
+
+class LegacyImageIO(ImageIO):
+    """The conversions of ImageIO before it kept its pixels in their colour mode."""
+
+    @classmethod
+    def from_pil(cls, image):
+        return cls(
+            data=image.tobytes(), width=image.width, height=image.height, mode=image.mode
+        )
+
+    @classmethod
+    def from_cv2(cls, cv2_image):
+        rgb_image = cv2.cvtColor(cv2_image, cv2.COLOR_GRAY2RGB)
+        pil_image = Image.fromarray(np.asarray(rgb_image, dtype=np.uint8), mode="RGB")
+        return cls.from_pil(pil_image)
+
+    def to_pil(self):
+        return Image.frombytes("RGB", self.size, self.data)
+
+    def to_cv2(self):
+        pil_image = self.to_pil().convert("RGB")
+        return cv2.cvtColor(np.array(pil_image, dtype=np.uint8), cv2.COLOR_RGB2GRAY)
+
+
+def resize(image):
+    img = image.to_pil()
+    return image.from_pil(
+        img.resize((image.width * 5 // 4, image.height * 5 // 4), resample=Image.LANCZOS)
+    )
+
+
+def binarize(image):
+    img = image.to_cv2()
+    ret, th = cv2.threshold(img, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    return image.from_cv2(th)
+
+
+def hand_to_ocr_engine(image):
+    return image.to_pil()
+
+
+def make_page(image_cls, width, height):
+    # Black text-like strokes on a white page
+    pixels = np.full((height, width, 3), 255, dtype=np.uint8)
+    pixels[::40, :] = 0
+    pixels[:, ::97] = 0
+    return image_cls(data=pixels.tobytes(), width=width, height=height)
+
+
+def measure(image_cls, width, height, num_pages):
+    steps = (resize, binarize, hand_to_ocr_engine)
+    timings = dict.fromkeys((step.__name__ for step in steps), 0.0)
+    allocated = dict.fromkeys((step.__name__ for step in steps), 0)
+    for __ in range(num_pages):
+        value = make_page(image_cls, width, height)
+        for step in steps:
+            current, __ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            started_at = time.perf_counter()
+            value = step(value)
+            timings[step.__name__] += time.perf_counter() - started_at
+            allocated[step.__name__] += tracemalloc.get_traced_memory()[1] - current
+    page_size = width * height * 3
+    print(f"{image_cls.__name__}:")
+    for step in steps:
+        name = step.__name__
+        print(
+            f"  {name:<20} {timings[name] / num_pages * 1000:8.1f} ms"
+            f"  {allocated[name] / num_pages / 2**20:8.1f} MiB"
+            f"  ({allocated[name] / num_pages / page_size:.1f} page copies)"
+        )
+    total_time = sum(timings.values()) / num_pages * 1000
+    total_allocated = sum(allocated.values()) / num_pages
+    print(
+        f"  {'total':<20} {total_time:8.1f} ms"
+        f"  {total_allocated / 2**20:8.1f} MiB"
+        f"  ({total_allocated / page_size:.1f} page copies)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=1654)
+    parser.add_argument("--height", type=int, default=2339)
+    parser.add_argument("--pages", type=int, default=10)
+    args = parser.parse_args()
+    print(
+        f"Preparing {args.pages} pages of {args.width}x{args.height} pixels for OCR, per page:"
+    )
+    tracemalloc.start()
+    measure(LegacyImageIO, args.width, args.height, args.pages)
+    measure(ImageIO, args.width, args.height, args.pages)
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
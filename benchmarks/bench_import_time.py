@@ -0,0 +1,84 @@
+# coding: utf-8
+
+"""
+Measures the cold start import time of bookworm modules, using `python -X importtime`,
+and checks that no document backend library is imported before a document is opened.
+
+Usage: python benchmarks/bench_import_time.py [--module bookworm.reader] [--top 15] [--max-ms 0]
+"""
+
+import argparse
+import subprocess
+import sys
+
+# Libraries that should only be imported when a document that needs them is opened
+BACKEND_MODULES = (
+    "fitz",
+    "pyxpdf",
+    "ebooklib",
+    "mobi",
+    "mammoth",
+    "docx",
+    "pptx",
+    "odf",
+    "trafilatura",
+    "readability",
+    "rarfile",
+)
+
+
+def measure_import_time(module_name):
+    """Return a dict of top-level module names to their cumulative import time in microseconds."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Failed to import {module_name}:\n{process.stderr}")
+    timings = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        try:
+            __, cumulative, imported_name = line.split("|")
+            timings[imported_name.strip()] = int(cumulative)
+        except ValueError:
+            # The header line
+            continue
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="bookworm.document")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=0,
+        help="Exit with an error if the import takes longer than this",
+    )
+    args = parser.parse_args()
+    timings = measure_import_time(args.module)
+    total_ms = timings[args.module] / 1000
+    print(f"Importing {args.module} took {total_ms:.1f} ms")
+    top_level = {
+        name: value for (name, value) in timings.items() if "." not in name.strip()
+    }
+    slowest = sorted(top_level.items(), key=lambda item: -item[1])[: args.top]
+    for (name, value) in slowest:
+        print(f"  {name:<30} {value / 1000:8.1f} ms")
+    imported_backends = [name for name in BACKEND_MODULES if name in timings]
+    failed = False
+    if imported_backends:
+        print(f"Document backends imported eagerly: {', '.join(imported_backends)}")
+        failed = True
+    if args.max_ms and (total_ms > args.max_ms):
+        print(f"The import time exceeds the threshold of {args.max_ms} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
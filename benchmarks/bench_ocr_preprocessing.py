@@ -0,0 +1,100 @@
+# coding: utf-8
+
+"""
+Measures the throughput, in pages per second, of preprocessing synthetic 300-DPI scans for OCR.
+The fused pipeline is compared with running the same pipelines one after another,
+each converting the image to grayscale and wrapping its result in a new ImageIO.
+
+Usage: python benchmarks/bench_ocr_preprocessing.py [--pages 20] [--binarized]
+"""
+
+import argparse
+import time
+from operator import attrgetter
+
+import numpy as np
+
+from bookworm.image_io import ImageIO
+from bookworm.ocr_engines.image_processing_pipelines import (
+    BlurProcessingPipeline,
+    DilationProcessingPipeline,
+    DPIProcessingPipeline,
+    ErosionProcessingPipeline,
+    ThresholdProcessingPipeline,
+    run_image_processing_pipelines,
+)
+
+# An A4 page scanned at 300 DPI
+PAGE_SIZE = (2480, 3508)
+PIPELINES = (
+    DPIProcessingPipeline,
+    ThresholdProcessingPipeline,
+    BlurProcessingPipeline,
+    ErosionProcessingPipeline,
+    DilationProcessingPipeline,
+)
+# The order in which bookworm runs them
+PIPELINES = tuple(sorted(PIPELINES, key=attrgetter("run_order")))
+
+
+def make_scan(binarized, seed=0):
+    """Dark lines of text on an uneven, slightly noisy paper background."""
+    width, height = PAGE_SIZE
+    rng = np.random.default_rng(seed)
+    pixels = np.full((height, width), 255, dtype=np.uint8)
+    if not binarized:
+        pixels = (
+            (rng.normal(230, 8, size=(height, width))).clip(0, 255).astype(np.uint8)
+        )
+    for top in range(150, height - 150, 60):
+        pixels[top : top + 24, 150 : width - 150 : 3] = 0 if binarized else 40
+    rgb = np.repeat(pixels[..., np.newaxis], 3, axis=2)
+    return ImageIO(data=rgb.tobytes(), width=width, height=height)
+
+
+def run_staged(image):
+    images = (image,)
+    for pipeline_cls in PIPELINES:
+        pipeline = pipeline_cls(images, None)
+        images = tuple(pipeline.process_image(img) for img in images)
+    return images
+
+
+def run_fused(image):
+    return tuple(run_image_processing_pipelines(PIPELINES, (image,), None))
+
+
+def measure(label, runner, scans):
+    started_at = time.perf_counter()
+    for scan in scans:
+        runner(scan)
+    elapsed = time.perf_counter() - started_at
+    print(f"{label}: {len(scans) / elapsed:.2f} pages per second")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument(
+        "--binarized",
+        action="store_true",
+        help="Use scans that are already black and white",
+    )
+    args = parser.parse_args()
+    scans = [make_scan(args.binarized, seed) for seed in range(min(args.pages, 4))]
+    scans = [scans[index % len(scans)] for index in range(args.pages)]
+    kind = "binarized" if args.binarized else "grayscale"
+    print(
+        f"Preprocessing {args.pages} {kind} scans of {PAGE_SIZE[0]}x{PAGE_SIZE[1]} pixels"
+    )
+    staged_output = run_staged(scans[0])
+    fused_output = run_fused(scans[0])
+    assert np.array_equal(
+        staged_output[0].to_array(), fused_output[0].to_array()
+    ), "The outputs are different"
+    measure("Staged pipelines", run_staged, scans)
+    measure("Fused pipeline", run_fused, scans)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# coding: utf-8
+
+"""
+Compares the number of database commits per minute caused by moving the caret,
+when every caret move commits the position, and when positions go through the write-behind store.
+
+Usage: python benchmarks/bench_reading_position_store.py [--duration 10] [--rate 30]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import db_magic as db
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from bookworm.database.models import DocumentPositionInfo
+from bookworm.database.position_store import ReadingPositionStore
+from bookworm.document.uri import DocumentUri
+
+commit_count = 0
+
+
+@event.listens_for(Session, "after_commit")
+def _count_commit(session):
+    global commit_count
+    commit_count += 1
+
+
+def simulate_caret_moves(save_position, duration, rate):
+    """Move the caret `rate` times per second, for `duration` seconds."""
+    started_at = time.monotonic()
+    pos = 0
+    while (elapsed := time.monotonic() - started_at) < duration:
+        pos += 1
+        save_position(0, pos)
+        time.sleep(max(0, (pos / rate) - elapsed))
+    return pos
+
+
+def measure(label, save_position, duration, rate, finish=None):
+    global commit_count
+    commit_count = 0
+    num_moves = simulate_caret_moves(save_position, duration, rate)
+    if finish is not None:
+        finish()
+    commits_per_minute = commit_count * (60 / duration)
+    print(
+        f"{label}: {num_moves} caret moves, {commit_count} commits, "
+        f"{commits_per_minute:.1f} commits/minute"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--rate", type=float, default=30.0, help="Caret moves/second")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        db.Model.setup_database(
+            f"sqlite:///{tempdir / 'database.sqlite'}", create=True
+        )
+        position_info = DocumentPositionInfo.get_or_create(
+            title="Benchmark", uri=DocumentUri.from_filename(tempdir / "document.pdf")
+        )
+        measure(
+            "Commit on every caret move",
+            position_info.save_position,
+            args.duration,
+            args.rate,
+        )
+        store = ReadingPositionStore(journal_path=tempdir / "positions.journal")
+        measure(
+            "Write-behind position store",
+            lambda page, pos: store.set_position(position_info, page, pos),
+            args.duration,
+            args.rate,
+            finish=store.flush,
+        )
+
+
+if __name__ == "__main__":
+    main()
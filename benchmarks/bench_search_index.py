@@ -0,0 +1,74 @@
+# coding: utf-8
+
+"""
+Measures the time taken to find the pages containing a substring with the search index,
+on a synthetic vocabulary, compared with scanning every word in the vocabulary.
+
+Usage: python benchmarks/bench_search_index.py [--words 200000] [--pages 2000]
+"""
+
+import argparse
+import random
+import string
+import time
+
+from bookworm.document.search_index import DocumentSearchIndex
+
+QUERIES = ("q", "ab", "xyz", "mnop", "lorem", "zzqxjk")
+
+
+def make_index(num_words, num_pages):
+    rng = random.Random(0)
+    words = {
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 12)))
+        for __ in range(num_words)
+    }
+    words = sorted(words)
+    rng.shuffle(words)
+    index = DocumentSearchIndex()
+    words_per_page = len(words) // num_pages + 1
+    for page_index in range(num_pages):
+        start = page_index * words_per_page
+        page_words = words[start : start + words_per_page]
+        index.add_page(page_index, " ".join(page_words))
+    return index
+
+
+def scan_vocabulary(index, substring):
+    pages = set()
+    for (token, token_pages) in index.postings.items():
+        if substring in token:
+            pages.update(token_pages)
+    return pages
+
+
+def measure(label, lookup, repeat=5):
+    started_at = time.perf_counter()
+    for __ in range(repeat):
+        result = lookup()
+    elapsed = (time.perf_counter() - started_at) / repeat
+    print(f"  {label}: {elapsed * 1000:.2f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=200_000)
+    parser.add_argument("--pages", type=int, default=2000)
+    args = parser.parse_args()
+    index = make_index(args.words, args.pages)
+    print(f"Vocabulary of {len(index)} words on {args.pages} pages")
+    started_at = time.perf_counter()
+    index.get_pages_containing_substring("lorem")
+    print(f"Building the trigram index: {time.perf_counter() - started_at:.2f} s")
+    for substring in QUERIES:
+        print(f"Substring {substring!r}:")
+        expected = measure("Scan", lambda: scan_vocabulary(index, substring))
+        found = measure(
+            "Trigram index", lambda: index.get_pages_containing_substring(substring)
+        )
+        assert found == expected, substring
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# coding: utf-8
+
+"""
+Measures the throughput, in pages per second, of recognizing many pages with tesseract,
+one tesseract run per page, compared with a single run for all of the pages.
+Requires tesseract, found the same way bookworm finds it.
+
+Usage: python benchmarks/bench_tesseract_batch.py [--pages 16] [--lang eng]
+"""
+
+import argparse
+import time
+
+from PIL import Image, ImageDraw
+
+from bookworm.ocr_engines.tesseract_ocr_engine import TesseractOcrEngine, pytesseract
+
+# A small page, on which starting tesseract costs the most relative to recognizing the text
+PAGE_SIZE = (800, 600)
+
+
+def make_page(index):
+    image = Image.new("L", PAGE_SIZE, 255)
+    draw = ImageDraw.Draw(image)
+    for line in range(12):
+        draw.text(
+            (40, 30 + line * 45),
+            f"Page {index}, line {line}: the quick brown fox jumps over the lazy dog",
+            fill=0,
+        )
+    return image
+
+
+def measure(label, runner, pages):
+    started_at = time.perf_counter()
+    texts = runner(pages)
+    elapsed = time.perf_counter() - started_at
+    print(f"{label}: {len(pages) / elapsed:.2f} pages per second")
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=16)
+    parser.add_argument("--lang", default="eng")
+    args = parser.parse_args()
+    if not TesseractOcrEngine.check():
+        raise SystemExit("Tesseract is not available")
+    pages = [make_page(index) for index in range(args.pages)]
+    print(f"Recognizing {args.pages} pages of {PAGE_SIZE[0]}x{PAGE_SIZE[1]} pixels")
+    single_texts = measure(
+        "One run per page",
+        lambda pages: [pytesseract.image_to_string(page, args.lang) for page in pages],
+        pages,
+    )
+    batch_texts = measure(
+        "One run for all pages",
+        lambda pages: pytesseract.images_to_strings(pages, args.lang),
+        pages,
+    )
+    mismatches = sum(
+        single.strip() != batch.strip()
+        for (single, batch) in zip(single_texts, batch_texts)
+    )
+    print(f"Pages recognized differently: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
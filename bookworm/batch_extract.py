@@ -0,0 +1,496 @@
+# coding: utf-8
+
+"""
+Extracts the text of many documents without the GUI, for pre-processing whole libraries.
+Documents are extracted by a pool of worker processes, each document with its own time limit.
+Finished documents are recorded in a journal in the output folder, so an interrupted run can be resumed.
+"""
+
+from __future__ import annotations
+
+import enum
+import glob
+import itertools
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+from multiprocessing.connection import wait as wait_for_connections
+from pathlib import Path
+
+import attr
+import ujson
+
+from bookworm import typehints as t
+from bookworm.commandline_handler import (BaseSubcommandHandler,
+                                          register_subcommand)
+from bookworm.document import BaseDocument, create_document
+from bookworm.document.operations import (EXPORT_FORMATS, GZIP_FILE_EXTENSION,
+                                          export_to_plain_text)
+from bookworm.document.uri import DocumentUri
+from bookworm.logger import logger
+
+log = logger.getChild(__name__)
+EXTRACTION_JOURNAL_FILENAME = ".bookworm-extract.journal"
+# Seconds to wait for an idle worker to exit before killing it
+WORKER_SHUTDOWN_TIMEOUT = 5
+
+
+class ExtractionStatus(enum.Enum):
+    EXTRACTED = "extracted"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+    TIMED_OUT = "timed out"
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class ExtractionJob:
+    source: str
+    target: str
+    export_format: str
+    compress: bool = False
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class ExtractionResult:
+    job: ExtractionJob
+    status: ExtractionStatus
+    num_pages: int = 0
+    input_size: int = 0
+    output_size: int = 0
+    elapsed: float = 0.0
+    error: t.Optional[str] = None
+
+
+@attr.s(auto_attribs=True, slots=True)
+class ExtractionSummary:
+    files_extracted: int = 0
+    files_skipped: int = 0
+    files_failed: int = 0
+    files_timed_out: int = 0
+    num_pages: int = 0
+    input_size: int = 0
+    output_size: int = 0
+    elapsed: float = 0.0
+
+    def add_result(self, result: ExtractionResult):
+        if result.status is ExtractionStatus.EXTRACTED:
+            self.files_extracted += 1
+            self.num_pages += result.num_pages
+            self.input_size += result.input_size
+            self.output_size += result.output_size
+        elif result.status is ExtractionStatus.SKIPPED:
+            self.files_skipped += 1
+        elif result.status is ExtractionStatus.FAILED:
+            self.files_failed += 1
+        elif result.status is ExtractionStatus.TIMED_OUT:
+            self.files_timed_out += 1
+
+    @property
+    def is_successful(self) -> bool:
+        return not (self.files_failed or self.files_timed_out)
+
+    def format(self) -> str:
+        elapsed = max(self.elapsed, 1e-9)
+        return "\n".join(
+            (
+                f"Extracted: {self.files_extracted}, skipped: {self.files_skipped}, "
+                f"failed: {self.files_failed}, timed out: {self.files_timed_out}",
+                f"Pages: {self.num_pages}, input: {self.input_size / 2**20:.1f} MB, "
+                f"output: {self.output_size / 2**20:.1f} MB",
+                f"Elapsed: {self.elapsed:.1f} seconds, "
+                f"{self.files_extracted / elapsed:.2f} files/s, "
+                f"{self.num_pages / elapsed:.1f} pages/s, "
+                f"{self.input_size / 2**20 / elapsed:.2f} MB/s",
+            )
+        )
+
+
+class ExtractionJournal:
+    """
+    Records the documents that were extracted, along with the size and modification time
+    of the source file, so that unchanged documents are skipped when the extraction is resumed.
+    """
+
+    def __init__(self, journal_path: t.PathLike):
+        self.journal_path = os.fspath(journal_path)
+        self.entries: dict[str, dict[str, t.Any]] = {}
+        self._file = None
+
+    def load(self):
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                entry = ujson.loads(line)
+            except ValueError:
+                # A partially written last line
+                continue
+            self.entries[entry["source"]] = entry
+
+    def is_extracted(self, job: ExtractionJob) -> bool:
+        if (entry := self.entries.get(job.source)) is None:
+            return False
+        try:
+            stat = os.stat(job.source)
+        except OSError:
+            return False
+        return (
+            (entry["size"] == stat.st_size)
+            and (entry["mtime_ns"] == stat.st_mtime_ns)
+            and (entry["target"] == job.target)
+            and os.path.isfile(job.target)
+        )
+
+    def record(self, result: ExtractionResult):
+        stat = os.stat(result.job.source)
+        entry = {
+            "source": result.job.source,
+            "target": result.job.target,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "num_pages": result.num_pages,
+        }
+        self.entries[entry["source"]] = entry
+        if self._file is None:
+            self._file = open(self.journal_path, "a", encoding="utf-8")
+        self._file.write(ujson.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def iter_input_files(inputs: t.Iterable[str]) -> t.Iterator[tuple[Path, Path]]:
+    """
+    Yield (source file, path relative to the output folder) for the supported documents
+    in the given files, folders (searched recursively), and glob patterns.
+    """
+    extensions = BaseDocument.get_supported_file_extensions()
+
+    def is_supported(path):
+        return path.is_file() and (path.suffix.lower() in extensions)
+
+    seen = set()
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            candidates = (
+                (filename, filename.relative_to(path))
+                for filename in sorted(path.rglob("*"))
+            )
+        elif path.is_file():
+            candidates = [(path, Path(path.name))]
+        else:
+            # Keep the folders below the part of the pattern that has no wildcards
+            root = _get_glob_root(item)
+            candidates = (
+                (Path(filename), Path(filename).relative_to(root))
+                for filename in sorted(glob.glob(item, recursive=True))
+            )
+        for (filename, relative_path) in candidates:
+            if (not is_supported(filename)) or (
+                (resolved := filename.resolve()) in seen
+            ):
+                continue
+            seen.add(resolved)
+            yield filename, Path(relative_path)
+
+
+def _get_glob_root(pattern: str) -> Path:
+    parts = Path(pattern).parts
+    root_parts = list(itertools.takewhile(lambda part: not glob.has_magic(part), parts))
+    return Path(*root_parts) if root_parts else Path()
+
+
+def plan_extraction_jobs(
+    inputs: t.Iterable[str],
+    output_folder: t.PathLike,
+    export_format: str,
+    compress: bool = False,
+) -> list[ExtractionJob]:
+    """
+    The target keeps the extension of the source, so book.pdf and book.epub do not collide.
+    Raises ValueError if two documents would be extracted to the same target.
+    """
+    file_extension, __ = EXPORT_FORMATS[export_format]
+    if compress:
+        file_extension += GZIP_FILE_EXTENSION
+    output_folder = Path(output_folder)
+    jobs = [
+        ExtractionJob(
+            source=os.fspath(source.resolve()),
+            target=os.fspath(
+                output_folder.resolve() / f"{relative_path}{file_extension}"
+            ),
+            export_format=export_format,
+            compress=compress,
+        )
+        for (source, relative_path) in iter_input_files(inputs)
+    ]
+    sources_by_target = {}
+    for job in jobs:
+        sources_by_target.setdefault(job.target, []).append(job.source)
+    if conflicts := {
+        target: sources
+        for (target, sources) in sources_by_target.items()
+        if len(sources) > 1
+    }:
+        raise ValueError(
+            "These documents would be extracted to the same file:\n"
+            + "\n".join(
+                f"{target}: {', '.join(sources)}"
+                for (target, sources) in conflicts.items()
+            )
+        )
+    return jobs
+
+
+def extract_document(job: ExtractionJob) -> ExtractionResult:
+    """Extract the text of one document. Runs in a worker process."""
+    started_at = time.perf_counter()
+    num_pages = 0
+    try:
+        input_size = os.path.getsize(job.source)
+        os.makedirs(os.path.dirname(job.target), exist_ok=True)
+        document = create_document(DocumentUri.from_filename(job.source))
+        try:
+            for num_pages in export_to_plain_text(
+                document, job.target, job.export_format, job.compress
+            ):
+                pass
+        finally:
+            document.close()
+        output_size = os.path.getsize(job.target)
+    except Exception as e:
+        log.exception(f"Failed to extract {job.source}", exc_info=True)
+        return ExtractionResult(
+            job=job,
+            status=ExtractionStatus.FAILED,
+            num_pages=num_pages,
+            elapsed=time.perf_counter() - started_at,
+            error=f"{type(e).__name__}: {e}",
+        )
+    return ExtractionResult(
+        job=job,
+        status=ExtractionStatus.EXTRACTED,
+        num_pages=num_pages,
+        input_size=input_size,
+        output_size=output_size,
+        elapsed=time.perf_counter() - started_at,
+    )
+
+
+def _extraction_worker_main(conn):
+    """Extract the documents received through the connection, until None is received."""
+    while (job := conn.recv()) is not None:
+        conn.send(extract_document(job))
+
+
+class ExtractionWorker:
+    """
+    A worker process with its own connection, so that a worker which exceeds
+    the time limit can be killed without affecting the other workers.
+    """
+
+    def __init__(self):
+        self.conn, worker_conn = mp.Pipe()
+        self.process = mp.Process(
+            target=_extraction_worker_main,
+            args=(worker_conn,),
+            name="document-extract",
+            daemon=True,
+        )
+        self.process.start()
+        worker_conn.close()
+        self.job = None
+        self.started_at = None
+
+    def submit(self, job: ExtractionJob):
+        self.conn.send(job)
+        self.job = job
+        self.started_at = time.monotonic()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def shutdown(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(WORKER_SHUTDOWN_TIMEOUT)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def run_extraction_jobs(
+    jobs: t.Sequence[ExtractionJob],
+    num_workers: int,
+    timeout: t.Optional[float] = None,
+) -> t.Iterator[ExtractionResult]:
+    """Yield the result of each job as soon as it is done, in the order they finish."""
+    pending = deque(jobs)
+    idle_workers = [ExtractionWorker() for __ in range(min(num_workers, len(jobs)))]
+    busy_workers: dict[t.Any, ExtractionWorker] = {}
+    try:
+        while pending or busy_workers:
+            while pending and idle_workers:
+                worker = idle_workers.pop()
+                worker.submit(pending.popleft())
+                busy_workers[worker.conn] = worker
+            wait_timeout = None
+            if timeout is not None:
+                next_deadline = min(
+                    worker.started_at + timeout for worker in busy_workers.values()
+                )
+                wait_timeout = max(next_deadline - time.monotonic(), 0)
+            for conn in wait_for_connections(list(busy_workers), wait_timeout):
+                worker = busy_workers.pop(conn)
+                try:
+                    result = conn.recv()
+                except (EOFError, OSError):
+                    # The worker crashed, most likely inside a document backend
+                    result = ExtractionResult(
+                        job=worker.job,
+                        status=ExtractionStatus.FAILED,
+                        elapsed=time.monotonic() - worker.started_at,
+                        error="The worker process exited unexpectedly",
+                    )
+                    worker.kill()
+                    worker = ExtractionWorker()
+                idle_workers.append(worker)
+                yield result
+            if timeout is None:
+                continue
+            now = time.monotonic()
+            for (conn, worker) in tuple(busy_workers.items()):
+                if (now - worker.started_at) < timeout:
+                    continue
+                del busy_workers[conn]
+                worker.kill()
+                idle_workers.append(ExtractionWorker())
+                yield ExtractionResult(
+                    job=worker.job,
+                    status=ExtractionStatus.TIMED_OUT,
+                    elapsed=now - worker.started_at,
+                    error=f"Exceeded the time limit of {timeout} seconds",
+                )
+    finally:
+        for worker in busy_workers.values():
+            worker.kill()
+        for worker in idle_workers:
+            worker.shutdown()
+
+
+def extract_documents(
+    jobs: t.Sequence[ExtractionJob],
+    journal: ExtractionJournal,
+    num_workers: int,
+    timeout: t.Optional[float] = None,
+    resume: bool = True,
+) -> t.Iterator[ExtractionResult]:
+    """Run the jobs, skipping the documents which the journal says are already extracted."""
+    if resume:
+        journal.load()
+    jobs_to_run = []
+    for job in jobs:
+        if resume and journal.is_extracted(job):
+            yield ExtractionResult(job=job, status=ExtractionStatus.SKIPPED)
+        else:
+            jobs_to_run.append(job)
+    try:
+        for result in run_extraction_jobs(jobs_to_run, num_workers, timeout):
+            if result.status is ExtractionStatus.EXTRACTED:
+                journal.record(result)
+            yield result
+    finally:
+        journal.close()
+
+
+@register_subcommand
+class ExtractSubcommandHandler(BaseSubcommandHandler):
+    subcommand_name = "extract"
+
+    @classmethod
+    def add_arguments(cls, subparser):
+        subparser.add_argument(
+            "inputs", nargs="+", help="Documents, folders, or glob patterns to extract"
+        )
+        subparser.add_argument(
+            "-o",
+            "--output",
+            required=True,
+            help="Folder to write the extracted text to",
+        )
+        subparser.add_argument(
+            "--format",
+            dest="export_format",
+            choices=("txt", "jsonl"),
+            default="txt",
+            help=(
+                "Plain text with form feeds between pages, "
+                "or JSON lines with the table of content and the pages"
+            ),
+        )
+        subparser.add_argument(
+            "--gzip", action="store_true", help="Compress the extracted text"
+        )
+        subparser.add_argument(
+            "--jobs",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes",
+        )
+        subparser.add_argument(
+            "--timeout",
+            type=float,
+            default=None,
+            help="Maximum number of seconds to spend on each document",
+        )
+        subparser.add_argument(
+            "--no-resume",
+            action="store_true",
+            help="Extract all documents, including the ones extracted by a previous run",
+        )
+
+    @classmethod
+    def handle_commandline_args(cls, args):
+        started_at = time.perf_counter()
+        try:
+            jobs = plan_extraction_jobs(
+                args.inputs, args.output, args.export_format, compress=args.gzip
+            )
+        except ValueError as e:
+            print(e)
+            return 2
+        print(f"Found {len(jobs)} documents")
+        os.makedirs(args.output, exist_ok=True)
+        journal = ExtractionJournal(Path(args.output, EXTRACTION_JOURNAL_FILENAME))
+        summary = ExtractionSummary()
+        for result in extract_documents(
+            jobs,
+            journal,
+            num_workers=max(args.jobs, 1),
+            timeout=args.timeout,
+            resume=not args.no_resume,
+        ):
+            summary.add_result(result)
+            message = f"[{result.status.value}] {result.job.source}"
+            if result.status is ExtractionStatus.EXTRACTED:
+                message += f": {result.num_pages} pages in {result.elapsed:.1f}s"
+            elif result.error is not None:
+                message += f": {result.error}"
+            print(message, flush=True)
+        summary.elapsed = time.perf_counter() - started_at
+        print(summary.format())
+        return 0 if summary.is_successful else 1
@@ -3,6 +3,8 @@
 
 from __future__ import annotations
 
+import time
+
 from bookworm import config
 from bookworm.commandline_handler import (BaseSubcommandHandler,
                                           register_subcommand)
@@ -11,7 +13,8 @@ from bookworm.logger import logger
 from bookworm.service import BookwormService
 from bookworm.signals import reader_book_loaded
 
-from .local_bookshelf.tasks import issue_add_document_request
+from .local_bookshelf.tasks import (issue_add_document_request,
+                                   sync_folder_to_bookshelf)
 from .viewer_integration import (BookshelfMenu, BookshelfSettingsPanel,
                                  StatefulBookshelfMenuIds)
 from .window import run_bookshelf_standalone
@@ -33,6 +36,51 @@ class BookshelfSubcommandHandler(BaseSubcommandHandler):
         return 0
 
 
+@register_subcommand
+class BookshelfSyncSubcommandHandler(BaseSubcommandHandler):
+    subcommand_name = "bookshelf-sync"
+
+    @classmethod
+    def add_arguments(cls, subparser):
+        subparser.add_argument(
+            "folders", nargs="+", help="Folders to sync to the local bookshelf"
+        )
+        subparser.add_argument(
+            "--category", default=None, help="Category of newly added documents"
+        )
+        subparser.add_argument(
+            "--no-fts",
+            action="store_true",
+            help="Do not add the text of documents to the full text search index",
+        )
+        subparser.add_argument(
+            "--watch-interval",
+            type=float,
+            default=None,
+            help="Keep running and re-sync the folders every given number of seconds",
+        )
+
+    @classmethod
+    def handle_commandline_args(cls, args):
+        retval = 0
+        while True:
+            for folder in args.folders:
+                try:
+                    stats = sync_folder_to_bookshelf(
+                        folder, args.category, should_add_to_fts=not args.no_fts
+                    )
+                except Exception:
+                    log.exception(f"Failed to sync folder {folder}", exc_info=True)
+                    retval = 1
+                else:
+                    log.info(f"{folder}: {stats}")
+                    if stats.documents_failed:
+                        retval = 1
+            if args.watch_interval is None:
+                return retval
+            time.sleep(args.watch_interval)
+
+
 class BookshelfService(BookwormService):
     name = "bookshelf"
     has_gui = True
@@ -30,7 +30,7 @@ from .models import (DEFAULT_BOOKSHELF_DATABASE_FILE, Author, BaseModel,
                      Category, Document, DocumentAuthor, DocumentFTSIndex,
                      DocumentTag, Tag)
 from .tasks import (add_document_to_bookshelf, bundle_single_document,
-                    import_folder_to_bookshelf)
+                    import_folder_to_bookshelf, ingest_documents)
 
 log = logger.getChild(__name__)
 
@@ -250,14 +250,22 @@ class LocalBookshelfProvider(BookshelfProvider):
     def _do_add_files_to_bookshelf(
         self, filenames, category_name, tags_names, should_add_to_fts
     ):
-        for filename in filenames:
-            add_document_to_bookshelf(
-                DocumentUri.from_filename(filename),
+        if len(filenames) == 1:
+            return add_document_to_bookshelf(
+                DocumentUri.from_filename(filenames[0]),
                 category_name=category_name,
                 tags_names=tags_names,
                 should_add_to_fts=should_add_to_fts,
                 database_file=DEFAULT_BOOKSHELF_DATABASE_FILE,
             )
+        stats = ingest_documents(
+            (DocumentUri.from_filename(filename) for filename in filenames),
+            category_name=category_name,
+            tags_names=tags_names,
+            should_add_to_fts=should_add_to_fts,
+        )
+        if stats.documents_failed:
+            raise RuntimeError(f"Failed to import {stats.documents_failed} documents")
 
     def _on_document_imported_callback(self, future):
         try:
@@ -71,6 +71,7 @@ class BaseModel(Model):
                 DocumentAuthor,
                 DocumentTag,
                 DocumentFTSIndex,
+                DocumentFingerprint,
             )
         )
         with database:
@@ -240,6 +241,23 @@ class Page(BaseModel):
         ).scalar()
 
 
+class DocumentFingerprint(BaseModel):
+    """The state of a document file when it was last synced to the bookshelf."""
+
+    path = TextField(unique=True, null=False)
+    size = IntegerField(null=False)
+    mtime_ns = IntegerField(null=False)
+    content_hash = TextField(null=False)
+    document = ForeignKeyField(
+        column_name="document_id",
+        field="id",
+        model=Document,
+        backref="fingerprints",
+        null=True,
+        on_delete="CASCADE",
+    )
+
+
 class DocumentAuthor(BaseModel):
     document = ForeignKeyField(
         column_name="document_id",
@@ -315,6 +333,10 @@ class DocumentFTSIndex(BaseModel, FTS5Model):
 
     @classmethod
     def add_document_to_search_index(cls, document_id):
+        return cls.add_documents_to_search_index([document_id])
+
+    @classmethod
+    def add_documents_to_search_index(cls, document_ids):
         return DocumentFTSIndex.insert_from(
             (
                 VwDocumentPage.select(
@@ -326,7 +348,7 @@ class DocumentFTSIndex(BaseModel, FTS5Model):
                 )
                 .join(Document, on=VwDocumentPage.document_id == Document.id)
                 .join(Page, on=VwDocumentPage.page_id == Page.id)
-                .where(Document.id == document_id)
+                .where(Document.id.in_(document_ids))
             ),
             fields=[
                 "rowid",
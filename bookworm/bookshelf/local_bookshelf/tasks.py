@@ -1,13 +1,17 @@
 # coding: utf-8
 
 import contextlib
+import itertools
 import os
+import queue
 import shutil
+import threading
+import time
 import urllib.parse
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
-from functools import partial
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
 
+import attr
 import more_itertools
 import peewee
 import requests
@@ -18,19 +22,28 @@ from bookworm import typehints as t
 from bookworm.concurrency import threaded_worker
 from bookworm.document import BaseDocument, create_document
 from bookworm.document.elements import DocumentInfo
+from bookworm.document.formats import get_supported_file_extensions
 from bookworm.document.uri import DocumentUri
+from bookworm.fingerprint import get_file_fingerprint, get_files_fingerprints
+from bookworm.image_io import ImageIO
 from bookworm.logger import logger
 from bookworm.runtime import IS_RUNNING_PORTABLE
 from bookworm.signals import app_shuttingdown, local_server_booting
-from bookworm.utils import generate_file_md5
 
 from .models import (DEFAULT_BOOKSHELF_DATABASE_FILE, Author, Category,
-                     Document, DocumentAuthor, DocumentFTSIndex, DocumentTag,
-                     Format, Page, Tag)
+                     Document, DocumentAuthor, DocumentFingerprint,
+                     DocumentFTSIndex, DocumentTag, Format, Page, Tag,
+                     database)
 
 log = logger.getChild(__name__)
 ADD_TO_BOOKSHELF_URL_PREFIX = "/add-to-bookshelf"
 local_bookshelf_process_executor = ProcessPoolExecutor(max_workers=8)
+PAGE_INSERT_BATCH_SIZE = 1000
+# Bounds the number of extracted documents held in memory while importing
+INGESTION_MAX_PENDING_EXTRACTIONS = 16
+# A transaction is committed when either of these limits is reached
+INGESTION_TRANSACTION_DOCUMENTS = 64
+INGESTION_TRANSACTION_PAGES = 20000
 
 
 @app_shuttingdown.connect
@@ -78,7 +91,7 @@ def copy_document_to_bundled_documents(source_document_path, bundled_documents_f
         bundled_documents_folder
     ):
         return source_document_path
-    src_md5 = generate_file_md5(source_document_path)
+    src_md5 = get_file_fingerprint(source_document_path, algorithm="md5")
     bundled_document_path = os.path.join(
         bundled_documents_folder, src_md5 + os.path.splitext(source_document_path)[-1]
     )
@@ -91,34 +104,162 @@ def copy_document_to_bundled_documents(source_document_path, bundled_documents_f
     return bundled_document_path
 
 
-def add_document_to_bookshelf(
-    document_or_uri: t.Union[BaseDocument, DocumentUri],
-    category_name: str,
-    tags_names: list[str],
-    should_add_to_fts: bool,
-    database_file: t.PathLike,
-):
-    """Add the given document to the bookshelf database."""
-    document = (
-        create_document(document_or_uri)
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class FileFingerprint:
+    """Identifies the state of a document file, to tell whether it changed since it was last synced."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+
+    @classmethod
+    def from_path(cls, path: t.PathLike) -> "FileFingerprint":
+        path = os.fspath(path)
+        stat_result = os.stat(path)
+        return cls(
+            path=path,
+            size=stat_result.st_size,
+            mtime_ns=stat_result.st_mtime_ns,
+            content_hash=get_file_fingerprint(path),
+        )
+
+
+@attr.s(auto_attribs=True, slots=True)
+class ExtractedDocument:
+    """Everything that is stored in the bookshelf about a document, extracted ahead of writing it."""
+
+    uri: DocumentUri
+    title: str
+    author: str
+    format: str
+    cover_image: t.Optional[ImageIO]
+    metadata: dict[str, t.Any]
+    pages: list[str] = attr.ib(factory=list)
+    # The id of an existing record with a malformed index to be replaced
+    replaces_document_id: t.Optional[int] = None
+    # The state of the source file, recorded for incremental folder syncs
+    fingerprint: t.Optional[FileFingerprint] = None
+
+
+@attr.s(auto_attribs=True, slots=True)
+class DuplicateDocument:
+    """A document file whose content is already in the bookshelf under a different path."""
+
+    uri: DocumentUri
+    fingerprint: FileFingerprint
+    document_id: int
+    # Nothing is extracted from duplicates
+    pages: tuple = ()
+
+
+@attr.s(auto_attribs=True, slots=True)
+class IngestionStats:
+    """Throughput metrics of adding documents to the bookshelf."""
+
+    documents_added: int = 0
+    documents_skipped: int = 0
+    documents_failed: int = 0
+    documents_unchanged: int = 0
+    documents_removed: int = 0
+    documents_duplicate: int = 0
+    pages_added: int = 0
+    transactions: int = 0
+    started_at: float = attr.ib(factory=time.perf_counter)
+    elapsed: float = 0.0
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started_at
+
+    @property
+    def documents_per_second(self) -> float:
+        return self.documents_added / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages_added / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (
+            f"Added {self.documents_added} documents ({self.pages_added} pages) "
+            f"in {self.elapsed:.2f} seconds using {self.transactions} transactions: "
+            f"{self.documents_per_second:.2f} documents/sec, {self.pages_per_second:.2f} pages/sec. "
+            f"Skipped: {self.documents_skipped}, failed: {self.documents_failed}, "
+            f"unchanged: {self.documents_unchanged}, removed: {self.documents_removed}, "
+            f"duplicates: {self.documents_duplicate}."
+        )
+
+
+def get_document_file_fingerprint(uri: DocumentUri) -> t.Optional[FileFingerprint]:
+    """Return the fingerprint of the file of the given document, if it is a local file."""
+    if not os.path.isfile(uri.path):
+        return
+    try:
+        return FileFingerprint.from_path(uri.path)
+    except OSError:
+        return
+
+
+def find_document_with_same_content(fingerprint: FileFingerprint) -> t.Optional[int]:
+    """Return the id of a document in the bookshelf whose file has the same content, but a different path."""
+    duplicate = (
+        DocumentFingerprint.select(DocumentFingerprint.document)
+        .where(
+            (DocumentFingerprint.content_hash == fingerprint.content_hash)
+            & (DocumentFingerprint.path != fingerprint.path)
+            & DocumentFingerprint.document.is_null(False)
+        )
+        .first()
+    )
+    if duplicate is not None:
+        return duplicate.document_id
+
+
+def extract_document_for_bookshelf(
+    document_or_uri: t.Union[BaseDocument, DocumentUri], should_add_to_fts: bool
+) -> t.Union[ExtractedDocument, DuplicateDocument, None]:
+    """
+    Collect what is stored in the bookshelf about the given document.
+    Return None if the document is already in the bookshelf.
+    Files whose content is already in the bookshelf are not opened at all.
+    This is CPU bound, and is meant to run in a worker process.
+    """
+    uri = (
+        document_or_uri
         if isinstance(document_or_uri, DocumentUri)
-        else document_or_uri
+        else document_or_uri.uri
     )
+    fingerprint = get_document_file_fingerprint(uri)
+    if (fingerprint is not None) and (
+        (document_id := find_document_with_same_content(fingerprint)) is not None
+    ):
+        log.debug(f"Document {uri} is a duplicate of document {document_id}")
+        return DuplicateDocument(
+            uri=uri, fingerprint=fingerprint, document_id=document_id
+        )
+    if isinstance(document_or_uri, DocumentUri):
+        with contextlib.closing(create_document(document_or_uri)) as document:
+            return _extract_document(document, should_add_to_fts, fingerprint)
+    return _extract_document(document_or_uri, should_add_to_fts, fingerprint)
+
+
+def _extract_document(document, should_add_to_fts, fingerprint):
+    replaces_document_id = None
     if (existing_doc := Document.get_or_none(uri=document.uri)) is not None:
         log.debug("Document already in the database...")
-        if should_add_to_fts:
-            log.debug("Checking index...")
-            db_page_count = (
-                DocumentFTSIndex.select()
-                .where(DocumentFTSIndex.document_id == existing_doc.get_id())
-                .count()
-            )
-            if db_page_count == len(document):
-                log.debug("Document index is OK")
-                return
-            else:
-                log.debug("Document index is not well formed. Rebuilding index...")
-                existing_doc.delete_instance()
+        if not should_add_to_fts:
+            return
+        log.debug("Checking index...")
+        db_page_count = (
+            DocumentFTSIndex.select()
+            .where(DocumentFTSIndex.document_id == existing_doc.get_id())
+            .count()
+        )
+        if db_page_count == len(document):
+            log.debug("Document index is OK")
+            return
+        log.debug("Document index is not well formed. Rebuilding index...")
+        replaces_document_id = existing_doc.get_id()
     if IS_RUNNING_PORTABLE:
         bundled_document_path = copy_document_to_bundled_documents(
             source_document_path=document.get_file_system_path(),
@@ -138,44 +279,291 @@ def add_document_to_bookshelf(
         except:
             cover_image = None
     metadata = document.metadata
-    format, __ = Format.get_or_create(name=uri.format)
-    if category_name:
-        category, __ = Category.get_or_create(name=category_name)
-    else:
-        category = None
-    log.debug("Adding document to the database ")
-    doc_info_dict = DocumentInfo.from_document(document).asdict(
-        excluded_fields=("cover_image",)
-    )
-    doc = Document.create(
+    return ExtractedDocument(
         uri=uri,
         title=metadata.title,
+        author=metadata.author,
+        format=uri.format,
         cover_image=cover_image,
-        format=format,
-        category=category,
-        metadata=doc_info_dict,
+        metadata=DocumentInfo.from_document(document).asdict(
+            excluded_fields=("cover_image",)
+        ),
+        pages=[page.get_text() for page in document] if should_add_to_fts else [],
+        replaces_document_id=replaces_document_id,
+        fingerprint=fingerprint,
     )
-    doc.save()
-    doc_id = doc.get_id()
-    if author_name := metadata.author:
-        author, __ = Author.get_or_create(name=author_name)
-        DocumentAuthor.create(document_id=doc_id, author_id=author.get_id())
-    if type(tags_names) is str:
-        tags_names = [t.strip() for t in tags_names.split(" ")]
-    tags = [
-        Tag.get_or_create(name=t_name)[0] for t in tags_names if (t_name := t.strip())
-    ]
-    for tag in tags:
-        DocumentTag.create(document_id=doc_id, tag_id=tag.get_id())
-    if should_add_to_fts:
+
+
+class BookshelfWriter:
+    """
+    Writes extracted documents to the bookshelf database.
+    Each batch of documents is written in a single transaction,
+    and lookup rows (formats, authors, tags) are only queried once per writer.
+    """
+
+    def __init__(self, category_name, tags_names, should_add_to_fts):
+        if type(tags_names) is str:
+            tags_names = [t.strip() for t in tags_names.split(" ")]
+        self.category_name = category_name
+        self.tags_names = [t_name for t in tags_names if (t_name := t.strip())]
+        self.should_add_to_fts = should_add_to_fts
+        self._format_ids = {}
+        self._author_ids = {}
+        self._category = None
+        self._tag_ids = None
+        # The documents written by this writer, by the content hash of their file
+        self._content_document_ids = {}
+
+    def _get_format_id(self, format_name):
+        if (format_id := self._format_ids.get(format_name)) is None:
+            format_id = Format.get_or_create(name=format_name)[0].get_id()
+            self._format_ids[format_name] = format_id
+        return format_id
+
+    def _get_author_id(self, author_name):
+        if (author_id := self._author_ids.get(author_name)) is None:
+            author_id = Author.get_or_create(name=author_name)[0].get_id()
+            self._author_ids[author_name] = author_id
+        return author_id
+
+    def _get_category(self):
+        if self.category_name and self._category is None:
+            self._category, __ = Category.get_or_create(name=self.category_name)
+        return self._category
+
+    def _get_tag_ids(self):
+        if self._tag_ids is None:
+            self._tag_ids = [
+                Tag.get_or_create(name=t_name)[0].get_id() for t_name in self.tags_names
+            ]
+        return self._tag_ids
+
+    def write_batch(self, documents: list[ExtractedDocument]) -> int:
+        """
+        Write the given documents in one transaction. Return the number of pages written.
+        The extraction workers only find duplicates that were committed before they started,
+        so a document whose content was written earlier by this writer is replaced,
+        in the given list, with a `DuplicateDocument`.
+        """
+        num_pages = 0
+        deduplicated = list(documents)
+        written_content = {}
+        try:
+            with database.atomic():
+                document_ids = []
+                for (index, extracted) in enumerate(deduplicated):
+                    if (
+                        duplicate := self._get_duplicate(extracted, written_content)
+                    ) is not None:
+                        deduplicated[index] = extracted = duplicate
+                    if isinstance(extracted, DuplicateDocument):
+                        record_document_fingerprint(
+                            extracted.fingerprint, extracted.document_id
+                        )
+                        continue
+                    document_id = self._write_document(extracted)
+                    document_ids.append(document_id)
+                    if (fingerprint := extracted.fingerprint) is not None:
+                        written_content[fingerprint.content_hash] = document_id
+                    num_pages += len(extracted.pages)
+                if self.should_add_to_fts and num_pages:
+                    DocumentFTSIndex.add_documents_to_search_index(
+                        document_ids
+                    ).execute()
+        except:
+            # Rows created in the rolled back transaction no longer exist
+            self._format_ids.clear()
+            self._author_ids.clear()
+            self._category = self._tag_ids = None
+            raise
+        self._content_document_ids.update(written_content)
+        documents[:] = deduplicated
+        return num_pages
+
+    def _get_duplicate(
+        self, extracted, written_content: dict[str, int]
+    ) -> t.Optional[DuplicateDocument]:
+        if (
+            (not isinstance(extracted, ExtractedDocument))
+            or (extracted.fingerprint is None)
+            or (extracted.replaces_document_id is not None)
+        ):
+            return
+        content_hash = extracted.fingerprint.content_hash
+        document_id = written_content.get(content_hash)
+        if document_id is None:
+            document_id = self._content_document_ids.get(content_hash)
+        if document_id is not None:
+            log.debug(f"Document {extracted.uri} duplicates document {document_id}")
+            return DuplicateDocument(
+                uri=extracted.uri,
+                fingerprint=extracted.fingerprint,
+                document_id=document_id,
+            )
+
+    def _write_document(self, extracted: ExtractedDocument) -> int:
+        if extracted.replaces_document_id is not None:
+            Document.delete_by_id(extracted.replaces_document_id)
+        log.debug("Adding document to the database ")
+        doc = Document.create(
+            uri=extracted.uri,
+            title=extracted.title,
+            cover_image=extracted.cover_image,
+            format=self._get_format_id(extracted.format),
+            category=self._get_category(),
+            metadata=extracted.metadata,
+        )
+        doc_id = doc.get_id()
+        if extracted.author:
+            DocumentAuthor.insert(
+                document_id=doc_id, author_id=self._get_author_id(extracted.author)
+            ).execute()
+        for tag_id in self._get_tag_ids():
+            DocumentTag.insert(document_id=doc_id, tag_id=tag_id).execute()
         fields = [Page.number, Page.content, Page.document]
-        page_objs = ((page.index, page.get_text(), doc) for page in document)
-        for batch in more_itertools.chunked(page_objs, 100):
+        page_rows = (
+            (index, text, doc_id) for (index, text) in enumerate(extracted.pages)
+        )
+        for batch in more_itertools.chunked(page_rows, PAGE_INSERT_BATCH_SIZE):
             Page.insert_many(batch, fields).execute()
-        DocumentFTSIndex.add_document_to_search_index(doc.get_id()).execute()
+        if (fingerprint := extracted.fingerprint) is not None:
+            record_document_fingerprint(fingerprint, doc_id)
+        return doc_id
+
+
+def record_document_fingerprint(fingerprint: FileFingerprint, document_id: int):
+    DocumentFingerprint.replace(
+        path=fingerprint.path,
+        size=fingerprint.size,
+        mtime_ns=fingerprint.mtime_ns,
+        content_hash=fingerprint.content_hash,
+        document=document_id,
+    ).execute()
+
+
+def add_document_to_bookshelf(
+    document_or_uri: t.Union[BaseDocument, DocumentUri],
+    category_name: str,
+    tags_names: list[str],
+    should_add_to_fts: bool,
+    database_file: t.PathLike,
+):
+    """Add the given document to the bookshelf database."""
+    extracted = extract_document_for_bookshelf(document_or_uri, should_add_to_fts)
+    if extracted is None:
+        return
+    BookshelfWriter(category_name, tags_names, should_add_to_fts).write_batch(
+        [extracted]
+    )
+    if should_add_to_fts:
         DocumentFTSIndex.optimize()
 
 
+def ingest_documents(
+    uris: t.Iterable[DocumentUri],
+    category_name: str,
+    tags_names: list[str],
+    should_add_to_fts: bool,
+    stats: IngestionStats = None,
+) -> IngestionStats:
+    """
+    Add many documents to the bookshelf.
+    Documents are extracted in parallel by the bookshelf process pool, and written
+    by a single writer thread in large transactions. The full text index is optimized
+    once, after all the documents have been added.
+    """
+    stats = stats or IngestionStats()
+    writer = BookshelfWriter(category_name, tags_names, should_add_to_fts)
+    extracted_queue = queue.Queue(maxsize=INGESTION_MAX_PENDING_EXTRACTIONS)
+    writer_thread = threading.Thread(
+        target=_write_extracted_documents,
+        args=(writer, extracted_queue, stats),
+        name="bookshelf.ingestion.writer",
+        daemon=True,
+    )
+    writer_thread.start()
+    try:
+        for extracted in _extract_documents_in_parallel(uris, should_add_to_fts, stats):
+            extracted_queue.put(extracted)
+    finally:
+        extracted_queue.put(None)
+        writer_thread.join()
+    if should_add_to_fts and stats.documents_added:
+        DocumentFTSIndex.optimize()
+    stats.finish()
+    log.info(str(stats))
+    return stats
+
+
+def _extract_documents_in_parallel(uris, should_add_to_fts, stats):
+    uris = iter(uris)
+    pending = set()
+    while True:
+        for uri in itertools.islice(
+            uris, INGESTION_MAX_PENDING_EXTRACTIONS - len(pending)
+        ):
+            pending.add(
+                local_bookshelf_process_executor.submit(
+                    extract_document_for_bookshelf, uri, should_add_to_fts
+                )
+            )
+        if not pending:
+            return
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                extracted = future.result()
+            except Exception:
+                log.exception("Failed to extract document", exc_info=True)
+                stats.documents_failed += 1
+                continue
+            if extracted is None:
+                stats.documents_skipped += 1
+            else:
+                yield extracted
+
+
+def _write_extracted_documents(writer, extracted_queue, stats):
+    batch = []
+    batch_pages = 0
+    while True:
+        extracted = extracted_queue.get()
+        if extracted is not None:
+            batch.append(extracted)
+            batch_pages += len(extracted.pages)
+        is_done = extracted is None
+        if batch and (
+            is_done
+            or len(batch) >= INGESTION_TRANSACTION_DOCUMENTS
+            or batch_pages >= INGESTION_TRANSACTION_PAGES
+        ):
+            _write_batch(writer, batch, stats)
+            batch = []
+            batch_pages = 0
+        if is_done:
+            return
+
+
+def _write_batch(writer, batch, stats):
+    try:
+        stats.pages_added += writer.write_batch(batch)
+    except Exception:
+        if len(batch) > 1:
+            # Do not let a single bad document roll back the whole batch
+            for extracted in batch:
+                _write_batch(writer, [extracted], stats)
+            return
+        log.exception(
+            f"Failed to write document {batch[0].uri} to the bookshelf", exc_info=True
+        )
+        stats.documents_failed += 1
+    else:
+        num_duplicates = sum(isinstance(doc, DuplicateDocument) for doc in batch)
+        stats.documents_duplicate += num_duplicates
+        stats.documents_added += len(batch) - num_duplicates
+        stats.transactions += 1
+
+
 def add_to_bookshelf_view():
     data = request.json
     doc_uri = data["document_uri"]
@@ -199,42 +587,193 @@ def add_to_bookshelf_view():
             return {"status": "OK", "document_uri": doc_uri}
 
 
-def import_folder_to_bookshelf(folder, category_name, should_add_to_fts):
-    folder = Path(folder)
-    if (not folder.is_dir()) or (not folder.exists()):
+def get_supported_document_extensions() -> set[str]:
+    return set(get_supported_file_extensions(include_internal=False))
+
+
+def iter_folder_documents(
+    folder: t.PathLike, failed_paths: t.Optional[list[str]] = None
+) -> t.Iterator[os.DirEntry]:
+    """
+    Recursively yield the supported document files found in the given folder.
+    The paths of the folders and entries that could not be scanned are appended
+    to `failed_paths`, if given.
+    """
+    extensions = get_supported_document_extensions()
+    folders = [os.fspath(folder)]
+    while folders:
+        current_folder = folders.pop()
+        try:
+            entries = os.scandir(current_folder)
+        except OSError:
+            log.exception(f"Failed to scan folder {current_folder}", exc_info=True)
+            if failed_paths is not None:
+                failed_paths.append(current_folder)
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        folders.append(entry.path)
+                    elif entry.is_file() and (
+                        os.path.splitext(entry.name)[-1] in extensions
+                    ):
+                        yield entry
+                except OSError:
+                    log.exception(f"Failed to scan {entry.path}", exc_info=True)
+                    if failed_paths is not None:
+                        failed_paths.append(entry.path)
+
+
+def sync_folder_to_bookshelf(
+    folder: t.PathLike, category_name: str, should_add_to_fts: bool
+) -> IngestionStats:
+    """
+    Bring the bookshelf in sync with the documents found in the given folder and its sub folders.
+    Files are matched against the fingerprints recorded when they were last synced:
+    unchanged files are not opened at all, a file whose size or mtime changed is only
+    re-extracted if its content hash changed too, and documents whose files were
+    deleted are removed from the bookshelf. Documents under sub folders that could
+    not be scanned are kept as they are.
+    """
+    folder = Path(folder).resolve()
+    if not folder.is_dir():
         raise FileNotFoundError(f"Folder {folder} not found") from RuntimeError
-    all_document_extensions = set()
-    for doc_cls in BaseDocument.document_classes.values():
-        if not doc_cls.__internal__:
-            all_document_extensions.update(ext.strip("*") for ext in doc_cls.extensions)
-    doc_filenames = (
-        filename
-        for filename in folder.iterdir()
-        if (filename.is_file()) and (filename.suffix in all_document_extensions)
-    )
-    with ThreadPoolExecutor(
-        max_workers=8, thread_name_prefix="bookshelf.import.folder"
-    ) as executor:
-        for retval in executor.map(
-            partial(_import_document, category_name, should_add_to_fts), doc_filenames
+    stats = IngestionStats()
+    folder_prefix = os.path.join(os.fspath(folder), "")
+    known_fingerprints = {
+        fp.path: fp
+        for fp in DocumentFingerprint.select().where(
+            DocumentFingerprint.path.startswith(folder_prefix)
+        )
+    }
+    paths_to_ingest = []
+    stat_changed = {}
+    failed_paths = []
+    for entry in iter_folder_documents(folder, failed_paths):
+        known = known_fingerprints.pop(entry.path, None)
+        try:
+            stat_result = entry.stat()
+        except OSError:
+            continue
+        if known is None:
+            paths_to_ingest.append(entry.path)
+            continue
+        if (known.size, known.mtime_ns) == (
+            stat_result.st_size,
+            stat_result.st_mtime_ns,
         ):
-            if retval:
-                log.info(f"Added document: {retval}")
+            stats.documents_unchanged += 1
+        else:
+            stat_changed[entry.path] = (known, stat_result)
+    touched_fingerprints = []
+    changed_paths = []
+    content_hashes = get_files_fingerprints(stat_changed)
+    for (path, (known, stat_result)) in stat_changed.items():
+        if (content_hash := content_hashes[path]) is None:
+            continue
+        if content_hash == known.content_hash:
+            # Touched, but not modified
+            current_fingerprint = FileFingerprint(
+                path=path,
+                size=stat_result.st_size,
+                mtime_ns=stat_result.st_mtime_ns,
+                content_hash=content_hash,
+            )
+            touched_fingerprints.append((current_fingerprint, known.document_id))
+            stats.documents_unchanged += 1
+        else:
+            changed_paths.append(path)
+            paths_to_ingest.append(path)
+    if failed_paths:
+        # The files under the paths that could not be scanned may still exist
+        failed_folder_prefixes = tuple(os.path.join(path, "") for path in failed_paths)
+        for path in list(known_fingerprints):
+            if (path in failed_paths) or path.startswith(failed_folder_prefixes):
+                del known_fingerprints[path]
+    with database.atomic():
+        for (fingerprint, document_id) in touched_fingerprints:
+            record_document_fingerprint(fingerprint, document_id)
+        _detach_document_files(changed_paths)
+        # Whatever is left was not found in the folder
+        stats.documents_removed = _detach_document_files(list(known_fingerprints))
+    ingest_documents(
+        (DocumentUri.from_filename(path) for path in paths_to_ingest),
+        category_name,
+        tags_names=(),
+        should_add_to_fts=should_add_to_fts,
+        stats=stats,
+    )
+    _record_fingerprints_of_existing_documents(paths_to_ingest)
+    log.info(f"Synced folder {folder}: {stats}")
+    return stats
 
 
-def _import_document(category_name, should_add_to_fts, filename):
-    try:
-        uri = DocumentUri.from_filename(filename)
-        with contextlib.closing(create_document(uri)) as document:
-            add_document_to_bookshelf(
-                document,
-                category_name,
-                tags_names=(),
-                should_add_to_fts=should_add_to_fts,
-                database_file=DEFAULT_BOOKSHELF_DATABASE_FILE,
+def _detach_document_files(paths: list[str]) -> int:
+    """
+    Forget the fingerprints of the given files.
+    Documents that are no longer backed by any file are deleted, and documents whose
+    file was detached are moved to one of their remaining duplicates.
+    Return the number of deleted documents.
+    """
+    document_ids = set()
+    for batch in more_itertools.chunked(paths, PAGE_INSERT_BATCH_SIZE):
+        document_ids.update(
+            fp.document_id
+            for fp in DocumentFingerprint.select(DocumentFingerprint.document).where(
+                DocumentFingerprint.path.in_(batch)
             )
-    except:
-        return
+            if fp.document_id is not None
+        )
+        DocumentFingerprint.delete().where(
+            DocumentFingerprint.path.in_(batch)
+        ).execute()
+    detached_paths = set(paths)
+    num_deleted = 0
+    for document_id in document_ids:
+        remaining = DocumentFingerprint.get_or_none(
+            DocumentFingerprint.document == document_id
+        )
+        if remaining is None:
+            Document.delete_by_id(document_id)
+            num_deleted += 1
+            continue
+        document = Document.get_or_none(id=document_id)
+        if (document is not None) and (document.uri.path in detached_paths):
+            document.uri = document.uri.create_copy(path=remaining.path)
+            document.save()
+    return num_deleted
+
+
+def _record_fingerprints_of_existing_documents(paths):
+    """
+    Documents that were in the bookshelf before their folder was first synced are skipped
+    by the ingestion, so they have no fingerprints yet.
+    """
+    fingerprinted_paths = set()
+    for batch in more_itertools.chunked(paths, PAGE_INSERT_BATCH_SIZE):
+        fingerprinted_paths.update(
+            fp.path
+            for fp in DocumentFingerprint.select(DocumentFingerprint.path).where(
+                DocumentFingerprint.path.in_(batch)
+            )
+        )
+    with database.atomic():
+        for path in paths:
+            if path in fingerprinted_paths:
+                continue
+            document = Document.get_or_none(uri=DocumentUri.from_filename(path))
+            if document is None:
+                continue
+            try:
+                fingerprint = FileFingerprint.from_path(path)
+            except OSError:
+                continue
+            record_document_fingerprint(fingerprint, document.get_id())
+
+
+def import_folder_to_bookshelf(folder, category_name, should_add_to_fts):
+    return sync_folder_to_bookshelf(folder, category_name, should_add_to_fts)
 
 
 def bundle_single_document(database_file, doc_instance):
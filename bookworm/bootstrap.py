@@ -9,6 +9,7 @@ from functools import partial
 import wx
 
 from bookworm import app as appinfo
+from bookworm.batch_extract import ExtractSubcommandHandler
 from bookworm.commandline_handler import (BaseSubcommandHandler,
                                           handle_app_commandline_args,
                                           register_subcommand)
@@ -3,23 +3,32 @@
 from __future__ import annotations
 
 import inspect
+import io
 import multiprocessing as mp
 import os
+import pickle
+import queue
 import sys
 import threading
+from collections import OrderedDict
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from contextlib import suppress
 from enum import IntEnum
 from functools import partial, wraps
+from multiprocessing.reduction import ForkingPickler
 from traceback import format_exception
 
 import attr
 
 import bookworm.typehints as t
 from bookworm.logger import logger
-from bookworm.signals import app_shuttingdown, app_starting
+from bookworm.signals import app_shuttingdown, app_started, app_starting
 
 log = logger.getChild(__name__)
+# The number of pre-started processes that run `QueueProcess` operations
+WARM_WORKER_COUNT = min(os.cpu_count() or 1, 2)
+# The number of objects, usually open documents, that each warm worker keeps between operations
+WARM_WORKER_CACHED_OBJECTS = 2
 
 
 # An executor for background tasks (designated for i/o bound tasks)
@@ -35,6 +44,7 @@ def _shutdown_concurrent_workers(sender):
     log.debug("Canceling  background tasks.")
     threaded_worker.shutdown(wait=False, cancel_futures=True)
     process_worker.shutdown(wait=False)
+    warm_worker_pool.shutdown()
 
 
 def call_threaded(func: t.Callable[..., None]) -> t.Callable[..., "Future"]:
@@ -64,6 +74,9 @@ class CancellationToken:
     def request_cancellation(self):
         self._cancel_event.set()
 
+    def reset(self):
+        self._cancel_event.clear()
+
     def is_cancellation_requested(self):
         return self._cancel_event.is_set()
 
@@ -108,6 +121,30 @@ class QPChannel:
         self.writer.close()
 
 
+def _iter_producer(producer: t.Generator, channel: QPChannel) -> t.Iterator[t.Any]:
+    try:
+        for item in producer:
+            yield item
+    except GeneratorExit:
+        producer.close()
+        channel.cancel()
+
+
+def run_producer(producer: t.Generator, channel: QPChannel):
+    """Send the values of the generator over the channel, until it is exhausted or cancelled."""
+    gen = _iter_producer(producer, channel)
+    try:
+        while True:
+            item = next(gen)
+            channel.push(item)
+            if channel.is_cancellation_requested():
+                gen.close()
+    except StopIteration:
+        channel.done()
+    except Exception as e:
+        channel.exception(*sys.exc_info())
+
+
 class QueueProcess(mp.Process):
     """
     A process that runs a generator in parallel, yielding values from it.
@@ -127,11 +164,14 @@ class QueueProcess(mp.Process):
         self.cancellable = cancellable
         self.channel = QPChannel()
         self._done_callback = None
+        self._warm_worker = None
 
     def cancel(self):
         if not self.cancellable:
             raise TypeError("Uncancellable operation")
         self.channel.cancellation_token.request_cancellation()
+        if (worker := self._warm_worker) is not None:
+            worker.request_cancellation(self)
 
     def is_cancelled(self):
         return self.channel.cancellation_token.is_cancellation_requested()
@@ -139,27 +179,8 @@ class QueueProcess(mp.Process):
     def add_done_callback(self, callback, *args, **kwargs):
         self._done_callback = partial(callback, *args, **kwargs)
 
-    def _generator(self):
-        _producer = self._target(*self._args, **self._kwargs)
-        try:
-            for item in _producer:
-                yield item
-        except GeneratorExit:
-            _producer.close()
-            self.channel.cancel()
-
     def run(self):
-        gen = self._generator()
-        try:
-            while True:
-                item = next(gen)
-                self.channel.push(item)
-                if self.is_cancelled():
-                    gen.close()
-        except StopIteration:
-            self.channel.done()
-        except Exception as e:
-            self.channel.exception(*sys.exc_info())
+        run_producer(self._target(*self._args, **self._kwargs), self.channel)
 
     def close(self):
         self.channel.close()
@@ -171,32 +192,352 @@ class QueueProcess(mp.Process):
     def iter_queue(self) -> QPIteratorType:
         if self.is_alive():
             raise RuntimeError("Can only iterate process once.")
+        if (worker := warm_worker_pool.submit(self)) is not None:
+            yield from self._iter_warm_worker(worker)
+            return
         self.start()
         try:
-            while True:
-                flag, result = self.channel.get()
-                if flag is QPResult.OK:
-                    yield result
-                elif flag is QPResult.DEBUG:
-                    log.debug(f"REMOTE PROCESS: {result}")
-                elif flag is QPResult.COMPLETED:
-                    if self._done_callback is not None:
-                        self._done_callback()
-                    break
-                elif flag is QPResult.FAILED:
-                    exc_value, tb_text = result
-                    log.exception(
-                        f"Remote exception from {self}.\nTraceback:\n{tb_text}"
-                    )
-                    raise exc_value
-                elif flag is QPResult.CANCELLED:
-                    break
+            yield from self._iter_channel(self.channel)
         finally:
             self.join()
             self.close()
 
+    def _iter_warm_worker(self, worker: WarmWorker) -> QPIteratorType:
+        """Run the operation in a worker of the warm pool, which speaks the same protocol."""
+        self._warm_worker = worker
+        if self.is_cancelled():
+            worker.request_cancellation(self)
+        try:
+            yield from self._iter_channel(worker.channel)
+        finally:
+            self._warm_worker = None
+            warm_worker_pool.release(worker)
+            self.channel.close()
+
+    def _iter_channel(self, channel: QPChannel) -> QPIteratorType:
+        while True:
+            flag, result = channel.get()
+            if flag is QPResult.OK:
+                yield result
+            elif flag is QPResult.DEBUG:
+                log.debug(f"REMOTE PROCESS: {result}")
+            elif flag is QPResult.COMPLETED:
+                if self._done_callback is not None:
+                    self._done_callback()
+                break
+            elif flag is QPResult.FAILED:
+                exc_value, tb_text = result
+                log.exception(f"Remote exception from {self}.\nTraceback:\n{tb_text}")
+                raise exc_value
+            elif flag is QPResult.CANCELLED:
+                break
+
     @call_threaded
     def map(self, callback):
         """Asynchronously generate values and invoke the given callback with each generated value."""
         for value in self:
             callback(value)
+
+
+def iter_queue_processes_in_order(processes: t.Iterable[QueueProcess]) -> t.Iterator[t.Any]:
+    """
+    Run the given processes concurrently, yielding their values in the order
+    the processes were given, i.e. all values of the first process, then the second, etc.
+    Closing the returned generator cancels the processes that are still running.
+    """
+    processes = tuple(processes)
+    buffers = [queue.SimpleQueue() for _p in processes]
+
+    def _drain(process, buffer):
+        try:
+            for value in process:
+                buffer.put((QPResult.OK, value))
+        except Exception as e:
+            buffer.put((QPResult.FAILED, e))
+        else:
+            buffer.put((QPResult.COMPLETED, None))
+
+    for (process, buffer) in zip(processes, buffers):
+        threading.Thread(
+            target=_drain,
+            args=(process, buffer),
+            daemon=True,
+            name=f"bookworm.{process.name}.drain",
+        ).start()
+    try:
+        for buffer in buffers:
+            while True:
+                flag, value = buffer.get()
+                if flag is QPResult.OK:
+                    yield value
+                elif flag is QPResult.FAILED:
+                    raise value
+                else:
+                    break
+    finally:
+        for process in processes:
+            if process.cancellable:
+                process.cancel()
+
+
+class WorkerObjectPickler(ForkingPickler):
+    """
+    Pickles the operations sent to warm workers. An object with a `get_worker_cache_key` method
+    is sent along with its key, so that a worker that already holds an object with the same key
+    reuses it, rather than unpickling (e.g. re-reading) it again.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_keys = []
+
+    def persistent_id(self, obj):
+        if isinstance(obj, type) or (
+            get_key := getattr(type(obj), "get_worker_cache_key", None)
+        ) is None:
+            return
+        if (key := get_key(obj)) is None:
+            return
+        self.cache_keys.append(key)
+        return (key, bytes(ForkingPickler.dumps(obj)))
+
+    @classmethod
+    def dump_operation(cls, target, args, kwargs) -> tuple[bytes, list[t.Hashable]]:
+        buf = io.BytesIO()
+        pickler = cls(buf)
+        pickler.dump((target, args, kwargs))
+        return buf.getvalue(), pickler.cache_keys
+
+
+class _WorkerObjectUnpickler(pickle.Unpickler):
+    def __init__(self, file, cached_objects: OrderedDict):
+        super().__init__(file)
+        self.cached_objects = cached_objects
+
+    def persistent_load(self, pid):
+        key, payload = pid
+        if (obj := self.cached_objects.get(key)) is None:
+            obj = pickle.loads(payload)
+        self.cached_objects[key] = obj
+        self.cached_objects.move_to_end(key)
+        return obj
+
+
+def _trim_cached_objects(cached_objects: OrderedDict):
+    while len(cached_objects) > WARM_WORKER_CACHED_OBJECTS:
+        __, obj = cached_objects.popitem(last=False)
+        if (close := getattr(obj, "close", None)) is not None:
+            with suppress(Exception):
+                close()
+
+
+def _warm_worker_main(task_reader, channel: QPChannel):
+    # Pay for importing the document backends once, rather than for every operation
+    with suppress(ImportError):
+        import bookworm.document
+    cached_objects = OrderedDict()
+    while True:
+        try:
+            payload = task_reader.recv_bytes()
+        except EOFError:
+            break
+        if not payload:
+            break
+        try:
+            target, args, kwargs = _WorkerObjectUnpickler(
+                io.BytesIO(payload), cached_objects
+            ).load()
+        except Exception:
+            channel.exception(*sys.exc_info())
+        else:
+            run_producer(target(*args, **kwargs), channel)
+        # Objects are closed only after the operation that uses them is done
+        _trim_cached_objects(cached_objects)
+    for obj in cached_objects.values():
+        with suppress(Exception):
+            obj.close()
+
+
+class WarmWorkerChannel(QPChannel):
+    """The channel of a warm worker, which tracks whether its current operation has ended."""
+
+    def __init__(self):
+        super().__init__()
+        self.operation_ended = True
+
+    def get(self):
+        try:
+            flag, result = super().get()
+        except (EOFError, OSError) as e:
+            self.operation_ended = True
+            raise RuntimeError("The warm worker has exited unexpectedly.") from e
+        # A cancelled operation still ends with either of these
+        if flag in (QPResult.COMPLETED, QPResult.FAILED):
+            self.operation_ended = True
+        return flag, result
+
+
+class WarmWorker:
+    """A process that runs `QueueProcess` operations one after another."""
+
+    def __init__(self):
+        self.channel = WarmWorkerChannel()
+        self._task_reader, self._task_writer = mp.Pipe(duplex=False)
+        # Mirrors the objects the worker process keeps open
+        self.cached_keys = OrderedDict()
+        self._owner = None
+        self._lock = threading.Lock()
+        self.process = mp.Process(
+            target=_warm_worker_main,
+            args=(self._task_reader, self.channel),
+            daemon=True,
+            name="bookworm-warm-worker",
+        )
+
+    def start(self):
+        self.process.start()
+        # Only the worker holds these ends now, so reading from the channel fails if it exits
+        self.channel.writer.close()
+        self._task_reader.close()
+
+    def stop(self):
+        with suppress(OSError):
+            self._task_writer.send_bytes(b"")
+        self._task_writer.close()
+        self.channel.close()
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def count_cached(self, cache_keys: t.Iterable[t.Hashable]) -> int:
+        return sum(1 for key in cache_keys if key in self.cached_keys)
+
+    def submit(self, owner: QueueProcess, payload: bytes, cache_keys: list[t.Hashable]):
+        with self._lock:
+            self._owner = owner
+            self.channel.cancellation_token.reset()
+            self.channel.operation_ended = False
+        self._task_writer.send_bytes(payload)
+        for key in cache_keys:
+            self.cached_keys[key] = None
+            self.cached_keys.move_to_end(key)
+        while len(self.cached_keys) > WARM_WORKER_CACHED_OBJECTS:
+            self.cached_keys.popitem(last=False)
+
+    def request_cancellation(self, owner: QueueProcess):
+        with self._lock:
+            # The worker may have moved on to an operation of someone else
+            if (self._owner is owner) and not self.channel.operation_ended:
+                self.channel.cancellation_token.request_cancellation()
+
+    def release(self):
+        with self._lock:
+            self._owner = None
+            if not self.channel.operation_ended:
+                self.channel.cancellation_token.request_cancellation()
+
+    def drain(self):
+        """Discard the values of an abandoned operation, until it ends."""
+        with suppress(RuntimeError):
+            while not self.channel.operation_ended:
+                self.channel.get()
+
+
+class WarmWorkerPool:
+    """
+    Pre-started processes that run `QueueProcess` operations, instead of starting a new process
+    for each operation. Each worker keeps the documents of its recent operations open, and an
+    operation is dispatched to the worker that already holds its document, if it is idle.
+    When all workers are busy, operations run in new processes as usual.
+    """
+
+    def __init__(self, num_workers: int = WARM_WORKER_COUNT):
+        self.num_workers = num_workers
+        self.is_running = False
+        self._idle_workers: list[WarmWorker] = []
+        self._lock = threading.Lock()
+        self._owner_pid = None
+
+    def start(self):
+        with self._lock:
+            if self.is_running:
+                return
+            self.is_running = True
+            self._owner_pid = os.getpid()
+        log.debug(f"Starting {self.num_workers} warm workers")
+        for __ in range(self.num_workers):
+            self._add_worker()
+
+    def shutdown(self):
+        with self._lock:
+            self.is_running = False
+            workers, self._idle_workers = self._idle_workers, []
+        for worker in workers:
+            worker.stop()
+
+    def submit(self, process: QueueProcess) -> t.Optional[WarmWorker]:
+        """Send the operation of the given process to an idle worker, and return that worker."""
+        # Forked child processes inherit the pool, but not the ownership of its workers
+        if (not self._idle_workers) or (os.getpid() != self._owner_pid):
+            return
+        try:
+            payload, cache_keys = WorkerObjectPickler.dump_operation(
+                process._target, process._args, process._kwargs
+            )
+        except Exception:
+            log.debug(f"Could not send {process} to a warm worker", exc_info=True)
+            return
+        with self._lock:
+            if not self._idle_workers:
+                return
+            worker = max(
+                self._idle_workers, key=lambda worker: worker.count_cached(cache_keys)
+            )
+            self._idle_workers.remove(worker)
+        try:
+            worker.submit(process, payload, cache_keys)
+        except OSError:
+            self._return_worker(worker)
+            return
+        return worker
+
+    def release(self, worker: WarmWorker):
+        worker.release()
+        if worker.channel.operation_ended:
+            self._return_worker(worker)
+            return
+        try:
+            threaded_worker.submit(self._drain_and_return_worker, worker)
+        except RuntimeError:
+            worker.stop()
+
+    def _drain_and_return_worker(self, worker: WarmWorker):
+        worker.drain()
+        self._return_worker(worker)
+
+    def _return_worker(self, worker: WarmWorker):
+        if self.is_running and worker.is_alive():
+            with self._lock:
+                self._idle_workers.append(worker)
+            return
+        worker.stop()
+        if self.is_running:
+            log.warning("A warm worker has exited. Starting a new one.")
+            self._add_worker()
+
+    def _add_worker(self):
+        worker = WarmWorker()
+        worker.start()
+        with self._lock:
+            if self.is_running:
+                self._idle_workers.append(worker)
+                return
+        worker.stop()
+
+
+warm_worker_pool = WarmWorkerPool()
+
+
+@app_started.connect
+def _start_warm_worker_pool(sender):
+    threaded_worker.submit(warm_worker_pool.start)
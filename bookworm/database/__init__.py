@@ -14,6 +14,7 @@ from bookworm.paths import db_path as get_db_path
 
 from .models import (Book, DocumentPositionInfo, GetOrCreateMixin,
                      PinnedDocument, RecentDocument)
+from .position_store import ReadingPositionStore, reading_position_store
 from .schema import upgrade_database_schema
 
 log = logger.getChild(__name__)
@@ -23,3 +24,4 @@ def init_database():
     db_path = os.path.join(get_db_path(), "database.sqlite")
     db.Model.setup_database(f"sqlite:///{db_path}", create=True)
     upgrade_database_schema(db.Model.session)
+    reading_position_store.recover()
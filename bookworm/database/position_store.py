@@ -0,0 +1,214 @@
+# coding: utf-8
+
+"""
+A write-behind store for the reading position of the currently open documents.
+Positions are kept in memory and written to the database in a single commit at most
+every few seconds, and when a document is closed or the application shuts down.
+In between, changed positions are appended to a journal file about every second,
+which is replayed at startup, so positions are not lost if the application crashes
+before a flush. Recording a position does no I/O; the store's timer does it.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+
+from sqlalchemy.orm.attributes import set_committed_value
+
+from bookworm import typehints as t
+from bookworm.document.uri import DocumentUri
+from bookworm.logger import logger
+from bookworm.paths import db_path
+from bookworm.signals import app_shuttingdown, reader_book_unloaded
+
+from .models import DocumentPositionInfo
+
+log = logger.getChild(__name__)
+# The maximum number of seconds a position is held in memory before it is committed
+POSITION_FLUSH_INTERVAL = 5.0
+# The maximum number of seconds a position is held in memory before it is journaled
+POSITION_JOURNAL_INTERVAL = 1.0
+POSITION_JOURNAL_FILENAME = "reading_positions.journal"
+
+
+class ReadingPositionStore:
+    """Coalesces reading position updates, and commits them to the database in batches."""
+
+    def __init__(
+        self,
+        journal_path: t.PathLike = None,
+        flush_interval: float = POSITION_FLUSH_INTERVAL,
+        journal_interval: float = POSITION_JOURNAL_INTERVAL,
+    ):
+        self.journal_path = journal_path
+        self.flush_interval = flush_interval
+        self.journal_interval = min(journal_interval, flush_interval)
+        # The number of database commits done by this store
+        self.commit_count = 0
+        # Maps the id of each document to its uri and pending position
+        self._pending: dict[int, tuple[DocumentUri, int, int]] = {}
+        # The ids of the documents whose pending position is not in the journal yet
+        self._unjournaled: set[int] = set()
+        # When the oldest pending position was recorded
+        self._pending_since = None
+        self._lock = threading.RLock()
+        self._journal = None
+        self._timer = None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {len(self._pending)} pending>"
+
+    def get_journal_path(self) -> str:
+        if self.journal_path is None:
+            self.journal_path = db_path(POSITION_JOURNAL_FILENAME)
+        return os.fspath(self.journal_path)
+
+    def set_position(self, position_info: DocumentPositionInfo, page: int, pos: int):
+        """Record the position in memory, to be journaled and committed by the timer."""
+        # Keep the loaded instance up to date, without making it part of the next commit
+        set_committed_value(position_info, "last_page", page)
+        set_committed_value(position_info, "last_position", pos)
+        document_id = position_info.id
+        with self._lock:
+            if self._pending.get(document_id, (None, None, None))[1:] == (page, pos):
+                return
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending[document_id] = (position_info.uri, page, pos)
+            self._unjournaled.add(document_id)
+            if self._timer is None:
+                self._start_timer()
+
+    def _start_timer(self):
+        self._timer = threading.Timer(self.journal_interval, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            if not self._pending:
+                return
+            if (time.monotonic() - self._pending_since) >= self.flush_interval:
+                self.flush()
+            else:
+                self._write_journal()
+                self._start_timer()
+
+    def _write_journal(self):
+        """Append the positions that changed since the last write to the journal."""
+        if not self._unjournaled:
+            return
+        try:
+            if self._journal is None:
+                self._journal = open(self.get_journal_path(), "a", encoding="utf-8")
+            for document_id in self._unjournaled:
+                (uri, page, pos) = self._pending[document_id]
+                uri_string = uri.to_uri_string()
+                self._journal.write(
+                    json.dumps({"uri": uri_string, "page": page, "pos": pos}) + "\n"
+                )
+            # Hand the entries to the OS, so that they survive a crash of the application
+            self._journal.flush()
+        except OSError:
+            log.exception("Failed to write reading position journal", exc_info=True)
+        else:
+            self._unjournaled.clear()
+
+    def flush(self):
+        """
+        Commit all the pending positions in one transaction, and clear the journal.
+        The positions are written by id in the session of the calling thread,
+        since the timer thread can not use the instances loaded by other threads.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            session = DocumentPositionInfo.session()
+            try:
+                for (document_id, (__, page, pos)) in self._pending.items():
+                    session.query(DocumentPositionInfo).filter_by(
+                        id=document_id
+                    ).update(
+                        {"last_page": page, "last_position": pos},
+                        synchronize_session=False,
+                    )
+                session.commit()
+            except:
+                session.rollback()
+                log.exception("Failed to save reading positions", exc_info=True)
+                # Retry with the next flush, and keep the journal in the meantime
+                self._write_journal()
+                return
+            self._pending.clear()
+            self._unjournaled.clear()
+            self._pending_since = None
+            self.commit_count += 1
+            self._truncate_journal()
+
+    def _truncate_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        try:
+            os.remove(self.get_journal_path())
+        except FileNotFoundError:
+            pass
+        except OSError:
+            log.exception("Failed to clear reading position journal", exc_info=True)
+
+    def recover(self):
+        """Commit the positions left in the journal by a previous session that did not flush them."""
+        try:
+            with open(self.get_journal_path(), "r", encoding="utf-8") as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return
+        except OSError:
+            log.exception("Failed to read reading position journal", exc_info=True)
+            return
+        positions = {}
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                uri = DocumentUri.from_uri_string(entry["uri"])
+                positions[entry["uri"]] = (uri, entry["page"], entry["pos"])
+            except (ValueError, KeyError, TypeError):
+                # A partially written last line, or an entry that can not be used
+                continue
+        log.info(f"Recovering {len(positions)} reading positions from the journal.")
+        with self._lock:
+            try:
+                for (uri, page, pos) in positions.values():
+                    position_info = DocumentPositionInfo.query.filter_by(
+                        uri=uri
+                    ).one_or_none()
+                    if position_info is not None:
+                        position_info.last_page = page
+                        position_info.last_position = pos
+                DocumentPositionInfo.session.commit()
+            except:
+                DocumentPositionInfo.session.rollback()
+                log.exception("Failed to recover reading positions", exc_info=True)
+                return
+            self.commit_count += 1
+            self._truncate_journal()
+
+
+reading_position_store = ReadingPositionStore()
+
+
+@reader_book_unloaded.connect
+def _flush_positions_on_book_unloaded(sender):
+    reading_position_store.flush()
+
+
+@app_shuttingdown.connect
+def _flush_positions_on_shutdown(sender):
+    reading_position_store.flush()
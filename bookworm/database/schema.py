@@ -15,11 +15,57 @@ import bookworm.typehints as t
 from bookworm.logger import logger
 
 log = logger.getChild(__name__)
-CURRENT_SCHEMA_VERSION = 0
+CURRENT_SCHEMA_VERSION = 1
+EPUB_DOCUMENT_URI_PATTERN = "bkw://epub/%"
+
+
+def _get_table_names(connection) -> set[str]:
+    cursor = connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    return {name for (name,) in cursor.fetchall()}
+
+
+def reset_epub_positions(session, connection):
+    """
+    Epub chapters are now parsed one at a time, which changed the text offsets
+    of every chapter after the first. The stored reading positions and annotation
+    positions in epub documents point to the wrong text, so they are moved to
+    the start of the document.
+    """
+    table_names = _get_table_names(connection)
+    statements = [
+        (
+            "document_position_info",
+            "UPDATE document_position_info SET last_position = 0 "
+            "WHERE uri LIKE ?",
+        ),
+        (
+            "bookmark",
+            "UPDATE bookmark SET position = 0 "
+            "WHERE book_id IN (SELECT id FROM book WHERE uri LIKE ?)",
+        ),
+        (
+            "note",
+            "UPDATE note SET position = 0 "
+            "WHERE book_id IN (SELECT id FROM book WHERE uri LIKE ?)",
+        ),
+        (
+            "quote",
+            "UPDATE quote SET position = 0, start_pos = 0, end_pos = 0 "
+            "WHERE book_id IN (SELECT id FROM book WHERE uri LIKE ?)",
+        ),
+    ]
+    for (table_name, statement) in statements:
+        # Tables of models that were not imported yet are missing from new databases
+        if table_name in table_names:
+            connection.execute(statement, (EPUB_DOCUMENT_URI_PATTERN,))
+    connection.commit()
+    log.info("Reset the stored positions in epub documents.")
 
 
 def get_upgrades() -> t.Dict[int, t.Tuple[t.Callable]]:
-    return {}
+    return {
+        1: (reset_epub_positions,),
+    }
 
 
 def upgrade_database_schema(session):
@@ -8,9 +8,8 @@ from .exceptions import (ArchiveContainsMultipleDocuments,
                          ArchiveContainsNoDocumentsError, ChangeDocument,
                          DocumentEncryptedError, DocumentError,
                          DocumentIOError, DocumentRestrictedError,
-                         PaginationError)
+                         PaginationError, UnsupportedDocumentFormatError)
 from .features import READING_MODE_LABELS, DocumentCapability, ReadingMode
-from .formats import *
 from .uri import DocumentUri
 
 
@@ -3,17 +3,20 @@
 from __future__ import annotations
 
 import gc
+import os
 from abc import ABCMeta, abstractmethod
 from collections.abc import Iterable, Sequence
-from functools import cached_property, lru_cache, wraps
+from functools import cached_property, partial, wraps
 from pathlib import Path
 
+import attr
 import pywhatlang
 from more_itertools import flatten
 from selectolax.parser import HTMLParser
 
 from bookworm import typehints as t
-from bookworm.concurrency import QueueProcess, call_threaded
+from bookworm.concurrency import (QueueProcess, call_threaded,
+                                  iter_queue_processes_in_order)
 from bookworm.i18n import LocaleInfo
 from bookworm.image_io import ImageIO
 from bookworm.logger import logger
@@ -21,14 +24,29 @@ from bookworm.structured_text import SemanticElementType, Style, TextRange
 from bookworm.utils import (get_url_spans, normalize_line_breaks,
                             remove_excess_blank_lines)
 
+from . import formats
 from . import operations as doctools
+from .cache import DocumentContentCache
 from .elements import *
 from .exceptions import (DocumentIOError, PaginationError,
                          UnsupportedDocumentFormatError)
 from .features import DocumentCapability, ReadingMode
+from .memory_cache import DocumentMemoryCache
+from .page_labels import PAGE_LABEL_INDEX_CACHE_FIELD, PageLabelIndex
+from .search_index import SEARCH_INDEX_CACHE_FIELD, DocumentSearchIndex
+from .shared_payload import SharedPayload
+from .structure_index import STRUCTURE_INDEX_CACHE_FIELD, DocumentStructureIndex
+from .toc_index import TocIndex
 
 log = logger.getChild(__name__)
-PAGE_CACHE_CAPACITY = 300
+# Books are searched in parallel page shards, each shard having at least this number of pages
+SEARCH_MIN_PAGES_PER_SHARD = 64
+# Maps the names of page methods whose results are persisted in the content cache to their cache fields
+CACHED_PAGE_METHODS = {
+    "get_text": "text",
+    "get_label": "label",
+    "get_semantic_structure": "semantic_structure",
+}
 
 
 class BaseDocument(Sequence, Iterable, metaclass=ABCMeta):
@@ -63,7 +81,13 @@ class BaseDocument(Sequence, Iterable, metaclass=ABCMeta):
 
     @classmethod
     def get_document_class_given_format(cls, format):
-        return cls.document_classes.get(format.lower())
+        format = format.lower()
+        if (format not in cls.document_classes) and (
+            format_info := formats.get_format_info(format)
+        ) is not None:
+            # Importing the module of the format registers its document classes
+            format_info.load_class()
+        return cls.document_classes.get(format)
 
     @classmethod
     def get_supported_file_extensions(cls):
@@ -72,7 +96,9 @@ class BaseDocument(Sequence, Iterable, metaclass=ABCMeta):
             for doc_cls in cls.document_classes.values()
             if doc_cls.extensions is not None
         )
-        return frozenset(ext.lstrip("*") for ext in exts)
+        return formats.get_supported_file_extensions() | frozenset(
+            ext.lstrip("*") for ext in exts
+        )
 
     @classmethod
     def check(cls):
@@ -86,7 +112,9 @@ class BaseDocument(Sequence, Iterable, metaclass=ABCMeta):
         return -1 < value < len(self)
 
     def __getitem__(self, index: int) -> BasePage:
-        return self.get_page(index)
+        return self.memory_cache.get_or_compute(
+            ("page", index), partial(self.get_page, index)
+        )
 
     def __iter__(self):
         return (self[i] for i in range(len(self)))
@@ -100,6 +128,20 @@ class BaseDocument(Sequence, Iterable, metaclass=ABCMeta):
         self.__dict__.update(state)
         self.read()
 
+    def get_worker_cache_key(self) -> t.Optional[tuple[str, t.Optional[int]]]:
+        """
+        The key under which warm worker processes keep this document open between operations,
+        or None if they should unpickle (i.e. re-read) it for every operation.
+        """
+        if self.__getstate__().keys() != {"uri"}:
+            # The document has state that the uri does not capture
+            return
+        try:
+            modified_at = os.stat(self.uri.path).st_mtime_ns
+        except (OSError, ValueError):
+            modified_at = None
+        return (self.uri.to_uri_string(), modified_at)
+
     def __repr__(self):
         return (
             f"<{self.__class__.__name__}: "
@@ -123,6 +165,21 @@ class BaseDocument(Sequence, Iterable, metaclass=ABCMeta):
         """Return a unique identifier for this document."""
         return self.uri.to_uri_string()
 
+    @cached_property
+    def content_cache(self) -> t.Optional[DocumentContentCache]:
+        """
+        The persistent store of the extracted content of this document's pages.
+        Single page documents materialize their content when read, so they are not cached here.
+        """
+        if self.is_single_page_document():
+            return
+        return DocumentContentCache.for_document(self)
+
+    @cached_property
+    def memory_cache(self) -> DocumentMemoryCache:
+        """Holds the page objects, page text, and page images that are in use, within a byte budget."""
+        return DocumentMemoryCache()
+
     @abstractmethod
     def read(self):
         """
@@ -134,6 +191,8 @@ class BaseDocument(Sequence, Iterable, metaclass=ABCMeta):
         """Perform the actual IO operations for unloading the ebook.
         Subclasses should call super to ensure the standard behavior.
         """
+        self.memory_cache.close()
+        log.debug(f"Memory cache statistics of {self!r}: {self.memory_cache.stats}")
         gc.collect()
 
     @abstractmethod
@@ -145,11 +204,30 @@ class BaseDocument(Sequence, Iterable, metaclass=ABCMeta):
             raise NotImplementedError(
                 "This feature is not enabled for this class of documents"
             )
-        for page in self:
-            page_label = page_label.lower()
-            if page.get_label().lower() == page_label:
-                return page
-        raise LookupError(f"Failed to find a page with the label {page_label}.")
+        if (page_index := self.page_label_index.get_page_index(page_label)) is None:
+            raise LookupError(f"Failed to find a page with the label {page_label}.")
+        return self[page_index]
+
+    @cached_property
+    def page_label_index(self) -> PageLabelIndex:
+        """Maps page labels to page indices and back. Persisted in the content cache."""
+        if (content_cache := self.content_cache) is not None:
+            if (
+                page_label_index := content_cache.get_document_value(
+                    PAGE_LABEL_INDEX_CACHE_FIELD
+                )
+            ) is not None:
+                return page_label_index
+        page_label_index = self.build_page_label_index()
+        if content_cache is not None:
+            content_cache.set_document_value(
+                PAGE_LABEL_INDEX_CACHE_FIELD, page_label_index
+            )
+        return page_label_index
+
+    def build_page_label_index(self) -> PageLabelIndex:
+        """Subclasses can compute the labels without creating a page object for every page."""
+        return PageLabelIndex(page.get_label() for page in self)
 
     @property
     @abstractmethod
@@ -158,6 +236,25 @@ class BaseDocument(Sequence, Iterable, metaclass=ABCMeta):
         The items should be of type `Section`.
         """
 
+    def is_toc_tree_ready(self) -> bool:
+        """Whether the table of content can be accessed without waiting for it to be built."""
+        return True
+
+    def load_toc_tree_in_background(self):
+        """Subclasses with slow to build tables of content start building them here."""
+
+    def add_toc_tree_ready_callback(self, callback: t.Callable[[], None]):
+        """Call the given callback when the table of content has been built."""
+        callback()
+
+    def create_page_prefetcher(self):
+        """Return a `PagePrefetcher` for this document, if its backend benefits from one."""
+
+    @cached_property
+    def toc_index(self) -> TocIndex:
+        """An index for fast lookups in the table of content."""
+        return TocIndex(self.toc_tree)
+
     @cached_property
     def language(self) -> str:
         num_pages = len(self)
@@ -170,14 +267,25 @@ class BaseDocument(Sequence, Iterable, metaclass=ABCMeta):
     def metadata(self) -> BookMetadata:
         """Return a `BookMetadata` object holding info about this book."""
 
-    @lru_cache(maxsize=1000)
     def get_page_content(self, page_number: int) -> str:
         """Convenience method: return the text content of a page."""
+        return self.memory_cache.get_or_compute(
+            ("text", page_number), partial(self._get_page_content, page_number)
+        )
+
+    def _get_page_content(self, page_number: int) -> str:
+        if (content_cache := self.content_cache) is not None:
+            # Avoid creating the page object if its text is already cached
+            if (text := content_cache.get(page_number, "text")) is not None:
+                return text
         return self[page_number].get_text()
 
     def get_page_image(self, page_number: int, zoom_factor: float = 1.0) -> ImageIO:
         """Convenience method: return the image of a page."""
-        return self[page_number].get_image(zoom_factor)
+        return self.memory_cache.get_or_compute(
+            ("image", page_number, zoom_factor),
+            lambda: self[page_number].get_image(zoom_factor),
+        )
 
     def get_cover_image(self) -> t.Optional[ImageIO]:
         """Return the cover image of this document."""
@@ -241,10 +349,133 @@ class BaseDocument(Sequence, Iterable, metaclass=ABCMeta):
             name="document-export",
         )
 
+    def get_search_index(self) -> t.Optional[DocumentSearchIndex]:
+        """Return the search index of this document if it has already been built."""
+        if (search_index := getattr(self, "_search_index", None)) is not None:
+            return search_index
+        if self.content_cache is None:
+            return
+        self._search_index = self.content_cache.get_document_value(
+            SEARCH_INDEX_CACHE_FIELD
+        )
+        return self._search_index
+
+    def build_search_index(self) -> t.Optional[DocumentSearchIndex]:
+        """Build the search index of this document and persist it in the content cache."""
+        if self.content_cache is None:
+            return
+        self._search_index = DocumentSearchIndex.from_document(self)
+        self.content_cache.set_document_value(
+            SEARCH_INDEX_CACHE_FIELD, self._search_index
+        )
+        return self._search_index
+
+    def get_structure_index(self) -> t.Optional[DocumentStructureIndex]:
+        """Return the structure index of this document if it has already been built."""
+        if (structure_index := getattr(self, "_structure_index", None)) is not None:
+            return structure_index
+        # After a miss, the index is set once it is built in the background
+        if (self.content_cache is None) or getattr(
+            self, "_structure_index_missing", False
+        ):
+            return
+        self._structure_index = self.content_cache.get_document_value(
+            STRUCTURE_INDEX_CACHE_FIELD
+        )
+        self._structure_index_missing = self._structure_index is None
+        return self._structure_index
+
+    def build_structure_index(self) -> t.Optional[DocumentStructureIndex]:
+        """Build the structure index of this document and persist it in the content cache."""
+        if self.content_cache is None:
+            return
+        self._structure_index = DocumentStructureIndex.from_document(self)
+        self.content_cache.set_document_value(
+            STRUCTURE_INDEX_CACHE_FIELD, self._structure_index
+        )
+        return self._structure_index
+
+    def build_structure_index_in_background(self):
+        """Build the structure index in a separate process, unless it is already built."""
+        if (
+            self.is_single_page_document()
+            or (not self.supports_structural_navigation())
+            or (self.content_cache is None)
+            or (self.get_structure_index() is not None)
+        ):
+            return
+        QueueProcess(
+            target=doctools.build_structure_index,
+            args=(self,),
+            name="document-build-structure-index",
+        ).map(self._on_structure_index_built)
+
+    def _on_structure_index_built(self, built):
+        if (content_cache := self.content_cache) is not None:
+            self._structure_index = content_cache.get_document_value(
+                STRUCTURE_INDEX_CACHE_FIELD
+            )
+
     def search(self, request: doctools.SearchRequest):
-        yield from QueueProcess(
-            target=doctools.search_book, args=(self, request), name="document-search"
+        if (not request.is_regex) and (self.get_search_index() is not None):
+            # The search process loads the index from the content cache
+            yield from QueueProcess(
+                target=doctools.search_book,
+                args=(self, request),
+                name="document-search",
+            )
+            return
+        yield from self._scan_pages(request)
+        self.build_search_index_in_background()
+
+    def build_search_index_in_background(self):
+        """Build the search index in a separate process, unless it is built or being built."""
+        if (
+            (self.content_cache is None)
+            or (getattr(self, "_search_index_build", None) is not None)
+            or (self.get_search_index() is not None)
+        ):
+            return
+        self._search_index_build = QueueProcess(
+            target=doctools.build_search_index,
+            args=(self,),
+            name="document-build-search-index",
         )
+        self._search_index_build.map(self._on_search_index_built)
+
+    def _on_search_index_built(self, built):
+        if (content_cache := self.content_cache) is not None:
+            self._search_index = content_cache.get_document_value(
+                SEARCH_INDEX_CACHE_FIELD
+            )
+
+    def _scan_pages(self, request: doctools.SearchRequest):
+        num_pages = request.to_page - request.from_page + 1
+        num_shards = min(os.cpu_count() or 1, num_pages // SEARCH_MIN_PAGES_PER_SHARD)
+        if num_shards < 2:
+            yield from QueueProcess(
+                target=doctools.search_book,
+                args=(self, request),
+                name="document-search",
+            )
+            return
+        # Each shard process reopens the document through pickling
+        shard_processes = [
+            QueueProcess(
+                target=doctools.search_book,
+                args=(
+                    self,
+                    attr.evolve(request, from_page=first_page, to_page=last_page),
+                ),
+                name=f"document-search-shard-{shard_index}",
+            )
+            for (shard_index, (first_page, last_page)) in enumerate(
+                doctools.split_page_range(
+                    request.from_page, request.to_page, num_shards
+                )
+            )
+        ]
+        yield from iter_queue_processes_in_order(shard_processes)
 
 
 class BasePage(metaclass=ABCMeta):
@@ -252,6 +483,12 @@ class BasePage(metaclass=ABCMeta):
 
     __slots__ = ["document", "index"]
 
+    def __init_subclass__(cls, *args, **kwargs):
+        super().__init_subclass__(*args, **kwargs)
+        for (method_name, cache_field) in CACHED_PAGE_METHODS.items():
+            if (method := cls.__dict__.get(method_name)) is not None:
+                setattr(cls, method_name, _content_cached(cache_field, method))
+
     def __init__(self, document: BaseDocument, index: int):
         self.document = document
         self.index = index
@@ -334,13 +571,7 @@ class BasePage(metaclass=ABCMeta):
     @cached_property
     def section(self) -> Section:
         """The (most specific) section that this page blongs to."""
-        rv = self.document.toc_tree
-        for sect in rv.iter_children():
-            if self.index in sect.pager:
-                rv = sect
-                if sect.pager.first > self.index:
-                    break
-        return rv
+        return self.document.toc_index.get_section_at_page(self.index)
 
     @property
     def is_first_of_section(self) -> bool:
@@ -356,6 +587,20 @@ class BasePage(metaclass=ABCMeta):
         return NotImplemented
 
 
+def _content_cached(cache_field, method):
+    """Persist the return value of the given page method in the document's content cache."""
+
+    @wraps(method)
+    def wrapper(self):
+        if (content_cache := self.document.content_cache) is None:
+            return method(self)
+        return content_cache.get_or_compute(
+            self.index, cache_field, partial(method, self)
+        )
+
+    return wrapper
+
+
 class SinglePage(BasePage):
     """Emulates a page for a single page document."""
 
@@ -394,13 +639,15 @@ class SinglePageDocument(BaseDocument):
 
     def get_section_at_position(self, pos):
         """Return the section at the given position."""
-        rv = self.toc_tree
-        for sect in rv.iter_children():
-            if pos in sect.text_range:
-                rv = sect
-                if sect.text_range.start > pos:
-                    break
-        return rv
+        return self.toc_index.get_section_at_position(pos)
+
+    def get_structure_index(self) -> DocumentStructureIndex:
+        """The structure of the only page is already in memory, so build the index right away."""
+        if (structure_index := getattr(self, "_structure_index", None)) is None:
+            self._structure_index = structure_index = (
+                DocumentStructureIndex.from_document(self)
+            )
+        return structure_index
 
     def get_document_semantic_structure(self):
         raise NotImplementedError
@@ -414,12 +661,21 @@ class SinglePageDocument(BaseDocument):
     def resolve_link(self, text_range):
         raise NotImplementedError
 
+    @cached_property
+    def shared_content(self) -> SharedPayload:
+        """The content of this document, published once for all the processes that search it."""
+        return SharedPayload.publish_text(self.get_content())
+
+    def close(self):
+        if (shared_content := self.__dict__.pop("shared_content", None)) is not None:
+            shared_content.close()
+        super().close()
+
     def search(self, request: doctools.SearchRequest):
-        text = self.get_content()[request.text_range.as_slice()]
         yield from QueueProcess(
             target=doctools.search_single_page_document,
             args=(
-                text,
+                self.shared_content,
                 request,
             ),
             name="document-search",
@@ -0,0 +1,109 @@
+# coding: utf-8
+
+"""
+A persistent, content-addressed store for the extracted content of documents.
+Page text, labels, and semantic structure are cached on disk keyed by the hash of the document file,
+so that reopening, searching, or exporting an already seen document does not re-extract its pages.
+"""
+
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+
+from diskcache import Cache
+
+from bookworm import typehints as t
+from bookworm.fingerprint import get_file_fingerprint
+from bookworm.logger import logger
+from bookworm.paths import home_data_path
+
+log = logger.getChild(__name__)
+# Bump this when the extraction routines change in a way that invalidates cached content
+DOCUMENT_CONTENT_CACHE_VERSION = 2
+DOCUMENT_CONTENT_CACHE_SIZE_LIMIT = 2 * 1024**3
+_MISSING = object()
+
+
+@lru_cache(maxsize=None)
+def get_content_cache_store() -> Cache:
+    """Return the process-wide disk cache used to store document content."""
+    return Cache(
+        os.fspath(home_data_path(".document_content_cache")),
+        size_limit=DOCUMENT_CONTENT_CACHE_SIZE_LIMIT,
+        eviction_policy="least-recently-used",
+    )
+
+
+class DocumentContentCache:
+    """Provides access to the cached content of a single document."""
+
+    __slots__ = ["document_key", "store"]
+
+    def __init__(self, document_key: str, store: Cache = None):
+        self.document_key = document_key
+        self.store = store if store is not None else get_content_cache_store()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.document_key}>"
+
+    @classmethod
+    def for_document(cls, document) -> t.Optional[DocumentContentCache]:
+        """
+        Return the content cache for the given document,
+        or None if the content of this document should not be cached.
+        """
+        if document.uri.view_args.get("decryption_key") is not None:
+            # Never persist the content of encrypted documents
+            return
+        try:
+            filepath = document.get_file_system_path()
+            content_hash = get_file_fingerprint(filepath)
+        except OSError:
+            return
+        return cls.for_content_hash(document, content_hash)
+
+    @classmethod
+    def for_content_hash(cls, document, content_hash: str) -> DocumentContentCache:
+        """Return the content cache for the given document, keyed by the given hash of its content."""
+        document_key = ":".join(
+            str(part)
+            for part in (
+                DOCUMENT_CONTENT_CACHE_VERSION,
+                content_hash,
+                document.format,
+                int(document.reading_options.reading_mode),
+            )
+        )
+        return cls(document_key)
+
+    def _make_key(self, page_index: int, field: str) -> str:
+        return f"{self.document_key}:{page_index}:{field}"
+
+    def get_document_value(self, field: str, default=None) -> t.Any:
+        """Get a value that belongs to the document as a whole."""
+        return self.store.get(f"{self.document_key}:{field}", default=default)
+
+    def set_document_value(self, field: str, value: t.Any):
+        self.store.set(f"{self.document_key}:{field}", value)
+
+    def get(self, page_index: int, field: str, default=None) -> t.Any:
+        return self.store.get(self._make_key(page_index, field), default=default)
+
+    def set(self, page_index: int, field: str, value: t.Any):
+        self.store.set(self._make_key(page_index, field), value)
+
+    def get_or_compute(
+        self, page_index: int, field: str, compute_func: t.Callable[[], t.Any]
+    ) -> t.Any:
+        value = self.get(page_index, field, default=_MISSING)
+        if value is _MISSING:
+            value = compute_func()
+            try:
+                self.set(page_index, field, value)
+            except Exception:
+                log.exception(
+                    f"Failed to store {field} of page {page_index} in the content cache",
+                    exc_info=True,
+                )
+        return value
@@ -1,14 +1,287 @@
 # coding: utf-8
 
-from .archive import ArchivedDocument
-from .epub import EpubDocument
-from .fb2 import FB2Document, FitzFB2Document
-from .html import FileSystemHtmlDocument, WebHtmlDocument
-from .markdown import MarkdownDocument
-from .mobi import MobiDocument
-from .odf import OdfTextDocument
-from .pandoc import DocbookDocument, RtfDocument
-from .pdf import FitzPdfDocument
-from .plain_text import PlainTextDocument
-from .powerpoint import PowerpointPresentation
-from .word import WordDocument
+"""
+A declarative registry of the supported document formats.
+The module implementing a format, along with its backend libraries,
+is imported only when a document of that format is opened, or when its availability is checked.
+"""
+
+from __future__ import annotations
+
+import importlib
+from functools import cache
+
+import attr
+
+from bookworm import typehints as t
+
+
+@cache
+def is_pandoc_installed() -> bool:
+    from bookworm import pandoc
+
+    return bool(pandoc.is_pandoc_installed())
+
+
+def is_pandoc_not_installed() -> bool:
+    return not is_pandoc_installed()
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class DocumentFormatInfo:
+    """Describes a document format without importing the module that implements it."""
+
+    format: str
+    name: str
+    extensions: tuple[str, ...]
+    module_name: str
+    class_name: str
+    internal: bool = False
+    check: t.Optional[t.Callable[[], bool]] = None
+    """Tells whether this format is supported in the user's environment, like `BaseDocument.check`."""
+
+    def is_available(self) -> bool:
+        return (self.check is None) or self.check()
+
+    def load_class(self):
+        """Import the module of this format, which registers its document classes."""
+        module = importlib.import_module(f"{__name__}.{self.module_name}")
+        return getattr(module, self.class_name)
+
+
+DOCUMENT_FORMATS = (
+    DocumentFormatInfo(
+        format="pdf",
+        # Translators: the name of a document file format
+        name=_("Portable Document (PDF)"),
+        extensions=("*.pdf",),
+        module_name="pdf",
+        class_name="FitzPdfDocument",
+    ),
+    DocumentFormatInfo(
+        format="epub",
+        # Translators: the name of a document file format
+        name=_("Electronic Publication (EPUB)"),
+        extensions=("*.epub",),
+        module_name="epub",
+        class_name="EpubDocument",
+    ),
+    DocumentFormatInfo(
+        format="mobi",
+        # Translators: the name of a document file format
+        name=_("Kindle eBook"),
+        extensions=("*.mobi", "*.azw3"),
+        module_name="mobi",
+        class_name="MobiDocument",
+    ),
+    DocumentFormatInfo(
+        format="docx",
+        # Translators: the name of a document file format
+        name=_("Word Document"),
+        extensions=("*.docx",),
+        module_name="word",
+        class_name="WordDocument",
+    ),
+    DocumentFormatInfo(
+        format="doc",
+        # Translators: the name of a document file format
+        name=_("Word 97 - 2003 Document"),
+        extensions=("*.doc",),
+        module_name="word",
+        class_name="Word97Document",
+        check=is_pandoc_installed,
+    ),
+    DocumentFormatInfo(
+        format="pptx",
+        # Translators: the name of a document file format
+        name=_("PowerPoint Presentation"),
+        extensions=("*.pptx",),
+        module_name="powerpoint",
+        class_name="PowerpointPresentation",
+    ),
+    DocumentFormatInfo(
+        format="odt",
+        # Translators: the name of a document file format
+        name=_("Open Document Text"),
+        extensions=("*.odt",),
+        module_name="odf",
+        class_name="OdfTextDocument",
+    ),
+    DocumentFormatInfo(
+        format="odp",
+        # Translators: the name of a document file format
+        name=_("Open Document Presentation"),
+        extensions=("*.odp",),
+        module_name="odf",
+        class_name="OdfPresentation",
+    ),
+    DocumentFormatInfo(
+        format="html",
+        # Translators: the name of a document file format
+        name=_("HTML Document"),
+        extensions=("*.html", "*.htm", "*.xhtml"),
+        module_name="html",
+        class_name="FileSystemHtmlDocument",
+    ),
+    DocumentFormatInfo(
+        format="webpage",
+        name="",
+        extensions=(),
+        module_name="html",
+        class_name="WebHtmlDocument",
+        internal=True,
+    ),
+    DocumentFormatInfo(
+        format="markdown",
+        # Translators: the name of a document file format
+        name=_("Markdown File"),
+        extensions=("*.md",),
+        module_name="markdown",
+        class_name="MarkdownDocument",
+    ),
+    DocumentFormatInfo(
+        format="txt",
+        # Translators: the name of a document file format
+        name=_("Plain Text File"),
+        extensions=("*.txt",),
+        module_name="plain_text",
+        class_name="PlainTextDocument",
+    ),
+    DocumentFormatInfo(
+        format="fb2",
+        # Translators: the name of a document file format
+        name=_("Fiction Book (FB2)"),
+        extensions=("*.fb2",),
+        module_name="fb2",
+        class_name="FB2Document",
+        check=is_pandoc_installed,
+    ),
+    DocumentFormatInfo(
+        format="fb2fitz",
+        # Translators: the name of a document file format
+        name=_("Fiction Book (FB2)"),
+        extensions=("*.fb2",),
+        module_name="fb2",
+        class_name="FitzFB2Document",
+        check=is_pandoc_not_installed,
+    ),
+    DocumentFormatInfo(
+        format="xps",
+        # Translators: the name of a document file format
+        name=_("XPS Document"),
+        extensions=("*.xps", "*.oxps"),
+        module_name="fitz",
+        class_name="FitzXpsDocument",
+    ),
+    DocumentFormatInfo(
+        format="cbz",
+        # Translators: the name of a document file format
+        name=_("Comic Book Archive"),
+        extensions=("*.cbz",),
+        module_name="fitz",
+        class_name="FitzCBZDocument",
+    ),
+    DocumentFormatInfo(
+        format="rtf",
+        # Translators: the name of a document file format
+        name=_("Rich Text Document"),
+        extensions=("*.rtf",),
+        module_name="pandoc",
+        class_name="RtfDocument",
+        check=is_pandoc_installed,
+    ),
+    DocumentFormatInfo(
+        format="docbook",
+        # Translators: the name of a document file format
+        name=_("Docbook Document"),
+        extensions=("*.docbook",),
+        module_name="pandoc",
+        class_name="DocbookDocument",
+        check=is_pandoc_installed,
+    ),
+    DocumentFormatInfo(
+        format="ipynb",
+        # Translators: the name of a document file format
+        name=_("Jupyter notebook"),
+        extensions=("*.ipynb",),
+        module_name="pandoc",
+        class_name="JupyterNotebookDocument",
+        check=is_pandoc_installed,
+    ),
+    DocumentFormatInfo(
+        format="latex",
+        # Translators: the name of a document file format
+        name=_("LaTeX Document"),
+        extensions=("*.tex",),
+        module_name="pandoc",
+        class_name="LaTeXDocument",
+        check=is_pandoc_installed,
+    ),
+    DocumentFormatInfo(
+        format="t2t",
+        # Translators: the name of a document file format
+        name=_("Text2Tags Document"),
+        extensions=("*.t2t",),
+        module_name="pandoc",
+        class_name="Text2TagsDocument",
+        check=is_pandoc_installed,
+    ),
+    DocumentFormatInfo(
+        format="man",
+        # Translators: the name of a document file format
+        name=_("Unix manual page"),
+        extensions=tuple(f"*.{i}" for i in range(1, 9)),
+        module_name="pandoc",
+        class_name="ManPageDocument",
+        check=is_pandoc_installed,
+    ),
+    DocumentFormatInfo(
+        format="archive",
+        # Translators: the name of a document file format
+        name=_("Archive File"),
+        extensions=("*.zip", "*.rar"),
+        module_name="archive",
+        class_name="ArchivedDocument",
+    ),
+)
+
+
+def iter_document_formats(
+    include_internal: bool = True,
+) -> t.Iterator[DocumentFormatInfo]:
+    """Yield the formats that are supported in the user's environment."""
+    for format_info in DOCUMENT_FORMATS:
+        if format_info.internal and not include_internal:
+            continue
+        if format_info.is_available():
+            yield format_info
+
+
+def get_format_info(format: str) -> t.Optional[DocumentFormatInfo]:
+    format = format.lower()
+    for format_info in iter_document_formats():
+        if format_info.format == format:
+            return format_info
+
+
+def get_format_given_extension(ext: str) -> t.Optional[str]:
+    """Return the format of documents with the given extension, given in the form `*.ext`."""
+    for format_info in iter_document_formats():
+        if ext in format_info.extensions:
+            return format_info.format
+
+
+def get_supported_file_extensions(include_internal: bool = True) -> frozenset[str]:
+    return frozenset(
+        ext.lstrip("*")
+        for format_info in iter_document_formats(include_internal)
+        for ext in format_info.extensions
+    )
+
+
+def __getattr__(name):
+    # Document classes used to be imported eagerly from this package
+    for format_info in DOCUMENT_FORMATS:
+        if format_info.class_name == name:
+            return format_info.load_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
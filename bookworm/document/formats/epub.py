@@ -2,30 +2,35 @@
 
 from __future__ import annotations
 
+import bisect
 import collections.abc
 import itertools
+import multiprocessing as mp
 import os
 import string
+import threading
+from collections import OrderedDict
 from contextlib import suppress
-from functools import cached_property, lru_cache
-from io import StringIO
+from functools import cached_property
 from pathlib import Path, PurePosixPath
 from urllib import parse as urllib_parse
 
+import attr
 import dateparser
 import ebooklib
 import ebooklib.epub
 import fitz
 import more_itertools
-from diskcache import Cache
+from lxml import etree
 from lxml import html as lxml_html
 from selectolax.parser import HTMLParser
 
+from bookworm import typehints as t
+from bookworm.concurrency import process_worker, threaded_worker
 from bookworm.i18n import LocaleInfo
 from bookworm.image_io import ImageIO
 from bookworm.logger import logger
-from bookworm.paths import home_data_path
-from bookworm.structured_text import TextRange
+from bookworm.structured_text import SemanticElementType, Style, TextRange
 from bookworm.structured_text.structured_html_parser import \
     StructuredHtmlParser
 from bookworm.utils import format_datetime, is_external_url
@@ -34,12 +39,190 @@ from .. import SINGLE_PAGE_DOCUMENT_PAGER, BookMetadata, ChangeDocument
 from .. import DocumentCapability as DC
 from .. import (DocumentError, LinkTarget, Section, SinglePageDocument,
                 TreeStackBuilder)
+from ..cache import DocumentContentCache
+from ..serde import (StructuredTextData, dump_element_ranges, dump_toc_tree,
+                     load_element_ranges, load_toc_tree, pack, unpack)
+from ..structure_index import DocumentStructureIndex
 
 log = logger.getChild(__name__)
 HTML_FILE_EXTS = {
     ".html",
     ".xhtml",
 }
+# Joining separately parsed chapters does not reproduce the text offsets of the
+# former whole book parse. Stored epub positions are reset by a schema upgrade.
+CHAPTER_SEPARATOR = "\n"
+EPUB_CHAPTER_OUTLINE_CACHE_FIELD = "epub_chapter_outline"
+EPUB_CHAPTER_STRUCTURE_CACHE_FIELD = "epub_chapter_structure"
+EPUB_TOC_CACHE_FIELD = "epub_toc"
+# Parse uncached spine items in worker processes only
+# when there is enough html to outweigh the cost of sending it over
+EPUB_PARALLEL_PARSE_MIN_SIZE = 4 * 1024 * 1024
+# The number of chapter structures to keep in memory
+EPUB_CHAPTER_STRUCTURE_MEMORY_SIZE = 16
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class EpubChapterOutline:
+    """The text and anchors of a single spine item, positioned relative to the start of the chapter."""
+
+    text: str
+    html_id_ranges: dict[str, tuple[int, int]]
+    num_tables: int
+
+    def to_dict(self) -> dict[str, t.Any]:
+        return attr.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, t.Any]) -> EpubChapterOutline:
+        return cls(
+            text=data["text"],
+            html_id_ranges=dict(data["html_id_ranges"]),
+            num_tables=data["num_tables"],
+        )
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class EpubChapterStructure:
+    """The structure of a single spine item, positioned relative to the start of the chapter."""
+
+    semantic_elements: dict
+    styled_elements: dict
+    link_targets: dict[tuple[int, int], str]
+    tables: list[str]
+
+    def to_dict(self) -> dict[str, t.Any]:
+        return {
+            "semantic_elements": dump_element_ranges(self.semantic_elements),
+            "styled_elements": dump_element_ranges(self.styled_elements),
+            "link_targets": self.link_targets,
+            "tables": self.tables,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, t.Any]) -> EpubChapterStructure:
+        return cls(
+            semantic_elements=load_element_ranges(
+                data["semantic_elements"], SemanticElementType
+            ),
+            styled_elements=load_element_ranges(data["styled_elements"], Style),
+            link_targets=dict(data["link_targets"]),
+            tables=list(data["tables"]),
+        )
+
+
+class EpubStructureIndex:
+    """
+    Finds the nearest semantic element chapter by chapter, starting with the chapter
+    containing the anchor, so that only the chapters up to the element are loaded.
+    """
+
+    def __init__(self, document: EpubDocument):
+        self.document = document
+        self._chapter_indexes = OrderedDict()
+
+    def get_chapter_index(self, chapter_index: int) -> DocumentStructureIndex:
+        if (index := self._chapter_indexes.get(chapter_index)) is not None:
+            self._chapter_indexes.move_to_end(chapter_index)
+            return index
+        structure = self.document.get_chapter_structure(chapter_index)
+        index = DocumentStructureIndex.from_semantic_structures(
+            [(0, structure.semantic_elements)]
+        )
+        self._chapter_indexes[chapter_index] = index
+        while len(self._chapter_indexes) > EPUB_CHAPTER_STRUCTURE_MEMORY_SIZE:
+            self._chapter_indexes.popitem(last=False)
+        return index
+
+    def get_element(
+        self,
+        element_type: SemanticElementType,
+        forward: bool,
+        page_index: int,
+        anchor: int,
+    ) -> t.Optional[tuple[int, tuple[int, int], SemanticElementType]]:
+        chapter_offsets = self.document.chapter_offsets
+        chapter_index = self.document.get_chapter_at_position(anchor)
+        step = 1 if forward else -1
+        while 0 <= chapter_index < len(chapter_offsets):
+            offset = chapter_offsets[chapter_index]
+            # Relative to the following chapters, the anchor is before their start,
+            # and relative to the preceding chapters, it is after their end
+            element = self.get_chapter_index(chapter_index).get_element(
+                element_type, forward, 0, anchor - offset
+            )
+            if element is not None:
+                (__, (start, stop), actual_element_type) = element
+                text_range = (start + offset, stop + offset)
+                return (page_index, text_range, actual_element_type)
+            chapter_index += step
+
+
+def prefix_html_ids(filename, html):
+    tree = lxml_html.fromstring(html)
+    tree.make_links_absolute(
+        filename, resolve_base_href=False, handle_failures="ignore"
+    )
+    if os.path.splitext(filename)[1] in HTML_FILE_EXTS:
+        for node in tree.xpath("//*[@id]"):
+            node.set("id", filename + "#" + node.get("id"))
+    try:
+        tree.remove(tree.head)
+        tree.body.tag = "section"
+    except:
+        pass
+    tree.tag = "div"
+    tree.insert(0, tree.makeelement("header", attrib={"id": filename}))
+    return lxml_html.tostring(tree, method="html", encoding="unicode")
+
+
+def build_html(title, body_content):
+    return (
+        "<!doctype html>\n"
+        '<html class="no-js" lang="">\n'
+        "<head>\n"
+        '<meta charset="utf-8">'
+        f"<title>{title}</title>\n"
+        "</head>\n"
+        "<body>\n"
+        f"{body_content}\n"
+        "</body>\n"
+        "</html>"
+    )
+
+
+def parse_epub_chapter(
+    filename: str, html_content: bytes, title: str
+) -> tuple[EpubChapterOutline, EpubChapterStructure]:
+    """Parse a single spine item. This runs in worker processes."""
+    try:
+        structure = StructuredHtmlParser.from_string(
+            build_html(title, prefix_html_ids(filename, html_content))
+        )
+    except (etree.ParserError, ValueError):
+        log.warning(f"Failed to parse epub item {filename}", exc_info=True)
+        return (
+            EpubChapterOutline(
+                text="", html_id_ranges={filename: (0, 0)}, num_tables=0
+            ),
+            EpubChapterStructure(
+                semantic_elements={}, styled_elements={}, link_targets={}, tables=[]
+            ),
+        )
+    text_data = StructuredTextData.from_parser(structure)
+    return (
+        EpubChapterOutline(
+            text=text_data.text,
+            html_id_ranges=text_data.html_id_ranges,
+            num_tables=len(text_data.tables),
+        ),
+        EpubChapterStructure(
+            semantic_elements=text_data.semantic_elements,
+            styled_elements=text_data.styled_elements,
+            link_targets=text_data.link_targets,
+            tables=text_data.tables,
+        ),
+    )
 
 
 class EpubDocument(SinglePageDocument):
@@ -62,9 +245,25 @@ class EpubDocument(SinglePageDocument):
     def read(self):
         super().read()
         self.epub = ebooklib.epub.read_epub(self.get_file_system_path())
-        self.html_content = self.html_content
-        self.structure = StructuredHtmlParser.from_string(self.html_content)
-        self.toc = self.parse_epub()
+        self._chapter_structures = OrderedDict()
+        self._chapter_structures_lock = threading.Lock()
+        self.chapter_offsets = []
+        self.table_offsets = []
+        self.html_id_ranges = {}
+        text_parts = []
+        position = num_tables = 0
+        for outline in self.load_chapter_outlines():
+            self.chapter_offsets.append(position)
+            self.table_offsets.append(num_tables)
+            self.html_id_ranges.update(
+                (html_id, (start + position, end + position))
+                for (html_id, (start, end)) in outline.html_id_ranges.items()
+            )
+            text_parts.append(outline.text)
+            position += len(outline.text) + len(CHAPTER_SEPARATOR)
+            num_tables += outline.num_tables
+        self._text = CHAPTER_SEPARATOR.join(text_parts)
+        self.toc = self.load_toc()
 
     @property
     def toc_tree(self):
@@ -113,30 +312,187 @@ class EpubDocument(SinglePageDocument):
                 log.exception(
                     "Failed to parse epub language `{epub_lang}`", exc_info=True
                 )
-        return self.get_language(self.html_content, is_html=True) or LocaleInfo("en")
+        return self.get_language(self.get_content()[:2000]) or LocaleInfo("en")
 
     def get_content(self):
-        return self.structure.get_text()
+        return self._text
+
+    @cached_property
+    def chapter_cache(self) -> t.Optional[DocumentContentCache]:
+        return DocumentContentCache.for_document(self)
+
+    def load_chapter_outlines(self) -> list[EpubChapterOutline]:
+        """
+        Return the outline of every spine item, parsing only the items
+        that are not found in the cache.
+        """
+        chapter_cache = self.chapter_cache
+        outlines = [
+            self._get_cached_chapter_data(
+                index, EPUB_CHAPTER_OUTLINE_CACHE_FIELD, EpubChapterOutline
+            )
+            for index in range(len(self.epub_html_items))
+        ]
+        uncached_indices = [
+            index for (index, outline) in enumerate(outlines) if outline is None
+        ]
+        parsed_chapters = zip(uncached_indices, self._parse_chapters(uncached_indices))
+        for (index, (outline, structure)) in parsed_chapters:
+            outlines[index] = outline
+            self._remember_chapter_structure(index, structure)
+            if chapter_cache is not None:
+                chapter_cache.set(
+                    index, EPUB_CHAPTER_OUTLINE_CACHE_FIELD, pack(outline.to_dict())
+                )
+                chapter_cache.set(
+                    index, EPUB_CHAPTER_STRUCTURE_CACHE_FIELD, pack(structure.to_dict())
+                )
+        return outlines
+
+    def _get_cached_chapter_data(self, chapter_index, field, data_cls):
+        if self.chapter_cache is None:
+            return
+        if (payload := self.chapter_cache.get(chapter_index, field)) is not None:
+            return data_cls.from_dict(unpack(payload))
+
+    def load_toc(self) -> Section:
+        """Load the table of contents from the cache, or build it from the epub navigation."""
+        if self.chapter_cache is not None:
+            payload = self.chapter_cache.get_document_value(EPUB_TOC_CACHE_FIELD)
+            if payload is not None:
+                return load_toc_tree(unpack(payload))
+        toc = self.parse_epub()
+        if self.chapter_cache is not None:
+            self.chapter_cache.set_document_value(
+                EPUB_TOC_CACHE_FIELD, pack(dump_toc_tree(toc))
+            )
+        return toc
+
+    def _parse_chapters(self, chapter_indices):
+        items = [self.epub_html_items[index] for index in chapter_indices]
+        args = (
+            [item.file_name for item in items],
+            [item.content for item in items],
+            itertools.repeat(self.epub.title),
+        )
+        use_worker_processes = (
+            len(items) > 1
+            and not mp.current_process().daemon
+            and sum(len(item.content) for item in items) >= EPUB_PARALLEL_PARSE_MIN_SIZE
+        )
+        if use_worker_processes:
+            return process_worker.map(parse_epub_chapter, *args)
+        return map(parse_epub_chapter, *args)
+
+    def get_chapter_at_position(self, pos: int) -> int:
+        """Return the index of the spine item containing the given position."""
+        return max(bisect.bisect_right(self.chapter_offsets, pos) - 1, 0)
+
+    def get_chapter_structure(
+        self, chapter_index: int, prefetch: bool = True
+    ) -> EpubChapterStructure:
+        """
+        Return the structure of the given spine item, loading it from the cache
+        or parsing it as needed. The neighbouring chapters are then prefetched in the background.
+        """
+        with self._chapter_structures_lock:
+            if (structure := self._chapter_structures.get(chapter_index)) is not None:
+                self._chapter_structures.move_to_end(chapter_index)
+        if structure is None:
+            structure = self._load_chapter_structure(chapter_index)
+            self._remember_chapter_structure(chapter_index, structure)
+        if prefetch:
+            self.prefetch_chapters_around(chapter_index)
+        return structure
+
+    def prefetch_chapters_around(self, chapter_index: int):
+        for index in (chapter_index + 1, chapter_index - 1):
+            if (0 <= index < len(self.chapter_offsets)) and (
+                index not in self._chapter_structures
+            ):
+                threaded_worker.submit(
+                    self.get_chapter_structure, index, prefetch=False
+                )
+
+    def _load_chapter_structure(self, chapter_index):
+        if (
+            structure := self._get_cached_chapter_data(
+                chapter_index, EPUB_CHAPTER_STRUCTURE_CACHE_FIELD, EpubChapterStructure
+            )
+        ) is not None:
+            return structure
+        item = self.epub_html_items[chapter_index]
+        __, structure = parse_epub_chapter(
+            item.file_name, item.content, self.epub.title
+        )
+        return structure
+
+    def _remember_chapter_structure(self, chapter_index, structure):
+        with self._chapter_structures_lock:
+            self._chapter_structures[chapter_index] = structure
+            while len(self._chapter_structures) > EPUB_CHAPTER_STRUCTURE_MEMORY_SIZE:
+                self._chapter_structures.popitem(last=False)
+
+    def _merge_chapter_ranges(self, field):
+        merged = {}
+        for (index, offset) in enumerate(self.chapter_offsets):
+            chapter_ranges = getattr(
+                self.get_chapter_structure(index, prefetch=False), field
+            )
+            for (key, ranges) in chapter_ranges.items():
+                merged.setdefault(key, []).extend(
+                    (start + offset, end + offset) for (start, end) in ranges
+                )
+        return merged
+
+    def get_structure_index(self) -> EpubStructureIndex:
+        """Structural navigation loads the chapters near the anchor, instead of merging all of them."""
+        if (structure_index := getattr(self, "_structure_index", None)) is None:
+            self._structure_index = structure_index = EpubStructureIndex(self)
+        return structure_index
+
+    @cached_property
+    def semantic_elements(self):
+        return self._merge_chapter_ranges("semantic_elements")
+
+    @cached_property
+    def styled_elements(self):
+        return self._merge_chapter_ranges("styled_elements")
 
     def get_document_semantic_structure(self):
-        return self.structure.semantic_elements
+        return self.semantic_elements
 
     def get_document_style_info(self):
-        return self.structure.styled_elements
+        return self.styled_elements
 
     def get_document_table_markup(self, table_index):
-        return self.structure.get_table_markup(table_index)
+        chapter_index = bisect.bisect_right(self.table_offsets, table_index) - 1
+        return self.get_chapter_structure(chapter_index).tables[
+            table_index - self.table_offsets[chapter_index]
+        ]
 
     def resolve_link(self, link_range) -> LinkTarget:
-        href = urllib_parse.unquote(self.structure.link_targets[link_range])
+        start, end = link_range
+        chapter_index = self.get_chapter_at_position(start)
+        offset = self.chapter_offsets[chapter_index]
+        link_targets = self.get_chapter_structure(chapter_index).link_targets
+        href = urllib_parse.unquote(link_targets[(start - offset, end - offset)])
         if is_external_url(href):
             return LinkTarget(url=href, is_external=True)
         else:
-            for (html_id, text_range) in self.structure.html_id_ranges.items():
-                if html_id.endswith(href):
-                    return LinkTarget(
-                        url=href, is_external=False, page=None, position=text_range
-                    )
+            if (text_range := self.html_id_ranges.get(href)) is None:
+                text_range = more_itertools.first(
+                    (
+                        text_range
+                        for (html_id, text_range) in self.html_id_ranges.items()
+                        if html_id.endswith(href)
+                    ),
+                    None,
+                )
+            if text_range is not None:
+                return LinkTarget(
+                    url=href, is_external=False, page=None, position=text_range
+                )
 
     def get_cover_image(self):
         if not (
@@ -161,12 +517,8 @@ class EpubDocument(SinglePageDocument):
                 "Failed to obtain the cover image for epub document.", exc_info=True
             )
 
-    @lru_cache(maxsize=10)
     def get_section_at_position(self, pos):
-        for ((start, end), section) in self.start_positions_for_sections:
-            if start <= pos < end:
-                return section
-        return self.toc_tree
+        return self.toc_index.get_section_by_start_position(pos)
 
     @cached_property
     def epub_html_items(self) -> tuple[str]:
@@ -202,7 +554,7 @@ class EpubDocument(SinglePageDocument):
         )
         id_ranges = {
             urllib_parse.unquote(key): value
-            for (key, value) in self.structure.html_id_ranges.items()
+            for (key, value) in self.html_id_ranges.items()
         }
         stack = TreeStackBuilder(root)
         toc_entries = self.epub.toc
@@ -240,20 +592,6 @@ class EpubDocument(SinglePageDocument):
             stack.push(sect)
         return root
 
-    @cached_property
-    def start_positions_for_sections(self):
-        sect_starting_poses = [
-            (0, self.toc_tree),
-        ] + [(sect.text_range.start, sect) for sect in self.toc_tree.iter_children()]
-        data = list(
-            more_itertools.zip_offset(
-                sect_starting_poses, sect_starting_poses, offsets=(0, 1), longest=True
-            )
-        )
-        data[-1] = list(data[-1])
-        data[-1][1] = data[-1][0]
-        return [((i[0], j[0]), i[1]) for i, j in data]
-
     def add_toc_entry(self, entries, parent):
         for entry in entries:
             current_level = parent.level + 1
@@ -283,58 +621,6 @@ class EpubDocument(SinglePageDocument):
                     parent=sect,
                 )
 
-    @cached_property
-    def html_content(self):
-        cache = Cache(
-            self._get_cache_directory(), eviction_policy="least-frequently-used"
-        )
-        cache_key = self.uri.to_uri_string()
-        if cached_html_content := cache.get(cache_key):
-            return cached_html_content.decode("utf-8")
-        html_content_gen = (
-            (item.file_name, item.content) for item in self.epub_html_items
-        )
-        buf = StringIO()
-        for (filename, html_content) in html_content_gen:
-            buf.write(self.prefix_html_ids(filename, html_content))
-            buf.write("\n<br/>\n")
-        html_content = self.build_html(
-            title=self.epub.title, body_content=buf.getvalue()
-        )
-        cache.set(cache_key, html_content.encode("utf-8"))
-        return html_content
-
-    def prefix_html_ids(self, filename, html):
-        tree = lxml_html.fromstring(html)
-        tree.make_links_absolute(
-            filename, resolve_base_href=False, handle_failures="ignore"
-        )
-        if os.path.splitext(filename)[1] in HTML_FILE_EXTS:
-            for node in tree.xpath("//*[@id]"):
-                node.set("id", filename + "#" + node.get("id"))
-        try:
-            tree.remove(tree.head)
-            tree.body.tag = "section"
-        except:
-            pass
-        tree.tag = "div"
-        tree.insert(0, tree.makeelement("header", attrib={"id": filename}))
-        return lxml_html.tostring(tree, method="html", encoding="unicode")
-
-    def build_html(self, title, body_content):
-        return (
-            "<!doctype html>\n"
-            '<html class="no-js" lang="">\n'
-            "<head>\n"
-            '<meta charset="utf-8">'
-            f"<title>{title}</title>\n"
-            "</head>\n"
-            "<body>\n"
-            f"{body_content}\n"
-            "</body>\n"
-            "</html>"
-        )
-
     def _get_title_for_section(self, href):
         filename = href.split("#")[0] if "#" in href else href
         html_doc = self.get_epub_html_item_by_href(filename)
@@ -346,6 +632,3 @@ class EpubDocument(SinglePageDocument):
         else:
             log.warning(f"Could not resolve href: {href}")
         return ""
-
-    def _get_cache_directory(self):
-        return os.fspath(home_data_path(".parsed_epub_cache"))
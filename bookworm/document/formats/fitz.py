@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 import zipfile
-from functools import cached_property, lru_cache
+from contextlib import suppress
+from functools import cached_property
 from hashlib import md5
 from pathlib import Path
 from tempfile import TemporaryDirectory
@@ -12,6 +13,8 @@ from zipfile import ZipFile
 import fitz
 import ftfy
 
+from bookworm import typehints as t
+from bookworm.concurrency import threaded_worker
 from bookworm.image_io import ImageIO
 from bookworm.logger import logger
 from bookworm.paths import home_data_path
@@ -21,11 +24,62 @@ from .. import BaseDocument, BasePage, BookMetadata, ChangeDocument
 from .. import DocumentCapability as DC
 from .. import (DocumentEncryptedError, DocumentError, DocumentRestrictedError,
                 Pager, Section)
+from ..prefetch import PagePrefetcher
 
 log = logger.getChild(__name__)
 fitz.Tools().mupdf_display_errors(False)
 
 
+def build_outline_tree(
+    root_item: Section, outline: list[list[t.Any]], max_page: int
+) -> Section:
+    """
+    Add the entries of the given outline, as returned by `fitz.Document.get_toc`, to the root section.
+    The pages of an entry extend up to the page before the next entry of the same level.
+    This is done in a single pass, by keeping the last child at each depth of the tree.
+    """
+    # The start page of the next entry of the same level, for each entry
+    next_start_pages = [None] * len(outline)
+    next_start_page_by_level = {}
+    for index in range(len(outline) - 1, -1, -1):
+        level, __, start_page, __ = outline[index]
+        next_start_pages[index] = next_start_page_by_level.get(level)
+        next_start_page_by_level[level] = start_page
+    # The last section at each depth of the rightmost branch of the tree
+    rightmost_branch = []
+    _last_entry = None
+    for ((level, title, start_page, infodict), next_start_page) in zip(
+        outline, next_start_pages
+    ):
+        first_page = start_page - 1
+        last_page = max_page if next_start_page is None else next_start_page - 2
+        if first_page < 0:
+            first_page = 0 if _last_entry is None else _last_entry.pager.last
+        if last_page < first_page:
+            last_page += 1
+        if (first_page < 0) or (last_page < 0):
+            continue
+        if first_page > last_page:
+            continue
+        sect = Section(
+            title=title,
+            pager=Pager(first=first_page, last=last_page),
+            data={"html_file": infodict.get("name")},
+        )
+        if level == 1:
+            root_item.append(sect)
+            rightmost_branch[:] = [sect]
+        elif not root_item:
+            continue
+        else:
+            depth = max(0, min(level - 2, len(rightmost_branch) - 1))
+            rightmost_branch[depth].append(sect)
+            del rightmost_branch[depth + 1 :]
+            rightmost_branch.append(sect)
+        _last_entry = sect
+    return root_item
+
+
 class FitzPage(BasePage):
     """Wrapps fitz.Page."""
 
@@ -45,7 +99,7 @@ class FitzPage(BasePage):
     def get_image(self, zoom_factor=1.0):
         mat = fitz.Matrix(zoom_factor, zoom_factor)
         pix = self._fitz_page.get_pixmap(matrix=mat, alpha=False)
-        return ImageIO(data=pix.samples, width=pix.width, height=pix.height)
+        return ImageIO.from_fitz_pixmap(pix)
 
 
 class FitzDocument(BaseDocument):
@@ -63,10 +117,31 @@ class FitzDocument(BaseDocument):
         | DC.LINKS
     )
 
-    @lru_cache(maxsize=1000)
+    # Set by the reader when the pages around the current page are prefetched
+    page_prefetcher = None
+    # Set when the table of content is being built in the background
+    _toc_future = None
+
     def get_page(self, index: int) -> FitzPage:
         return FitzPage(self, index)
 
+    def create_page_prefetcher(self) -> PagePrefetcher:
+        return PagePrefetcher(self)
+
+    def get_page_content(self, page_number: int) -> str:
+        if (self.page_prefetcher is not None) and (
+            text := self.page_prefetcher.get_text(page_number)
+        ) is not None:
+            return text
+        return super().get_page_content(page_number)
+
+    def get_page_image(self, page_number: int, zoom_factor: float = 1.0) -> ImageIO:
+        if (self.page_prefetcher is not None) and (
+            image := self.page_prefetcher.get_image(page_number, zoom_factor)
+        ) is not None:
+            return image
+        return super().get_page_image(page_number, zoom_factor)
+
     def __len__(self) -> int:
         return self._ebook.page_count
 
@@ -84,64 +159,55 @@ class FitzDocument(BaseDocument):
             self.decrypt_document()
 
     def close(self):
+        if self._toc_future is not None:
+            self._toc_future.cancel()
+            # A build that has already started reads the document until it is done
+            with suppress(Exception):
+                self._toc_future.result()
+        if self.page_prefetcher is not None:
+            self.page_prefetcher.close()
+            self.page_prefetcher = None
         if self._ebook is None:
             return
+        # Release the fitz pages held by the memory cache before the document they belong to
+        super().close()
         self._ebook.close()
         self._ebook = None
-        super().close()
 
     @cached_property
     def toc_tree(self):
-        toc_info = self._ebook.get_toc(simple=False)
+        if self._toc_future is not None:
+            return self._toc_future.result()
+        return self._build_toc_tree()
+
+    def _build_toc_tree(self):
         max_page = len(self) - 1
         root_item = Section(
             title=self.metadata.title,
             pager=Pager(first=0, last=max_page),
             data={"html_file": None},
         )
-        _last_entry = None
-        for (index, (level, title, start_page, infodict)) in enumerate(toc_info):
-            try:
-                curr_index = index
-                next_item = toc_info[curr_index + 1]
-                while next_item[0] != level:
-                    curr_index += 1
-                    next_item = toc_info[curr_index]
-            except IndexError:
-                next_item = None
-            first_page = start_page - 1
-            last_page = max_page if next_item is None else next_item[2] - 2
-            if first_page < 0:
-                first_page = 0 if _last_entry is None else _last_entry.pager.last
-            if last_page < first_page:
-                last_page += 1
-            if not all(p >= 0 for p in (first_page, last_page)):
-                continue
-            if first_page > last_page:
-                continue
-            pgn = Pager(first=first_page, last=last_page)
-            sect = Section(
-                title=title,
-                pager=pgn,
-                data={"html_file": infodict.get("name")},
-            )
-            if level == 1:
-                root_item.append(sect)
-                _last_entry = sect
-                continue
-            elif not root_item:
-                continue
-            parent = root_item.children[-1]
-            parent_lvl = level - 1
-            while True:
-                if (parent_lvl > 1) and parent.children:
-                    parent = parent.children[-1]
-                    parent_lvl -= 1
-                    continue
-                parent.append(sect)
-                _last_entry = sect
-                break
-        return root_item
+        outline = self._ebook.get_toc(simple=False)
+        return build_outline_tree(root_item, outline, max_page)
+
+    def load_toc_tree_in_background(self):
+        """
+        Start building the table of content in the background, so that huge outlines do not
+        delay showing the first page. Accessing `toc_tree`, or closing the document,
+        waits for the build to finish.
+        """
+        if (self._toc_future is None) and ("toc_tree" not in self.__dict__):
+            self._toc_future = threaded_worker.submit(self._build_toc_tree)
+
+    def is_toc_tree_ready(self) -> bool:
+        return (self._toc_future is None) or self._toc_future.done()
+
+    def add_toc_tree_ready_callback(self, callback: t.Callable[[], None]):
+        """Call the given callback when the table of content has been built."""
+        if self._toc_future is None:
+            callback()
+        else:
+            self._toc_future.add_done_callback(lambda future: callback())
 
     @cached_property
     def metadata(self):
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import hashlib
 from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
 from functools import cached_property
@@ -14,6 +15,7 @@ from more_itertools import first as get_first_element
 from more_itertools import zip_offset
 from yarl import URL
 
+from bookworm import typehints as t
 from bookworm.http_tools import HttpResource
 from bookworm.logger import logger
 from bookworm.structured_text import (HEADING_LEVELS, SemanticElementType,
@@ -27,10 +29,15 @@ from .. import SINGLE_PAGE_DOCUMENT_PAGER, BookMetadata, ChangeDocument
 from .. import DocumentCapability as DC
 from .. import (DocumentError, DocumentIOError, LinkTarget, ReadingMode,
                 Section, SinglePageDocument, TreeStackBuilder)
+from ..cache import DocumentContentCache
+from ..serde import (StructuredTextData, dump_metadata, dump_toc_tree,
+                     load_metadata, load_toc_tree, pack, unpack)
+from ..shared_payload import SharedPayload
 
 log = logger.getChild(__name__)
 # Default cache timeout
 EXPIRE_TIMEOUT = 7 * 24 * 60 * 60
+PARSED_HTML_CACHE_FIELD = "parsed_html"
 
 
 def get_clean_html(html_string: str) -> (str, BookMetadata):
@@ -92,8 +99,21 @@ class BaseHtmlDocument(SinglePageDocument):
     )
 
     def __getstate__(self) -> dict:
-        """Support for pickling."""
-        return super().__getstate__() | dict(html_string=self.html_string)
+        """
+        Support for pickling.
+        The parsed html is sent through shared memory, so the other process does not parse it again.
+        """
+        state = super().__getstate__()
+        if (shared_parsed_html := self.get_shared_parsed_html()) is not None:
+            state["shared_parsed_html"] = shared_parsed_html
+        elif (html_string := self.__dict__.get("html_string")) is not None:
+            state["html_string"] = html_string
+        return state
+
+    def get_worker_cache_key(self):
+        if (shared_parsed_html := self.get_shared_parsed_html()) is None:
+            return super().get_worker_cache_key()
+        return (self.uri.to_uri_string(), shared_parsed_html.name)
 
     def read(self):
         super().read()
@@ -102,6 +122,15 @@ class BaseHtmlDocument(SinglePageDocument):
         self._metainfo = None
         self._semantic_structure = {}
         self._style_info = {}
+        if (
+            shared_parsed_html := self.__dict__.pop("shared_parsed_html", None)
+        ) is not None:
+            with shared_parsed_html.get_buffer() as buf:
+                self.load_parsed_html_payload(buf)
+            shared_parsed_html.close()
+            return
+        if self.load_parsed_html():
+            return
         try:
             self.html_string = self.get_html()
         except Exception as e:
@@ -114,6 +143,65 @@ class BaseHtmlDocument(SinglePageDocument):
             self.parse_to_full_text()
         else:
             self.parse_html()
+        self.store_parsed_html()
+
+    @cached_property
+    def parsed_html_cache(self) -> t.Optional[DocumentContentCache]:
+        return DocumentContentCache.for_document(self)
+
+    def load_parsed_html(self) -> bool:
+        """
+        Restore the results of parsing the html of this document from the cache.
+        Return True if they were found.
+        """
+        if self.parsed_html_cache is None:
+            return False
+        payload = self.parsed_html_cache.get_document_value(PARSED_HTML_CACHE_FIELD)
+        if payload is None:
+            return False
+        self.load_parsed_html_payload(payload)
+        return True
+
+    def load_parsed_html_payload(self, payload: bytes):
+        data = unpack(payload)
+        self._metainfo = load_metadata(data["metadata"])
+        self.set_structured_text_data(StructuredTextData.from_dict(data["content"]))
+        self._outline = load_toc_tree(data["toc"])
+
+    def dump_parsed_html_payload(self) -> bytes:
+        return pack(
+            {
+                "metadata": dump_metadata(self._metainfo),
+                "content": self.structured_text_data.to_dict(),
+                "toc": dump_toc_tree(self._outline),
+            }
+        )
+
+    def store_parsed_html(self):
+        if self.parsed_html_cache is None:
+            return
+        payload = self.dump_parsed_html_payload()
+        try:
+            self.parsed_html_cache.set_document_value(PARSED_HTML_CACHE_FIELD, payload)
+        except Exception:
+            log.exception("Failed to cache the parsed html content", exc_info=True)
+
+    def get_shared_parsed_html(self) -> t.Optional[SharedPayload]:
+        """Publish the parsed html in shared memory, once it has been parsed."""
+        if (shared_parsed_html := self.__dict__.get("_shared_parsed_html")) is None:
+            if getattr(self, "structured_text_data", None) is None:
+                return
+            shared_parsed_html = self._shared_parsed_html = SharedPayload.publish(
+                self.dump_parsed_html_payload()
+            )
+        return shared_parsed_html
+
+    def close(self):
+        if (
+            shared_parsed_html := self.__dict__.pop("_shared_parsed_html", None)
+        ) is not None:
+            shared_parsed_html.close()
+        super().close()
 
     def parse_html(self):
         return self.parse_to_full_text()
@@ -127,10 +215,6 @@ class BaseHtmlDocument(SinglePageDocument):
     def get_document_style_info(self):
         return self._style_info
 
-    @cached_property
-    def language(self):
-        return self.get_language(self.html_string, is_html=True)
-
     @cached_property
     def toc_tree(self):
         root = self._outline
@@ -177,21 +261,27 @@ class BaseHtmlDocument(SinglePageDocument):
         self._metainfo = BookMetadata(title=title, author=author)
         return self.parse_text_and_structure(self.html_string)
 
+    def set_structured_text_data(self, structured_text_data: StructuredTextData):
+        self.structured_text_data = structured_text_data
+        self._semantic_structure = structured_text_data.semantic_elements
+        self._style_info = structured_text_data.styled_elements
+        self.link_targets = structured_text_data.link_targets
+        self.anchors = structured_text_data.anchors
+        self._text = structured_text_data.text
+
     def parse_text_and_structure(self, html):
         if type(html) in (str, bytes):
             extracted_text_and_info = StructuredHtmlParser.from_string(html)
         else:
             extracted_text_and_info = StructuredHtmlParser(html)
-        self.structure = extracted_text_and_info
-        self._semantic_structure = extracted_text_and_info.semantic_elements
-        self._style_info = extracted_text_and_info.styled_elements
-        self.link_targets = extracted_text_and_info.link_targets
-        self.anchors = extracted_text_and_info.anchors
-        self._text = text = extracted_text_and_info.get_text()
+        self.set_structured_text_data(
+            StructuredTextData.from_parser(extracted_text_and_info)
+        )
+        text = self._text
         heading_poses = sorted(
             (
                 (rng, h)
-                for h, rngs in extracted_text_and_info.semantic_elements.items()
+                for h, rngs in self._semantic_structure.items()
                 for rng in rngs
                 if h in HEADING_LEVELS
             ),
@@ -234,7 +324,7 @@ class BaseHtmlDocument(SinglePageDocument):
         self._outline = root
 
     def get_document_table_markup(self, table_index):
-        return self.structure.get_table_markup(table_index)
+        return self.structured_text_data.tables[table_index]
 
 
 class FileSystemHtmlDocument(BaseHtmlDocument):
@@ -266,6 +356,13 @@ class WebHtmlDocument(BaseHtmlDocument):
         ReadingMode.FULL_TEXT_VIEW,
     )
 
+    @cached_property
+    def parsed_html_cache(self) -> t.Optional[DocumentContentCache]:
+        # Web pages have no file to hash, so the cache is keyed by the downloaded html
+        self.html_string = self.get_html()
+        html_hash = hashlib.sha1(self.html_string.encode("utf-8")).hexdigest()
+        return DocumentContentCache.for_content_hash(self, html_hash)
+
     def get_html(self):
         if (html_string := getattr(self, "html_string", None)) is not None:
             return html_string
@@ -10,9 +10,10 @@ from tempfile import TemporaryDirectory
 import mobi
 
 from bookworm.document.uri import DocumentUri
+from bookworm.fingerprint import get_file_fingerprint
 from bookworm.logger import logger
 from bookworm.paths import home_data_path
-from bookworm.utils import generate_file_md5, mute_stdout
+from bookworm.utils import mute_stdout
 
 from .. import ChangeDocument
 from .. import DocumentCapability as DC
@@ -61,7 +62,7 @@ class MobiDocument(DummyDocument):
 
     def unpack_mobi(self, filename):
         storage_area = self.get_mobi_storage_area()
-        filemd5 = generate_file_md5(filename)
+        filemd5 = get_file_fingerprint(filename, algorithm="md5")
         for fname in storage_area.iterdir():
             if fname.is_file() and (fname.stem == filemd5):
                 return str(fname)
@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 import sys
-from functools import lru_cache
 
 from odf import opendocument
 
@@ -23,11 +22,12 @@ from odf.odf2xhtml import ODF2XHTML
 from bookworm import typehints as t
 from bookworm.concurrency import process_worker
 from bookworm.document.uri import DocumentUri
+from bookworm.fingerprint import get_file_fingerprint
 from bookworm.logger import logger
 from bookworm.paths import home_data_path
 from bookworm.structured_text.structured_html_parser import \
     StructuredHtmlParser
-from bookworm.utils import NEWLINE, escape_html, generate_file_md5
+from bookworm.utils import NEWLINE, escape_html
 
 from .. import BaseDocument, BasePage, BookMetadata, ChangeDocument
 from .. import DocumentCapability as DC
@@ -48,7 +48,8 @@ class OdfParser:
     def get_converted_filename(self):
         storage_area = home_data_path("odf_as_html")
         storage_area.mkdir(parents=True, exist_ok=True)
-        target_file = storage_area / f"{generate_file_md5(self.odf_filename)}.html"
+        filemd5 = get_file_fingerprint(self.odf_filename, algorithm="md5")
+        target_file = storage_area / f"{filemd5}.html"
         if not target_file.exists():
             target_file.write_text(self.as_html, encoding="utf-8")
         return target_file
@@ -140,7 +141,6 @@ class OdfPresentation(BaseDocument):
     def __len__(self):
         return self.num_slides
 
-    @lru_cache(maxsize=1000)
     def get_page(self, index):
         return OdpSlide(self, index)
 
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import gc
 from datetime import datetime
-from functools import cached_property, lru_cache
+from functools import cached_property
 
 import ftfy
 import regex
@@ -21,6 +21,7 @@ from bookworm.utils import format_datetime
 
 from .. import DocumentCapability as DC
 from .. import ReadingMode
+from ..page_labels import PageLabelIndex
 from .fitz import FitzDocument, FitzPage
 
 log = logger.getChild(__name__)
@@ -62,7 +63,7 @@ class FitzPdfPage(FitzPage):
         return super().normalize_text(text)
 
     def get_label(self) -> str:
-        return self._fitz_page.get_label().strip()
+        return self.document.page_label_index.get_label(self.index)
 
 
 class FitzPdfDocument(FitzDocument):
@@ -79,10 +80,12 @@ class FitzPdfDocument(FitzDocument):
         ReadingMode.PHYSICAL,
     )
 
-    @lru_cache(maxsize=1000)
     def get_page(self, index: int) -> FitzPage:
         return FitzPdfPage(self, index, xpdf_text_output=self.xpdf_text_output)
 
+    def build_page_label_index(self) -> PageLabelIndex:
+        return PageLabelIndex.from_rules(self._ebook.get_page_labels(), len(self))
+
     @cached_property
     def xpdf_text_output(self):
         reading_mode = BOOKWORM_READING_MODE_TO_XPDF_READING_MODE[
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from functools import cached_property, lru_cache
+from functools import cached_property
 
 import pptx
 from pptx.enum.shapes import MSO_SHAPE_TYPE, PP_PLACEHOLDER
@@ -122,7 +122,6 @@ class PowerpointPresentation(BaseDocument):
     def __len__(self):
         return self.num_slides
 
-    @lru_cache(maxsize=1000)
     def get_page(self, index):
         return PowerpointSlide(self.slides[index], self, index)
 
@@ -20,9 +20,10 @@ from selectolax.parser import HTMLParser
 from bookworm import app
 from bookworm.concurrency import process_worker, threaded_worker
 from bookworm.document.uri import DocumentUri
+from bookworm.fingerprint import get_file_fingerprint
 from bookworm.logger import logger
 from bookworm.paths import app_path, home_data_path
-from bookworm.utils import NEWLINE, escape_html, generate_file_md5
+from bookworm.utils import NEWLINE, escape_html
 
 from .. import ChangeDocument
 from .. import DocumentCapability as DC
@@ -54,13 +55,15 @@ class WordDocument(BaseHtmlDocument):
                 self.try_decrypt(data_buf, decryption_key)
             else:
                 raise DocumentEncryptedError(self)
-        self.__html_content = self._get_html_content_from_docx(
-            data_buf, is_encrypted_document
-        )
+        self.__data_buf = data_buf
+        self.__is_encrypted_document = is_encrypted_document
         super().read()
 
     def get_html(self):
-        return self.__html_content
+        # Only called when the parsed content is not found in the cache
+        return self._get_html_content_from_docx(
+            self.__data_buf, self.__is_encrypted_document
+        )
 
     def parse_html(self):
         return self.parse_to_full_text()
@@ -154,7 +157,8 @@ class Word97Document(DummyDocument):
     @classmethod
     def get_converted_filename(cls, filename):
         storage_area = cls.get_storage_area()
-        target_file = storage_area / f"{generate_file_md5(filename)}.docbook"
+        filemd5 = get_file_fingerprint(filename, algorithm="md5")
+        target_file = storage_area / f"{filemd5}.docbook"
         if not target_file.exists():
             docbook_content = cls.convert_to_docbook(filename)
             target_file.write_bytes(docbook_content)
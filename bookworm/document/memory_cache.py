@@ -0,0 +1,128 @@
+# coding: utf-8
+
+"""
+An in-memory cache owned by each open document, for its page objects, page text, and page images.
+The cache is bounded by an estimate of the bytes it holds, rather than by the number of entries,
+and it is cleared when the document is closed, so it never keeps backend handles alive.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from collections import OrderedDict
+
+import attr
+
+from bookworm import typehints as t
+from bookworm.image_io import ImageIO
+from bookworm.logger import logger
+
+log = logger.getChild(__name__)
+# The default number of bytes each document may hold in memory
+DOCUMENT_MEMORY_CACHE_BUDGET = 64 * 1024 * 1024
+# The estimated size of a page object, most of which is native memory held by the document backend
+PAGE_OBJECT_SIZE_ESTIMATE = 32 * 1024
+
+
+def estimate_size(value: t.Any) -> int:
+    """Return the approximate number of bytes used by the given cached value."""
+    if isinstance(value, ImageIO):
+        return value.nbytes + PAGE_OBJECT_SIZE_ESTIMATE
+    elif isinstance(value, (str, bytes, bytearray)):
+        return sys.getsizeof(value)
+    return PAGE_OBJECT_SIZE_ESTIMATE
+
+
+@attr.s(auto_attribs=True, slots=True)
+class CacheStatistics:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return (self.hits / lookups) if lookups else 0.0
+
+
+class DocumentMemoryCache:
+    """A least recently used cache, that evicts entries once their total size exceeds the budget."""
+
+    def __init__(self, budget: int = DOCUMENT_MEMORY_CACHE_BUDGET):
+        self.budget = budget
+        self.size = 0
+        self.stats = CacheStatistics()
+        self.closed = False
+        self._entries: OrderedDict[t.Hashable, tuple[t.Any, int]] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}: {len(self)} entries, "
+            f"{self.size}/{self.budget} bytes, {self.stats}>"
+        )
+
+    def get(self, key: t.Hashable, default=None) -> t.Any:
+        with self._lock:
+            if (entry := self._entries.get(key)) is None:
+                self.stats.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[0]
+
+    def set(self, key: t.Hashable, value: t.Any, size: int = None):
+        """Cache the value, unless it is larger than the whole budget, or the cache is closed."""
+        size = estimate_size(value) if size is None else size
+        with self._lock:
+            if self.closed or (size > self.budget):
+                return
+            self.discard(key)
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.budget:
+                __, (__, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.stats.evictions += 1
+
+    def get_or_compute(
+        self, key: t.Hashable, compute_func: t.Callable[[], t.Any]
+    ) -> t.Any:
+        with self._lock:
+            if (entry := self._entries.get(key)) is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return entry[0]
+            self.stats.misses += 1
+        # Do not hold the lock while the backend is busy
+        value = compute_func()
+        self.set(key, value)
+        return value
+
+    def discard(self, key: t.Hashable):
+        with self._lock:
+            if (entry := self._entries.pop(key, None)) is not None:
+                self.size -= entry[1]
+
+    def invalidate(self, predicate: t.Callable[[t.Hashable], bool] = None):
+        """Remove the entries whose keys match the predicate, or all entries if no predicate is given."""
+        with self._lock:
+            if predicate is None:
+                self._entries.clear()
+                self.size = 0
+                return
+            for key in [key for key in self._entries if predicate(key)]:
+                self.discard(key)
+
+    def close(self):
+        """Drop all entries, and stop caching new ones."""
+        with self._lock:
+            self.closed = True
+            self.invalidate()
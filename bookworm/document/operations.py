@@ -7,10 +7,22 @@ The functions in this module are usually run in parallel using bookworm.concurre
 
 from __future__ import annotations
 
-from io import StringIO
+import gzip
+import io
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, suppress
 
 import attr
 import regex as re
+import ujson
+
+from bookworm import typehints as t
+
+
+from .search_index import WORD_TOKEN_PATTERN
+from .shared_payload import SharedPayload
 
 NEWLINE = "\n"
 
@@ -43,57 +55,270 @@ class SearchResult:
 
 def search(pattern, text):
     """Search the given text using a regular expression."""
-    snip_reach = 25
-    len_text = len(text)
     for mat in pattern.finditer(text, concurrent=True):
         start, end = mat.span()
-        snip_start = 0 if start <= snip_reach else (start - snip_reach)
-        snip_end = len_text if (end + snip_reach) >= len_text else (end + snip_reach)
-        snip = text[snip_start:snip_end].split()
-        if len(snip) > 3:
-            snip.pop(0)
-            snip.pop(-1)
-        yield (start, " ".join(snip))
+        yield (start, get_excerpt(text, start, end))
 
 
-def export_to_plain_text(doc, target_filename):
-    """This function runs in a separate process."""
-    total = len(doc)
-    out = StringIO()
-    if out.write(doc.metadata.title or ""):
-        out.write(f"{NEWLINE}{'-' * 30}{NEWLINE}")
+def get_excerpt(text, start, end, snip_reach=25):
+    """Return the words surrounding the given span of text."""
+    len_text = len(text)
+    snip_start = 0 if start <= snip_reach else (start - snip_reach)
+    snip_end = len_text if (end + snip_reach) >= len_text else (end + snip_reach)
+    snip = text[snip_start:snip_end].split()
+    if len(snip) > 3:
+        snip.pop(0)
+        snip.pop(-1)
+    return " ".join(snip)
+
+
+class PageExportWriter(ABC):
+    """Writes the pages of a document to a text stream, one page at a time."""
+
+    def __init__(self, file: t.TextIO):
+        self.file = file
+
+    def write_header(self, doc):
+        """Write the document information before the first page."""
+
+    @abstractmethod
+    def write_page(self, doc, page_index: int, text: str):
+        """Write the text of the given page."""
+
+
+class PlainTextExportWriter(PageExportWriter):
+    """Writes the pages as plain text separated by form feeds."""
+
+    def write_header(self, doc):
+        if self.file.write(doc.metadata.title or ""):
+            self.file.write(f"{NEWLINE}{'-' * 30}{NEWLINE}")
+
+    def write_page(self, doc, page_index, text):
+        self.file.write(f"{text}{NEWLINE}\f{NEWLINE}")
+
+
+class JsonLinesExportWriter(PageExportWriter):
+    """
+    Writes a JSON object per line: the document metadata,
+    then one object per section of the table of content, then one object per page.
+    """
+
+    def write_header(self, doc):
+        metadata = doc.metadata
+        self._write_record(
+            {
+                "type": "document",
+                "title": metadata.title,
+                "author": metadata.author,
+                "format": doc.format,
+                "num_pages": len(doc),
+            }
+        )
+        self._write_toc_records(doc.toc_tree, level=1)
+
+    def _write_toc_records(self, section, level):
+        """Write a record per section of the table of content, in reading order."""
+        for child in section.children:
+            record = {"type": "section", "title": child.title, "level": level}
+            if child.pager is not None:
+                record["first_page"] = child.pager.first
+                record["last_page"] = child.pager.last
+            if child.text_range is not None:
+                record["start"] = child.text_range.start
+                record["stop"] = child.text_range.stop
+            self._write_record(record)
+            self._write_toc_records(child, level + 1)
+
+    def write_page(self, doc, page_index, text):
+        page = doc[page_index]
+        self._write_record(
+            {
+                "type": "page",
+                "index": page_index,
+                "number": page.number,
+                "label": page.get_label(),
+                "section": page.section.title,
+                "text": text,
+            }
+        )
+
+    def _write_record(self, record):
+        self.file.write(ujson.dumps(record, ensure_ascii=False))
+        self.file.write(NEWLINE)
+
+
+# Maps export formats to (file extension, writer class)
+EXPORT_FORMATS = {
+    "txt": (".txt", PlainTextExportWriter),
+    "jsonl": (".jsonl", JsonLinesExportWriter),
+}
+GZIP_FILE_EXTENSION = ".gz"
+EXPORT_BUFFER_SIZE = 1024 * 1024
+
+
+def get_export_format_for_filename(filename) -> tuple[str, bool]:
+    """Return the (export format, is_compressed) for the given target filename."""
+    filename = os.fspath(filename).lower()
+    is_compressed = filename.endswith(GZIP_FILE_EXTENSION)
+    if is_compressed:
+        filename = filename.removesuffix(GZIP_FILE_EXTENSION)
+    for (export_format, (file_extension, __)) in EXPORT_FORMATS.items():
+        if filename.endswith(file_extension):
+            return export_format, is_compressed
+    return "txt", is_compressed
+
+
+def strip_export_file_extension(filename: str) -> str:
+    """Remove the extension of any export format, compressed or not, from the filename."""
+    lower_filename = filename.lower().removesuffix(GZIP_FILE_EXTENSION)
+    for (file_extension, __) in EXPORT_FORMATS.values():
+        if lower_filename.endswith(file_extension):
+            return filename[: len(lower_filename) - len(file_extension)]
+    return filename[: len(lower_filename)]
+
+
+@contextmanager
+def _open_for_atomic_write(target_filename, compress):
+    """
+    Open a buffered text stream to a temporary file next to the target.
+    The temporary file replaces the target only if the block exits without errors.
+    """
+    target_filename = os.fspath(target_filename)
+    fd, temp_filename = tempfile.mkstemp(
+        prefix=".export-",
+        suffix=".part",
+        dir=os.path.dirname(os.path.abspath(target_filename)),
+    )
+    raw_file = open(fd, "wb", buffering=EXPORT_BUFFER_SIZE)
     try:
+        if compress:
+            binary_file = gzip.GzipFile(
+                filename=os.path.basename(target_filename).removesuffix(
+                    GZIP_FILE_EXTENSION
+                ),
+                mode="wb",
+                fileobj=raw_file,
+            )
+        else:
+            binary_file = raw_file
+        with io.TextIOWrapper(binary_file, encoding="utf8", newline="") as file:
+            yield file
+        raw_file.close()
+        os.replace(temp_filename, target_filename)
+    except BaseException:
+        raw_file.close()
+        with suppress(OSError):
+            os.remove(temp_filename)
+        raise
+
+
+def export_to_plain_text(doc, target_filename, export_format=None, compress=None):
+    """
+    Stream the text of the document, page by page, to the target file.
+    If not given, the export format and compression are deduced from the target filename.
+    This function runs in a separate process, and leaves the document open, because
+    warm workers keep documents open between operations (see `WarmWorkerPool`).
+    """
+    inferred_format, inferred_compress = get_export_format_for_filename(
+        target_filename
+    )
+    export_format = export_format or inferred_format
+    compress = inferred_compress if compress is None else compress
+    __, writer_cls = EXPORT_FORMATS[export_format]
+    total = len(doc)
+    with _open_for_atomic_write(target_filename, compress) as file:
+        writer = writer_cls(file)
+        writer.write_header(doc)
         for n in range(total):
-            text = doc.get_page_content(n)
-            out.write(f"{text}{NEWLINE}\f{NEWLINE}")
+            writer.write_page(doc, n, doc.get_page_content(n))
             yield n + 1
-        full_text = out.getvalue()
-        with open(target_filename, "w", encoding="utf8") as file:
-            file.write(full_text)
-    finally:
-        out.close()
-        doc.close()
 
 
 def search_book(doc, request):
-    """This function also runs in a separate process."""
+    """This function also runs in a separate process, and leaves the document open."""
+    if (not request.is_regex) and (search_index := doc.get_search_index()) is not None:
+        yield from search_book_using_index(doc, request, search_index)
+        return
     pattern = _make_search_re_pattern(request)
-    try:
-        for n in range(request.from_page, request.to_page + 1):
-            resultset = []
-            sect = doc[n].section.title
-            for pos, snip in search(pattern, doc.get_page_content(n)):
-                resultset.append(
-                    SearchResult(excerpt=snip, page=n, position=pos, section=sect)
+    for n in range(request.from_page, request.to_page + 1):
+        resultset = []
+        sect = doc[n].section.title
+        for pos, snip in search(pattern, doc.get_page_content(n)):
+            resultset.append(
+                SearchResult(excerpt=snip, page=n, position=pos, section=sect)
+            )
+        yield resultset
+
+
+def search_book_using_index(doc, request, search_index):
+    """
+    Answer a plain-term search request from the document's search index.
+    Only the pages that may contain the term are visited.
+    This runs in a separate process, as part of `search_book`.
+    """
+    candidate_pages = search_index.get_candidate_pages(
+        request.term, request.whole_word
+    )
+    is_single_word = (
+        request.whole_word and WORD_TOKEN_PATTERN.fullmatch(request.term) is not None
+    )
+    pattern = _make_search_re_pattern(request)
+    for n in range(request.from_page, request.to_page + 1):
+        if (candidate_pages is not None) and (n not in candidate_pages):
+            yield []
+            continue
+        text = doc.get_page_content(n)
+        if is_single_word:
+            term_length = len(request.term)
+            matches = (
+                (pos, get_excerpt(text, pos, pos + term_length))
+                for pos in search_index.get_word_positions(request.term, n)
+                if (not request.case_sensitive)
+                or (text[pos : pos + term_length] == request.term)
+            )
+        else:
+            matches = search(pattern, text)
+        resultset = []
+        for pos, snip in matches:
+            resultset.append(
+                SearchResult(
+                    excerpt=snip, page=n, position=pos, section=doc[n].section.title
                 )
-            yield resultset
-    finally:
-        doc.close()
+            )
+        yield resultset
+
+
+def build_search_index(doc):
+    """Build the search index of the document and persist it. Runs in a separate process."""
+    doc.build_search_index()
+    yield True
+
+
+def build_structure_index(doc):
+    """Build the structure index of the document and persist it. Runs in a separate process."""
+    doc.build_structure_index()
+    yield True
+
+
+def split_page_range(from_page, to_page, num_shards):
+    """Split the inclusive page range into at most `num_shards` contiguous (first, last) shards."""
+    num_pages = to_page - from_page + 1
+    num_shards = max(1, min(num_shards, num_pages))
+    shard_size, remainder = divmod(num_pages, num_shards)
+    shards = []
+    first = from_page
+    for idx in range(num_shards):
+        last = first + shard_size - (idx >= remainder)
+        shards.append((first, last))
+        first = last + 1
+    return shards
 
 
-def search_single_page_document(text, request):
+def search_single_page_document(content: SharedPayload, request):
+    """Search the content of a single page document, which is shared by the parent process."""
     pattern = _make_search_re_pattern(request)
     start_pos, stop_pos = request.text_range
+    text = content.get_text()[request.text_range.as_slice()]
     for pos, snip in search(pattern, text):
         actual_text_pos = start_pos + pos
         yield [
@@ -0,0 +1,112 @@
+# coding: utf-8
+
+"""
+Maps page labels (like "xii" or "A-37") to page indices and back,
+computed in one pass over the page label rules of a document.
+"""
+
+from __future__ import annotations
+
+from bookworm import typehints as t
+from bookworm.logger import logger
+
+log = logger.getChild(__name__)
+PAGE_LABEL_INDEX_CACHE_FIELD = "page_label_index"
+ROMAN_NUMERALS = (
+    (1000, "M"),
+    (900, "CM"),
+    (500, "D"),
+    (400, "CD"),
+    (100, "C"),
+    (90, "XC"),
+    (50, "L"),
+    (40, "XL"),
+    (10, "X"),
+    (9, "IX"),
+    (5, "V"),
+    (4, "IV"),
+    (1, "I"),
+)
+
+
+def to_roman_numeral(number: int) -> str:
+    numeral = []
+    for (value, symbol) in ROMAN_NUMERALS:
+        count, number = divmod(number, value)
+        numeral.append(symbol * count)
+    return "".join(numeral)
+
+
+def to_letters(number: int) -> str:
+    """A to Z for the first 26 numbers, then AA to ZZ for the next 26, and so on."""
+    count, offset = divmod(number - 1, 26)
+    return chr(ord("A") + offset) * (count + 1)
+
+
+def format_page_number(style: str, number: int) -> str:
+    """Format the page number using a numbering style of the PDF specification."""
+    if style == "D":
+        return str(number)
+    elif style == "R":
+        return to_roman_numeral(number)
+    elif style == "r":
+        return to_roman_numeral(number).lower()
+    elif style == "A":
+        return to_letters(number)
+    elif style == "a":
+        return to_letters(number).lower()
+    return ""
+
+
+class PageLabelIndex:
+    """Provides lookups from page index to page label, and from page label to page index."""
+
+    __slots__ = ["labels", "_indices"]
+
+    def __init__(self, labels: t.Sequence[str]):
+        self.labels = tuple(labels)
+        self._indices = {}
+        for (index, label) in enumerate(self.labels):
+            if label:
+                # The first page with a given label wins
+                self._indices.setdefault(label.lower(), index)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getstate__(self):
+        return {"labels": self.labels}
+
+    def __setstate__(self, state):
+        self.__init__(state["labels"])
+
+    @classmethod
+    def from_rules(
+        cls, rules: t.Iterable[dict[str, t.Any]], num_pages: int
+    ) -> PageLabelIndex:
+        """
+        Build the index from page label rules, as returned by `fitz.Document.get_page_labels`.
+        Each rule applies from its start page up to the start page of the next rule.
+        """
+        labels = [""] * num_pages
+        rules = sorted(rules, key=lambda rule: rule["startpage"])
+        for (rule, next_rule) in zip(rules, [*rules[1:], None]):
+            start_page = rule["startpage"]
+            stop_page = num_pages if next_rule is None else next_rule["startpage"]
+            prefix = rule.get("prefix", "")
+            style = rule.get("style", "")
+            first_number = rule.get("firstpagenum", 1)
+            for index in range(max(start_page, 0), min(stop_page, num_pages)):
+                number = first_number + index - start_page
+                labels[index] = (prefix + format_page_number(style, number)).strip()
+        return cls(labels)
+
+    def get_label(self, page_index: int) -> str:
+        try:
+            return self.labels[page_index]
+        except IndexError:
+            return ""
+
+    def get_page_index(self, label: str) -> t.Optional[int]:
+        """Return the index of the first page with the given label, ignoring case."""
+        return self._indices.get(label.strip().lower())
@@ -0,0 +1,147 @@
+# coding: utf-8
+
+"""
+Extracts the text and renders the images of the pages around the current page ahead of time,
+so that turning a page, or viewing it as an image, does not wait for the document backend.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from functools import partial
+
+from bookworm import typehints as t
+from bookworm.concurrency import QueueProcess
+from bookworm.image_io import ImageIO
+from bookworm.logger import logger
+
+log = logger.getChild(__name__)
+# How many pages to prefetch before and after the current page
+PAGE_PREFETCH_DISTANCE = 2
+# The maximum number of prefetched texts and images to keep in memory
+PAGE_PREFETCH_CACHE_SIZE = 24
+# The key used for page text, as opposed to an image rendered at a zoom factor
+TEXT_ZOOM_FACTOR = None
+
+
+def prefetch_pages(doc, keys: list[tuple[int, t.Optional[float]]]):
+    """Yield the ((page, zoom_factor), text or image) of the given pages. Runs in a separate process."""
+    for key in keys:
+        (page_index, zoom_factor) = key
+        page = doc[page_index]
+        if zoom_factor is TEXT_ZOOM_FACTOR:
+            yield (key, page.get_text())
+        else:
+            yield (key, page.get_image(zoom_factor))
+
+
+class PagePrefetcher:
+    """
+    Keeps the pages around the current page ready in a bounded LRU keyed by (page, zoom_factor).
+    The pages are prepared by a `QueueProcess`, which usually runs in a warm worker that keeps
+    its own copy of the document open, so the document backend is never used concurrently
+    from several threads.
+    """
+
+    def __init__(
+        self,
+        document,
+        distance: int = PAGE_PREFETCH_DISTANCE,
+        cache_size: int = PAGE_PREFETCH_CACHE_SIZE,
+    ):
+        self.document = document
+        self.distance = distance
+        self.cache_size = cache_size
+        # The zoom factor of the last requested page image, if any.
+        # Images are only prefetched while they are being viewed.
+        self.image_zoom_factor = None
+        self.is_closed = False
+        self._cache = OrderedDict()
+        # The running prefetch process, and the keys it has yet to deliver
+        self._process = None
+        self._pending: set[tuple[int, t.Optional[float]]] = set()
+        # Done callbacks may run in the thread that holds the lock
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.document!r}>"
+
+    def _get(self, key):
+        with self._lock:
+            if (value := self._cache.get(key)) is not None:
+                self._cache.move_to_end(key)
+            return value
+
+    def get_text(self, page_index: int) -> t.Optional[str]:
+        """Return the text of the given page if it has been prefetched."""
+        return self._get((page_index, TEXT_ZOOM_FACTOR))
+
+    def get_image(self, page_index: int, zoom_factor: float) -> t.Optional[ImageIO]:
+        """Return the image of the given page if it has been prefetched."""
+        self.image_zoom_factor = zoom_factor
+        return self._get((page_index, zoom_factor))
+
+    def prefetch_around(self, page_index: int):
+        """Prefetch the pages around the given page, cancelling the prefetching of other pages."""
+        page_range = range(
+            max(page_index - self.distance, 0),
+            min(page_index + self.distance + 1, len(self.document)),
+        )
+        # Pages closer to the current page come first
+        wanted_pages = sorted(page_range, key=lambda idx: abs(idx - page_index))
+        zoom_factors = [TEXT_ZOOM_FACTOR]
+        if self.image_zoom_factor is not None:
+            zoom_factors.append(self.image_zoom_factor)
+        wanted_keys = [
+            (idx, zoom_factor) for idx in wanted_pages for zoom_factor in zoom_factors
+        ]
+        with self._lock:
+            if self.is_closed:
+                return
+            missing_keys = [key for key in wanted_keys if key not in self._cache]
+            if self._pending.issuperset(missing_keys):
+                # The running process, if any, already prepares the missing pages
+                return
+            if self._process is not None:
+                self._process.cancel()
+            self._process = process = QueueProcess(
+                target=prefetch_pages,
+                args=(self.document, missing_keys),
+                name="bookworm-page-prefetch",
+            )
+            self._pending = set(missing_keys)
+            future = process.map(partial(self._on_prefetched, process))
+        if future is not None:
+            future.add_done_callback(partial(self._on_process_done, process))
+
+    def _on_prefetched(self, process, item):
+        (key, value) = item
+        with self._lock:
+            if self.is_closed:
+                return
+            if process is self._process:
+                self._pending.discard(key)
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _on_process_done(self, process, future):
+        # Failures of the process itself are logged when they are received
+        with self._lock:
+            if process is self._process:
+                self._process = None
+                self._pending.clear()
+
+    def on_page_changed(self, sender, current, prev):
+        self.prefetch_around(current.index)
+
+    def close(self):
+        with self._lock:
+            self.is_closed = True
+            if self._process is not None:
+                self._process.cancel()
+            self._process = None
+            self._pending.clear()
+            self._cache.clear()
@@ -0,0 +1,137 @@
+# coding: utf-8
+
+"""
+A per-document inverted index used to answer repeated in-book searches
+without re-extracting and scanning the text of every page.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import defaultdict
+
+import regex
+
+from bookworm import typehints as t
+from bookworm.logger import logger
+
+log = logger.getChild(__name__)
+SEARCH_INDEX_CACHE_FIELD = "search_index"
+WORD_TOKEN_PATTERN = regex.compile(r"\w+")
+
+
+def tokenize(text: str) -> t.Iterator[tuple[str, int]]:
+    """Yield (normalized token, start position) pairs for the words in the text."""
+    for match in WORD_TOKEN_PATTERN.finditer(text):
+        yield match[0].lower(), match.start()
+
+
+class DocumentSearchIndex:
+    """
+    Maps each normalized word to the pages and positions where it occurs.
+    Substring lookups go through a map of each three letter sequence (trigram)
+    to the words containing it, which is built on first use.
+    """
+
+    __slots__ = ["postings", "_vocabulary", "_trigrams"]
+
+    def __init__(self, postings: dict[str, dict[int, array]] = None):
+        self.postings = postings if postings is not None else {}
+        self._vocabulary = None
+        self._trigrams = None
+
+    def __len__(self):
+        return len(self.postings)
+
+    def __getstate__(self):
+        return self.postings
+
+    def __setstate__(self, state):
+        self.postings = state
+        self._vocabulary = None
+        self._trigrams = None
+
+    def add_page(self, page_index: int, text: str):
+        self._trigrams = None
+        postings = self.postings
+        for token, pos in tokenize(text):
+            postings.setdefault(token, {}).setdefault(page_index, array("L")).append(
+                pos
+            )
+
+    @classmethod
+    def from_document(cls, document) -> DocumentSearchIndex:
+        index = cls()
+        for page_index in range(len(document)):
+            index.add_page(page_index, document.get_page_content(page_index))
+        return index
+
+    def get_pages_containing_word(self, word: str) -> set[int]:
+        return set(self.postings.get(word.lower(), ()))
+
+    def _get_trigram_index(self) -> tuple[list[str], dict[str, list[int]]]:
+        """Return the vocabulary, and a map of each trigram to the ids of the words containing it."""
+        if self._trigrams is None:
+            vocabulary = list(self.postings)
+            trigrams = defaultdict(list)
+            for (token_id, token) in enumerate(vocabulary):
+                for start in range(len(token) - 2):
+                    token_ids = trigrams[token[start : start + 3]]
+                    # A trigram that occurs more than once in the same word
+                    if (not token_ids) or (token_ids[-1] != token_id):
+                        token_ids.append(token_id)
+            self._vocabulary = vocabulary
+            self._trigrams = dict(trigrams)
+        return self._vocabulary, self._trigrams
+
+    def _get_tokens_containing_long_substring(self, substring: str) -> t.Iterator[str]:
+        vocabulary, trigrams = self._get_trigram_index()
+        # Words containing the substring contain all of its trigrams,
+        # so checking the words that contain the rarest one is enough
+        candidate_ids = min(
+            (
+                trigrams.get(substring[start : start + 3], ())
+                for start in range(len(substring) - 2)
+            ),
+            key=len,
+        )
+        for token_id in candidate_ids:
+            if substring in (token := vocabulary[token_id]):
+                yield token
+
+    def get_pages_containing_substring(self, substring: str) -> set[int]:
+        substring = substring.lower()
+        pages = set()
+        if len(substring) < 3:
+            # Short substrings are contained in a large part of the vocabulary anyway
+            for token, token_pages in self.postings.items():
+                if substring in token:
+                    pages.update(token_pages)
+            return pages
+        postings = self.postings
+        for token in self._get_tokens_containing_long_substring(substring):
+            pages.update(postings[token])
+        return pages
+
+    def get_word_positions(self, word: str, page_index: int) -> t.Sequence[int]:
+        return self.postings.get(word.lower(), {}).get(page_index, ())
+
+    def get_candidate_pages(self, term: str, whole_word: bool) -> t.Optional[set[int]]:
+        """
+        Return the pages that may contain the given term,
+        or None if the index can not narrow down the candidates.
+        """
+        query_tokens = [token for (token, __) in tokenize(term)]
+        if not query_tokens:
+            return
+        lookup = (
+            self.get_pages_containing_word
+            if whole_word
+            else self.get_pages_containing_substring
+        )
+        candidates = lookup(query_tokens[0])
+        for token in query_tokens[1:]:
+            if not candidates:
+                break
+            candidates &= lookup(token)
+        return candidates
@@ -2,9 +2,16 @@
 
 """Serialization/deserialization routines for  documents."""
 
+from __future__ import annotations
+
+from enum import IntEnum
+
+import attr
+import msgpack
+
 from bookworm import typehints as t
-from bookworm.document import Pager, Section, TreeStackBuilder
-from bookworm.structured_text import TextRange
+from bookworm.document import BookMetadata, Pager, Section, TreeStackBuilder
+from bookworm.structured_text import SemanticElementType, Style, TextRange
 
 TocTree = t.NewType("TocTree", Section)
 
@@ -42,3 +49,89 @@ def load_toc_tree(toc_tree_data: list[dict[str, t.Any]]) -> TocTree:
     for sect_data in data:
         stack.push(section_from_dict(sect_data))
     return root
+
+
+def dump_metadata(metadata: BookMetadata) -> dict[str, t.Any]:
+    return attr.asdict(metadata)
+
+
+def load_metadata(metadata_data: dict[str, t.Any]) -> BookMetadata:
+    return BookMetadata(**metadata_data)
+
+
+def dump_element_ranges(
+    element_ranges: dict[IntEnum, list[tuple[int, int]]]
+) -> dict[int, list[tuple[int, int]]]:
+    return {
+        int(element_type): [tuple(text_range) for text_range in ranges]
+        for (element_type, ranges) in element_ranges.items()
+    }
+
+
+def load_element_ranges(
+    element_ranges_data: dict[int, t.Sequence[t.Sequence[int]]],
+    element_enum: type[IntEnum],
+) -> dict[IntEnum, list[tuple[int, int]]]:
+    return {
+        element_enum(element_type): [tuple(text_range) for text_range in ranges]
+        for (element_type, ranges) in element_ranges_data.items()
+    }
+
+
+def pack(data: t.Any) -> bytes:
+    return msgpack.packb(data, use_bin_type=True)
+
+
+def unpack(payload: bytes) -> t.Any:
+    # Ranges are used as dict keys, so arrays are loaded as (hashable) tuples
+    return msgpack.unpackb(payload, use_list=False, strict_map_key=False)
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class StructuredTextData:
+    """The final products of parsing an html document with `StructuredHtmlParser`."""
+
+    text: str
+    semantic_elements: dict[SemanticElementType, list[tuple[int, int]]]
+    styled_elements: dict[Style, list[tuple[int, int]]]
+    link_targets: dict[tuple[int, int], str]
+    anchors: dict[str, tuple[int, int]]
+    html_id_ranges: dict[str, tuple[int, int]]
+    tables: list[str]
+
+    @classmethod
+    def from_parser(cls, parser) -> StructuredTextData:
+        return cls(
+            text=parser.get_text(),
+            semantic_elements=parser.semantic_elements,
+            styled_elements=parser.styled_elements,
+            link_targets=parser.link_targets,
+            anchors=parser.anchors,
+            html_id_ranges=parser.html_id_ranges,
+            tables=parser.get_tables_markup(),
+        )
+
+    def to_dict(self) -> dict[str, t.Any]:
+        return {
+            "text": self.text,
+            "semantic_elements": dump_element_ranges(self.semantic_elements),
+            "styled_elements": dump_element_ranges(self.styled_elements),
+            "link_targets": self.link_targets,
+            "anchors": self.anchors,
+            "html_id_ranges": self.html_id_ranges,
+            "tables": self.tables,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, t.Any]) -> StructuredTextData:
+        return cls(
+            text=data["text"],
+            semantic_elements=load_element_ranges(
+                data["semantic_elements"], SemanticElementType
+            ),
+            styled_elements=load_element_ranges(data["styled_elements"], Style),
+            link_targets=dict(data["link_targets"]),
+            anchors=dict(data["anchors"]),
+            html_id_ranges=dict(data["html_id_ranges"]),
+            tables=list(data["tables"]),
+        )
@@ -0,0 +1,86 @@
+# coding: utf-8
+
+"""
+Publishes large payloads (e.g. the text of a single page document) in shared memory,
+so that only the name of the shared memory block is pickled when they are sent to another process.
+"""
+
+from __future__ import annotations
+
+from multiprocessing.shared_memory import SharedMemory
+
+from bookworm import typehints as t
+from bookworm.logger import logger
+
+log = logger.getChild(__name__)
+
+
+class SharedPayload:
+    """
+    Bytes in a named shared memory block, owned by the process that published them.
+    Other processes attach to the block when they unpickle the payload, and only read from it.
+    """
+
+    __slots__ = ["name", "size", "_shared_memory", "_is_owner", "_text"]
+
+    def __init__(self, shared_memory: SharedMemory, size: int, is_owner: bool):
+        self.name = shared_memory.name
+        self.size = size
+        self._shared_memory = shared_memory
+        self._is_owner = is_owner
+        self._text = None
+
+    def __len__(self):
+        return self.size
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: name={self.name}, size={self.size}>"
+
+    def __getstate__(self):
+        return {"name": self.name, "size": self.size}
+
+    def __setstate__(self, state):
+        self.__init__(
+            SharedMemory(state["name"], create=False), state["size"], is_owner=False
+        )
+
+    @classmethod
+    def publish(cls, data: bytes) -> SharedPayload:
+        # Shared memory blocks can not be empty
+        shared_memory = SharedMemory(create=True, size=max(len(data), 1))
+        shared_memory.buf[: len(data)] = data
+        return cls(shared_memory, len(data), is_owner=True)
+
+    @classmethod
+    def publish_text(cls, text: str) -> SharedPayload:
+        payload = cls.publish(text.encode("utf-8"))
+        payload._text = text
+        return payload
+
+    def get_buffer(self) -> memoryview:
+        """
+        Return a read-only view of the payload.
+        Release the view (e.g. using it as a context manager) before closing the payload.
+        """
+        return self._shared_memory.buf[: self.size].toreadonly()
+
+    def get_text(self) -> str:
+        """Decode the payload as utf-8 text, which is done once per process."""
+        if self._text is None:
+            with self.get_buffer() as buf:
+                self._text = str(buf, "utf-8")
+        return self._text
+
+    def get_worker_cache_key(self) -> t.Hashable:
+        # Warm workers keep the payload attached, along with its decoded text
+        return ("shared-payload", self.name)
+
+    def close(self):
+        """Detach from the shared memory block, and free it if this process published it."""
+        self._text = None
+        try:
+            self._shared_memory.close()
+            if self._is_owner:
+                self._shared_memory.unlink()
+        except (FileNotFoundError, BufferError):
+            log.debug(f"Failed to release {self}", exc_info=True)
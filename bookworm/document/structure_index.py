@@ -0,0 +1,161 @@
+# coding: utf-8
+
+"""
+A per-document index of the semantic elements (headings, links, lists, quotes, tables,
+and figures) of all pages, used to navigate to the next or previous element anywhere in the document.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+from bookworm import typehints as t
+from bookworm.logger import logger
+from bookworm.structured_text import SemanticElementType
+from bookworm.structured_text.structural_elements import HEADING_LEVELS
+
+log = logger.getChild(__name__)
+STRUCTURE_INDEX_CACHE_FIELD = "structure_index"
+# Text positions occupy the low bits of an element key, and the page index the high bits
+PAGE_KEY_SHIFT = 32
+
+
+def make_element_key(page_index: int, pos: int) -> int:
+    """Combine a page index and a position in that page into a key that sorts in reading order."""
+    return (page_index << PAGE_KEY_SHIFT) | pos
+
+
+class ElementTable:
+    """The elements of one type, sorted in reading order, and stored as compact arrays."""
+
+    __slots__ = ["keys", "stops", "types"]
+
+    def __init__(self, keys: array = None, stops: array = None, types: array = None):
+        self.keys = keys if keys is not None else array("q")
+        self.stops = stops if stops is not None else array("q")
+        self.types = types if types is not None else array("B")
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getstate__(self):
+        return {"keys": self.keys, "stops": self.stops, "types": self.types}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    @classmethod
+    def from_elements(
+        cls, elements: t.Iterable[tuple[int, int, int, SemanticElementType]]
+    ) -> ElementTable:
+        """Build the table from (page index, start, stop, element type) tuples."""
+        table = cls()
+        for (page_index, start, stop, element_type) in sorted(elements):
+            table.keys.append(make_element_key(page_index, start))
+            table.stops.append(stop)
+            table.types.append(element_type)
+        return table
+
+    def get_element(self, idx: int) -> tuple[int, tuple[int, int], SemanticElementType]:
+        page_index, start = divmod(self.keys[idx], 1 << PAGE_KEY_SHIFT)
+        return (
+            page_index,
+            (start, self.stops[idx]),
+            SemanticElementType(self.types[idx]),
+        )
+
+    def get_next(self, page_index: int, anchor: int):
+        """Return the first element that starts after the anchor."""
+        idx = bisect_right(self.keys, make_element_key(page_index, anchor))
+        if idx < len(self.keys):
+            return self.get_element(idx)
+
+    def get_prev(self, page_index: int, anchor: int):
+        """Return the last element that starts before the anchor, and does not contain it."""
+        idx = bisect_left(self.keys, make_element_key(page_index, anchor)) - 1
+        page_key = make_element_key(page_index, 0)
+        # Only elements on the anchor's page can contain it
+        while (
+            (idx >= 0) and (self.keys[idx] >= page_key) and (self.stops[idx] >= anchor)
+        ):
+            idx -= 1
+        if idx >= 0:
+            return self.get_element(idx)
+
+
+class DocumentStructureIndex:
+    """Maps each semantic element type to the positions of its elements in the document."""
+
+    __slots__ = ["tables"]
+
+    def __init__(self, tables: dict[int, ElementTable] = None):
+        self.tables = tables if tables is not None else {}
+
+    def __len__(self):
+        return sum(
+            len(table)
+            for (element_type, table) in self.tables.items()
+            if element_type != SemanticElementType.HEADING
+        )
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {len(self)} elements>"
+
+    def __getstate__(self):
+        return {"tables": self.tables}
+
+    def __setstate__(self, state):
+        self.__init__(state["tables"])
+
+    @classmethod
+    def from_semantic_structures(
+        cls,
+        semantic_structures: t.Iterable[
+            tuple[int, dict[SemanticElementType, list[tuple[int, int]]]]
+        ],
+    ) -> DocumentStructureIndex:
+        """Build the index from (page index, semantic structure) pairs."""
+        elements = {}
+        for (page_index, semantic_structure) in semantic_structures:
+            for (element_type, ranges) in semantic_structure.items():
+                element_type = SemanticElementType(element_type)
+                group = elements.setdefault(int(element_type), [])
+                group.extend(
+                    (page_index, start, stop, element_type) for (start, stop) in ranges
+                )
+                if element_type in HEADING_LEVELS:
+                    # Navigating by any heading spans all the heading levels
+                    elements.setdefault(int(SemanticElementType.HEADING), []).extend(
+                        (page_index, start, stop, element_type)
+                        for (start, stop) in ranges
+                    )
+        return cls(
+            {
+                element_type: ElementTable.from_elements(group)
+                for (element_type, group) in elements.items()
+            }
+        )
+
+    @classmethod
+    def from_document(cls, document) -> DocumentStructureIndex:
+        return cls.from_semantic_structures(
+            (page.index, page.semantic_structure) for page in document
+        )
+
+    def get_element(
+        self,
+        element_type: SemanticElementType,
+        forward: bool,
+        page_index: int,
+        anchor: int,
+    ) -> t.Optional[tuple[int, tuple[int, int], SemanticElementType]]:
+        """
+        Return (page index, (start, stop), actual element type) of the nearest element of
+        the given type after or before the anchor, or None if there is no such element.
+        """
+        if (table := self.tables.get(int(element_type))) is None:
+            return
+        if forward:
+            return table.get_next(page_index, anchor)
+        return table.get_prev(page_index, anchor)
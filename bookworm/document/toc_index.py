@@ -0,0 +1,188 @@
+# coding: utf-8
+
+"""
+An index over the table of content of a document, built once per document.
+It answers which section a page or a text position belongs to in O(log n),
+and navigates between sections without scanning the children of their parents.
+"""
+
+from __future__ import annotations
+
+import heapq
+from bisect import bisect_right
+from functools import cached_property
+
+from bookworm import typehints as t
+from bookworm.logger import logger
+
+from .elements import Section
+
+log = logger.getChild(__name__)
+
+
+class IntervalStabbingTable:
+    """
+    Maps a point to the highest priority interval containing it.
+    The intervals are flattened into sorted, non-overlapping segments, each holding
+    the answer for every point inside it, so a lookup is a single binary search.
+    """
+
+    __slots__ = ["boundaries", "answers", "default"]
+
+    def __init__(self, boundaries: list[int], answers: list[int], default: int):
+        self.boundaries = boundaries
+        self.answers = answers
+        self.default = default
+
+    @classmethod
+    def from_intervals(
+        cls, intervals: t.Iterable[tuple[int, int, int]], default: int
+    ) -> IntervalStabbingTable:
+        """Build the table from (first, last, priority) tuples, where last is inclusive."""
+        intervals = sorted(intervals)
+        boundaries = sorted(
+            {first for (first, __, __) in intervals}
+            | {last + 1 for (__, last, __) in intervals}
+        )
+        answers = []
+        # A max-heap of (-priority, last) for the intervals that started so far
+        active = []
+        next_interval = 0
+        for boundary in boundaries:
+            while (next_interval < len(intervals)) and (
+                intervals[next_interval][0] <= boundary
+            ):
+                first, last, priority = intervals[next_interval]
+                heapq.heappush(active, (-priority, last))
+                next_interval += 1
+            while active and (active[0][1] < boundary):
+                heapq.heappop(active)
+            answers.append(-active[0][0] if active else default)
+        return cls(boundaries, answers, default)
+
+    def lookup(self, point: int) -> int:
+        segment = bisect_right(self.boundaries, point) - 1
+        if segment < 0:
+            return self.default
+        return self.answers[segment]
+
+
+class TocIndex:
+    """Provides fast lookups and navigation over the sections of a toc tree."""
+
+    def __init__(self, toc_tree: Section):
+        self.toc_tree = toc_tree
+        # All the sections in pre-order, the root comes first
+        self.sections = sections = [toc_tree]
+        stack = list(reversed(toc_tree.children))
+        while stack:
+            section = stack.pop()
+            sections.append(section)
+            stack.extend(reversed(section.children))
+        self._order = {id(section): order for (order, section) in enumerate(sections)}
+        self._positions_in_parent = {
+            id(child): position
+            for section in sections
+            for (position, child) in enumerate(section.children)
+        }
+        # When several sections contain a page or a position,
+        # the last one in pre-order, which is the most specific one, wins
+        self._pages_table = IntervalStabbingTable.from_intervals(
+            (
+                (section.pager.first, section.pager.last, order)
+                for (order, section) in enumerate(sections)
+                if (order > 0) and (section.pager is not None)
+            ),
+            default=0,
+        )
+        self._positions_table = IntervalStabbingTable.from_intervals(
+            (
+                (section.text_range.start, section.text_range.stop, order)
+                for (order, section) in enumerate(sections)
+                if (order > 0) and (section.text_range is not None)
+            ),
+            default=0,
+        )
+
+    def __len__(self):
+        return len(self.sections)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {len(self)} sections>"
+
+    def get_section_at_page(self, page_index: int) -> Section:
+        """Return the most specific section whose pager contains the given page."""
+        return self.sections[self._pages_table.lookup(page_index)]
+
+    def get_section_at_position(self, pos: int) -> Section:
+        """Return the most specific section whose text range contains the given position."""
+        return self.sections[self._positions_table.lookup(pos)]
+
+    @cached_property
+    def _reading_order_table(self) -> IntervalStabbingTable:
+        starts = [(0, 0)] + [
+            (section.text_range.start, order)
+            for (order, section) in enumerate(self.sections)
+            if (order > 0) and (section.text_range is not None)
+        ]
+        num_sections = len(self.sections)
+        intervals = [
+            # The earliest section in pre-order wins
+            (start, next_start - 1, num_sections - order)
+            for ((start, order), (next_start, __)) in zip(starts, starts[1:])
+        ]
+        last_start, last_order = starts[-1]
+        intervals.append((last_start, float("inf"), num_sections - last_order))
+        return IntervalStabbingTable.from_intervals(intervals, default=num_sections)
+
+    def get_section_by_start_position(self, pos: int) -> Section:
+        """
+        Return the section at the given position, considering that each section
+        extends up to the start of the section that follows it in the table of content.
+        """
+        return self.sections[len(self.sections) - self._reading_order_table.lookup(pos)]
+
+    def get_order(self, section: Section) -> int:
+        """Return the pre-order position of the given section."""
+        return self._order[id(section)]
+
+    def next_sibling(self, section: Section) -> t.Optional[Section]:
+        if section.is_root:
+            return
+        next_position = self._positions_in_parent[id(section)] + 1
+        if next_position < len(section.parent):
+            return section.parent[next_position]
+
+    def prev_sibling(self, section: Section) -> t.Optional[Section]:
+        if section.is_root:
+            return
+        prev_position = self._positions_in_parent[id(section)] - 1
+        if prev_position >= 0:
+            return section.parent[prev_position]
+
+    def simple_next(self, section: Section) -> t.Optional[Section]:
+        """The same as `Section.simple_next`."""
+        while section is not None:
+            if (next_sibling := self.next_sibling(section)) is not None:
+                return next_sibling
+            section = section.parent
+
+    def simple_prev(self, section: Section) -> t.Optional[Section]:
+        """The same as `Section.simple_prev`."""
+        if (prev_sibling := self.prev_sibling(section)) is not None:
+            return prev_sibling
+        elif section.parent:
+            return section.parent
+        return section
+
+    def next_in_order(self, section: Section) -> t.Optional[Section]:
+        """Return the section that follows the given section in reading order."""
+        order = self.get_order(section) + 1
+        if order < len(self.sections):
+            return self.sections[order]
+
+    def prev_in_order(self, section: Section) -> t.Optional[Section]:
+        """Return the section that precedes the given section in reading order."""
+        order = self.get_order(section) - 1
+        if order >= 0:
+            return self.sections[order]
@@ -10,6 +10,7 @@ from yarl import URL
 from bookworm import typehints as t
 from bookworm.document.base import BaseDocument
 from bookworm.document.exceptions import UnsupportedDocumentFormatError
+from bookworm.document.formats import get_format_given_extension
 from bookworm.logger import logger
 
 log = logger.getChild(__name__)
@@ -132,6 +133,8 @@ class DocumentUri:
 
     @classmethod
     def _get_format_given_extension(cls, ext):
+        if doc_format := get_format_given_extension(ext):
+            return doc_format
         for (doc_format, doc_cls) in BaseDocument.document_classes.items():
             if (doc_cls.extensions is not None) and (ext in doc_cls.extensions):
                 return doc_format
@@ -10,7 +10,6 @@ import requests
 import wx
 
 from bookworm import local_server
-from bookworm.document.formats import EpubDocument
 from bookworm.gui.components import AsyncSnakDialog
 from bookworm.logger import logger
 from bookworm.service import BookwormService
@@ -47,7 +46,7 @@ class EpubServeService(BookwormService):
 
     def _on_reader_loaded(self, sender):
         self.view.documentMenu.Enable(
-            self.openOnWebReaderId, isinstance(sender.document, EpubDocument)
+            self.openOnWebReaderId, sender.document.format == "epub"
         )
 
     def onOpenonWeb(self, event):
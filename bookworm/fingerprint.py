@@ -0,0 +1,116 @@
+# coding: utf-8
+
+"""
+Content fingerprints of files.
+Files are hashed in large chunks through a memory map, and the resulting hashes are memoized
+in memory and on disk by the (path, size, mtime) of the file, so a file is only hashed again
+when it changes. Hashing releases the GIL, so many files can be hashed concurrently in threads.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from diskcache import Cache
+
+from bookworm import typehints as t
+from bookworm.concurrency import threaded_worker
+from bookworm.logger import logger
+from bookworm.paths import home_data_path
+
+log = logger.getChild(__name__)
+DEFAULT_HASH_ALGORITHM = "sha1"
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+# Memoized fingerprints are evicted from memory beyond this count
+FINGERPRINT_MEMORY_SIZE = 4096
+_fingerprint_memo = OrderedDict()
+_fingerprint_memo_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_fingerprint_store() -> Cache:
+    """Return the process-wide disk cache used to memoize file fingerprints."""
+    return Cache(os.fspath(home_data_path(".file_fingerprints")))
+
+
+def hash_file(filepath: t.PathLike, algorithm: str = DEFAULT_HASH_ALGORITHM) -> str:
+    """Return the hex digest of the contents of the given file, without memoization."""
+    hasher = hashlib.new(algorithm)
+    with open(filepath, "rb") as file:
+        try:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can not be memory mapped
+            return hasher.hexdigest()
+        except OSError:
+            # Not a regular file, read it in chunks instead
+            while chunk := file.read(HASH_CHUNK_SIZE):
+                hasher.update(chunk)
+            return hasher.hexdigest()
+        with buffer, memoryview(buffer) as view:
+            for offset in range(0, len(view), HASH_CHUNK_SIZE):
+                hasher.update(view[offset : offset + HASH_CHUNK_SIZE])
+    return hasher.hexdigest()
+
+
+def get_file_fingerprint(
+    filepath: t.PathLike, algorithm: str = DEFAULT_HASH_ALGORITHM
+) -> str:
+    """
+    Return the hash of the contents of the given file.
+    The hash is memoized by the file's (path, size, mtime).
+    """
+    filepath = os.fspath(filepath)
+    stat_result = os.stat(filepath)
+    memo_key = (
+        algorithm,
+        filepath,
+        stat_result.st_size,
+        stat_result.st_mtime_ns,
+    )
+    with _fingerprint_memo_lock:
+        if (fingerprint := _fingerprint_memo.get(memo_key)) is not None:
+            _fingerprint_memo.move_to_end(memo_key)
+            return fingerprint
+    store = get_fingerprint_store()
+    if (fingerprint := store.get(memo_key)) is None:
+        fingerprint = hash_file(filepath, algorithm)
+        store.set(memo_key, fingerprint)
+    with _fingerprint_memo_lock:
+        _fingerprint_memo[memo_key] = fingerprint
+        while len(_fingerprint_memo) > FINGERPRINT_MEMORY_SIZE:
+            _fingerprint_memo.popitem(last=False)
+    return fingerprint
+
+
+def get_file_fingerprint_async(
+    filepath: t.PathLike, algorithm: str = DEFAULT_HASH_ALGORITHM
+) -> "Future[str]":
+    """Compute the fingerprint of the given file in the background thread pool."""
+    return threaded_worker.submit(get_file_fingerprint, filepath, algorithm)
+
+
+def get_files_fingerprints(
+    filepaths: t.Iterable[t.PathLike], algorithm: str = DEFAULT_HASH_ALGORITHM
+) -> dict[str, t.Optional[str]]:
+    """
+    Compute the fingerprints of the given files concurrently using the background thread pool.
+    Files that could not be read are mapped to None.
+    """
+    futures = {
+        os.fspath(filepath): get_file_fingerprint_async(filepath, algorithm)
+        for filepath in filepaths
+    }
+    fingerprints = {}
+    for (filepath, future) in futures.items():
+        try:
+            fingerprints[filepath] = future.result()
+        except OSError:
+            log.exception(f"Failed to fingerprint file {filepath}", exc_info=True)
+            fingerprints[filepath] = None
+    return fingerprints
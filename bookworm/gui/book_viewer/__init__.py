@@ -12,7 +12,7 @@ import wx
 
 from bookworm import app, config, speech
 from bookworm import typehints as t
-from bookworm.concurrency import CancellationToken, threaded_worker
+from bookworm.concurrency import CancellationToken
 from bookworm.document import (ArchiveContainsMultipleDocuments,
                                ArchiveContainsNoDocumentsError,
                                DocumentRestrictedError, DummyDocument)
@@ -564,7 +564,7 @@ class BookViewerWindow(wx.Frame, MenubarProvider, StateProvider):
         event.Skip(True)
         if not self.reader.ready:
             return
-        threaded_worker.submit(self._after_caret_moved)
+        self._after_caret_moved()
         if (
             config.conf["general"]["use_continuous_reading"]
             and event.Position == self.contentTextCtrl.GetLastPosition()
@@ -575,6 +575,7 @@ class BookViewerWindow(wx.Frame, MenubarProvider, StateProvider):
             self._last_page_turn_time = time.monotonic()
 
     def _after_caret_moved(self):
+        # Only records the position in memory, the position store does the I/O
         try:
             self.reader.save_current_position()
         except:
@@ -611,7 +612,7 @@ class BookViewerWindow(wx.Frame, MenubarProvider, StateProvider):
             self.contentTextCtrl.SetFocus()
 
     def set_state_on_page_change(self, page):
-        self.set_content(page.get_text())
+        self.set_content(self.reader.document.get_page_content(page.index))
         if config.conf["general"]["play_pagination_sound"]:
             sounds.pagination.play()
         status_text = self.get_statusbar_text()
@@ -21,6 +21,7 @@ from bookworm.concurrency import call_threaded, process_worker
 from bookworm.document import READING_MODE_LABELS
 from bookworm.document import DocumentCapability as DC
 from bookworm.document import DocumentInfo, PaginationError
+from bookworm.document.operations import strip_export_file_extension
 from bookworm.document.uri import DocumentUri
 from bookworm.gui.book_viewer.core_dialogs import (DocumentInfoDialog,
                                                    ElementListDialog,
@@ -242,19 +243,33 @@ class FileMenu(BaseMenu):
 
     def onExportAsPlainText(self, event):
         book_title = slugify(self.reader.current_book.title)
-        filename, _nope = wx.FileSelectorEx(
+        export_file_types = [
+            # Translators: a name of a file format
+            (_("Plain Text"), ".txt"),
+            # Translators: a name of a file format
+            (_("JSON Lines (text with page information)"), ".jsonl"),
+            # Translators: a name of a file format
+            (_("Compressed Plain Text"), ".txt.gz"),
+        ]
+        filename, filter_index = wx.FileSelectorEx(
             # Translators: the title of a dialog to save the exported book
             _("Save As"),
             default_path=wx.GetUserHome(),
             default_filename=f"{book_title}.txt",
-            # Translators: a name of a file format
-            wildcard=_("Plain Text") + " (*.txt)|.txt",
+            wildcard="|".join(
+                f"{label} (*{ext})|*{ext}" for (label, ext) in export_file_types
+            ),
             flags=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT,
             parent=self.view,
         )
         if not filename.strip():
             return
-        if self.reader.document.is_single_page_document():
+        __, file_extension = export_file_types[filter_index]
+        # The selected file type replaces the extension of any other export format
+        filename = strip_export_file_extension(filename) + file_extension
+        if self.reader.document.is_single_page_document() and (
+            file_extension == ".txt"
+        ):
             with open(filename, "w", encoding="utf-8") as file:
                 file.write(self.reader.document.get_content())
             return
@@ -967,9 +982,9 @@ class MenubarProvider:
         rv = []
         all_exts = []
         visible_doc_cls = [
-            doc_cls
-            for doc_cls in EBookReader.get_document_format_info().values()
-            if not doc_cls.__internal__
+            format_info
+            for format_info in EBookReader.get_document_format_info().values()
+            if not format_info.internal
         ]
         for cls in visible_doc_cls:
             exts = ";".join(cls.extensions)
@@ -122,3 +122,8 @@ class ViewPageAsImageDialog(wx.Dialog):
     def Close(self, *args, **kwargs):
         super().Close(*args, **kwargs)
         reader_page_changed.disconnect(self.onPageChange, sender=self.reader)
+        if (
+            prefetcher := getattr(self.reader.document, "page_prefetcher", None)
+        ) is not None:
+            # Stop rendering page images that are no longer viewed
+            prefetcher.image_zoom_factor = None
@@ -6,7 +6,6 @@ import io
 import tempfile
 from dataclasses import dataclass
 
-import fitz
 import wx
 from lazy_import import lazy_module
 from PIL import Image, ImageOps
@@ -14,11 +13,14 @@ from PIL import Image, ImageOps
 from bookworm import typehints as t
 from bookworm.logger import logger
 
+fitz = lazy_module("fitz")
 np = lazy_module("numpy")
 cv2 = lazy_module("cv2")
 
 
 log = logger.getChild(__name__)
+# The number of bytes per pixel of the supported colour modes
+MODE_CHANNELS = {"L": 1, "RGB": 3, "RGBA": 4}
 
 
 @dataclass
@@ -26,9 +28,11 @@ class ImageIO:
     """
     Represents an image which can be loaded/exported efficiently from and to
     several in-memory representations including PIL, cv2, and plain numpy arrays.
+    The pixels are held in a single buffer (bytes, or a numpy array) in the colour mode of the image,
+    which is converted to another mode only when a consumer needs it.
     """
 
-    data: bytes
+    data: t.Any
     width: int
     height: int
     mode: str = "RGB"
@@ -36,22 +40,47 @@ class ImageIO:
     def __repr__(self):
         return f"<ImageIO: width={self.width}, height={self.height}, mode={self.mode}>"
 
-    def __array__(self):
+    def __array__(self, dtype=None, copy=None):
         return self.to_cv2()
 
     @property
     def size(self):
         return (self.width, self.height)
 
+    @property
+    def nbytes(self) -> int:
+        return memoryview(self.data).nbytes
+
+    def tobytes(self) -> bytes:
+        if isinstance(self.data, bytes):
+            return self.data
+        return memoryview(self.data).tobytes()
+
+    def to_array(self):
+        """Return a read-only numpy view of the pixels, without copying them."""
+        shape = (self.height, self.width)
+        if (channels := MODE_CHANNELS[self.mode]) > 1:
+            shape += (channels,)
+        return np.frombuffer(self.data, dtype=np.uint8).reshape(shape)
+
     def as_rgba(self):
         if self.mode == "RGBA":
             return self
-        return self.from_pil(self.to_pil().convert("RGBA"))
+        pixels = self.to_array()
+        rgba = np.empty((self.height, self.width, 4), dtype=np.uint8)
+        rgba[..., :3] = pixels if self.mode == "RGB" else pixels[..., np.newaxis]
+        rgba[..., 3] = 255
+        return self.from_array(rgba, mode="RGBA")
 
     def as_rgb(self):
         if self.mode == "RGB":
             return self
-        return self.from_pil(self.to_pil().convert("RGB"))
+        pixels = self.to_array()
+        if self.mode == "RGBA":
+            return self.from_array(np.ascontiguousarray(pixels[..., :3]), mode="RGB")
+        rgb = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        rgb[...] = pixels[..., np.newaxis]
+        return self.from_array(rgb, mode="RGB")
 
     def invert(self):
         return self.from_cv2(cv2.bitwise_not(self.to_cv2()))
@@ -66,8 +95,20 @@ class ImageIO:
                 f"Failed to load image from file '{image_path}'", exc_info=True
             )
 
+    @classmethod
+    def from_array(cls, array, mode: str = None) -> "ImageBlueprint":
+        """Wrap the given array of 8-bit pixels, copying it only if it is not contiguous."""
+        array = np.ascontiguousarray(array, dtype=np.uint8)
+        if mode is None:
+            channels = 1 if array.ndim == 2 else array.shape[2]
+            mode = {1: "L", 3: "RGB", 4: "RGBA"}[channels]
+        return cls(data=array, width=array.shape[1], height=array.shape[0], mode=mode)
+
     @classmethod
     def from_pil(cls, image: Image.Image) -> "ImageBlueprint":
+        if image.mode not in MODE_CHANNELS:
+            has_alpha = ("A" in image.mode) or ("transparency" in image.info)
+            image = image.convert("RGBA" if has_alpha else "RGB")
         return cls(
             data=image.tobytes(),
             width=image.width,
@@ -77,9 +118,16 @@ class ImageIO:
 
     @classmethod
     def from_cv2(cls, cv2_image):
-        rgb_image = cv2.cvtColor(cv2_image, cv2.COLOR_GRAY2RGB)
-        pil_image = Image.fromarray(np.asarray(rgb_image, dtype=np.uint8), mode="RGB")
-        return cls.from_pil(pil_image)
+        """
+        Wrap a grayscale cv2 image, without copying it.
+        Colour images follow the cv2 channel order (BGR or BGRA), so they are converted to RGB(A).
+        """
+        if cv2_image.ndim == 3:
+            conversion = (
+                cv2.COLOR_BGRA2RGBA if cv2_image.shape[2] == 4 else cv2.COLOR_BGR2RGB
+            )
+            cv2_image = cv2.cvtColor(cv2_image, conversion)
+        return cls.from_array(cv2_image)
 
     @classmethod
     def from_wx_bitmap(cls, wx_bitmap):
@@ -129,27 +177,33 @@ class ImageIO:
 
     @classmethod
     def from_fitz_pixmap(cls, pixmap):
+        mode = {1: "L", 3: "RGB", 4: "RGBA"}[pixmap.n]
         return cls(
-            data=pixmap.samples, width=pixmap.width, height=pixmap.height, mode="RGB"
+            data=pixmap.samples, width=pixmap.width, height=pixmap.height, mode=mode
         )
 
     def to_pil(self) -> Image.Image:
-        return Image.frombytes("RGB", self.size, self.data)
+        # PIL shares the buffer, instead of copying it, for the L and RGBA modes
+        return Image.frombuffer(self.mode, self.size, self.data, "raw", self.mode, 0, 1)
 
     def to_cv2(self):
-        pil_image = self.to_pil().convert("RGB")
-        return cv2.cvtColor(np.array(pil_image, dtype=np.uint8), cv2.COLOR_RGB2GRAY)
+        """Return the grayscale image used for OCR, without copying it if it is already grayscale."""
+        if self.mode == "L":
+            return self.to_array()
+        conversion = cv2.COLOR_RGBA2GRAY if self.mode == "RGBA" else cv2.COLOR_RGB2GRAY
+        return cv2.cvtColor(self.to_array(), conversion)
 
     def to_wx_bitmap(self):
+        if self.mode == "RGBA":
+            return wx.Bitmap.FromBufferRGBA(self.width, self.height, self.data)
         img = self.as_rgb()
-        return wx.ImageFromBuffer(
-            img.width, img.height, bytearray(img.data)
-        ).ConvertToBitmap()
+        return wx.Bitmap.FromBuffer(img.width, img.height, img.data)
 
     def to_fitz_pixmap(self):
-        buf = io.BytesIO()
-        self.to_pil().save(buf, format="png")
-        return fitz.Pixmap(buf)
+        colorspace = fitz.csGRAY if self.mode == "L" else fitz.csRGB
+        return fitz.Pixmap(
+            colorspace, self.width, self.height, self.tobytes(), self.mode == "RGBA"
+        )
 
     def as_bytes(self, *, format="JPEG"):
         buf = io.BytesIO()
@@ -13,7 +13,7 @@ import wx
 from PIL import Image
 
 from bookworm import app, config, speech
-from bookworm.concurrency import QueueProcess, call_threaded, threaded_worker
+from bookworm.concurrency import call_threaded, threaded_worker
 from bookworm.document import SINGLE_PAGE_DOCUMENT_PAGER, BookMetadata
 from bookworm.document import DocumentCapability as DC
 from bookworm.document import (DocumentUri, Section, SinglePageDocument,
@@ -245,6 +245,11 @@ class OCRMenu(wx.Menu):
 
     def _run_ocr(self, ocr_request, callback):
         ocr_started.send(sender=self.view)
+        cached_result = self.service.current_ocr_engine.get_cached_result(ocr_request)
+        if cached_result is not None:
+            # This image was recognized before, so there is nothing to wait for
+            self._complete_ocr(callback, cached_result)
+            return
         # Show a modal dialog
         sounds.ocr_start.play()
         future_callback = functools.partial(self._process_ocr_result, callback)
@@ -308,26 +313,30 @@ class OCRMenu(wx.Menu):
     def _continue_with_text_extraction(self, ocr_opts, output_file, progress_dlg):
         doc = self.service.reader.document
         total = len(doc)
-        args = (doc, output_file, ocr_opts)
-        scan2text_process = QueueProcess(
-            target=self.service.current_ocr_engine.scan_to_text, args=args
-        )
-        progress_dlg.set_abort_callback(scan2text_process.cancel)
-        scan2text_process.add_done_callback(
-            wx.CallAfter,
-            wx.MessageBox,
-            _(
-                "Successfully processed {total} pages.\nExtracted text was written to: {file}"
-            ).format(total=total, file=output_file),
-            _("OCR Completed"),
-            wx.ICON_INFORMATION,
+        # The engine spreads the pages over its own pool of worker processes
+        scanned_pages = self.service.current_ocr_engine.scan_to_text(
+            doc, output_file, ocr_opts
         )
-        for progress in scan2text_process:
-            progress_dlg.Update(
-                progress + 1,
-                f"Scanning page {progress} of {total}",
-            )
-        progress_dlg.Dismiss()
+        try:
+            for progress in scanned_pages:
+                if progress_dlg.WasCancelled():
+                    break
+                progress_dlg.Update(
+                    progress + 1,
+                    f"Scanning page {progress} of {total}",
+                )
+            else:
+                wx.CallAfter(
+                    wx.MessageBox,
+                    _(
+                        "Successfully processed {total} pages.\nExtracted text was written to: {file}"
+                    ).format(total=total, file=output_file),
+                    _("OCR Completed"),
+                    wx.ICON_INFORMATION,
+                )
+        finally:
+            scanned_pages.close()
+            progress_dlg.Dismiss()
         wx.CallAfter(self.view.contentTextCtrl.SetFocus)
 
     def onChangeOCROptions(self, event):
@@ -413,6 +422,9 @@ class OCRMenu(wx.Menu):
             log.exception(f"Error getting OCR recognition results.", exc_info=True)
             ocr_ended.send(sender=self.view, isfaulted=True)
             return
+        self._complete_ocr(callback, ocr_result)
+
+    def _complete_ocr(self, callback, ocr_result):
         callback(ocr_result)
         sounds.ocr_end.play()
         speech.announce(_("Scan finished."), urgent=True)
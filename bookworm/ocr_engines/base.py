@@ -2,14 +2,14 @@
 
 from __future__ import annotations
 
+import os
 from abc import ABCMeta, abstractmethod
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from contextlib import suppress
 from dataclasses import dataclass, field
-from io import StringIO
-from operator import attrgetter
+from functools import cached_property
 
-from more_itertools import first_true
+from more_itertools import chunked, first_true, peekable
 
 from bookworm import app
 from bookworm import typehints as t
@@ -18,9 +18,20 @@ from bookworm.image_io import ImageIO
 from bookworm.logger import logger
 from bookworm.utils import NEWLINE
 
-from .image_processing_pipelines import ImageProcessingPipeline
+from .image_processing_pipelines import (
+    ImageProcessingPipeline,
+    run_image_processing_pipelines,
+)
+from .result_cache import get_ocr_cache_key, get_ocr_result_cache_store, hash_image
+from .scan_journal import ScanJournal
 
 log = logger.getChild(__name__)
+# The number of pages each worker process of a scan recognizes at once
+SCAN_BATCH_SIZE = 4
+# The number of batches each worker process may recognize ahead of the page being written
+SCAN_BATCHES_AHEAD_PER_WORKER = 2
+# The engine and document of the current scan, in a scan worker process
+_scan_worker_context = {}
 
 
 @dataclass
@@ -43,6 +54,11 @@ class OcrRequest:
         """Returns the primary language."""
         return self.languages[0]
 
+    @cached_property
+    def image_digest(self) -> str:
+        """A hash of the image, which keys the cached results of this request."""
+        return hash_image(self.image)
+
 
 @dataclass
 class OcrResult:
@@ -74,71 +90,183 @@ class BaseOcrEngine(metaclass=ABCMeta):
     def get_recognition_languages(cls) -> t.List[LocaleInfo]:
         """Return a list of all the languages supported by this engine."""
 
+    @classmethod
+    def get_engine_version(cls) -> str:
+        """The version of this engine. Results cached by other versions are not reused."""
+        return ""
+
+    @classmethod
+    def get_cached_result(cls, ocr_request: OcrRequest) -> t.Optional[OcrResult]:
+        """Return the result of recognizing the same image with the same options, if cached."""
+        if (cache_key := get_ocr_cache_key(cls, ocr_request)) is None:
+            return
+        try:
+            recognized_text = get_ocr_result_cache_store().get(cache_key)
+        except Exception:
+            log.exception("Failed to read from the OCR result cache", exc_info=True)
+            return
+        if recognized_text is not None:
+            return OcrResult(recognized_text=recognized_text, ocr_request=ocr_request)
+
+    @classmethod
+    def cache_result(cls, ocr_result: OcrResult):
+        if (cache_key := get_ocr_cache_key(cls, ocr_result.ocr_request)) is None:
+            return
+        try:
+            get_ocr_result_cache_store().set(cache_key, ocr_result.recognized_text)
+        except Exception:
+            log.exception("Failed to store in the OCR result cache", exc_info=True)
+
     @classmethod
     def preprocess_and_recognize(cls, ocr_request: OcrRequest) -> OcrResult:
-        images = cls.preprocess_image(ocr_request)
-        text = []
-        for image in images:
-            ocr_req = OcrRequest(
-                image=image,
-                languages=ocr_request.languages,
+        return cls.preprocess_and_recognize_many([ocr_request])[0]
+
+    @classmethod
+    def preprocess_and_recognize_many(
+        cls, ocr_requests: t.Sequence[OcrRequest]
+    ) -> list[OcrResult]:
+        """
+        Preprocess and recognize the images of the given requests, which are not cached,
+        in a single call to `recognize_many`.
+        """
+        results = [cls.get_cached_result(ocr_request) for ocr_request in ocr_requests]
+        uncached_requests = [
+            (ocr_request, tuple(cls.preprocess_image(ocr_request)))
+            for (ocr_request, result) in zip(ocr_requests, results)
+            if result is None
+        ]
+        recognized = iter(
+            cls.recognize_many(
+                [
+                    OcrRequest(image=image, languages=ocr_request.languages)
+                    for (ocr_request, images) in uncached_requests
+                    for image in images
+                ]
             )
-            recog_result = cls.recognize(ocr_req)
-            text.append(recog_result.recognized_text)
-        return OcrResult(recognized_text="\n".join(text), ocr_request=ocr_request)
+        )
+        uncached_results = []
+        for (ocr_request, images) in uncached_requests:
+            text = [next(recognized).recognized_text for image in images]
+            ocr_result = OcrResult(
+                recognized_text="\n".join(text), ocr_request=ocr_request
+            )
+            cls.cache_result(ocr_result)
+            uncached_results.append(ocr_result)
+        uncached_results = iter(uncached_results)
+        return [result or next(uncached_results) for result in results]
 
     @classmethod
     def preprocess_image(
         cls,
         ocr_request: OcrRequest,
     ) -> t.Iterable[ImageIO]:
-        images = (ocr_request.image,)
-        sorted_ipp = sorted(
-            list(ocr_request.image_processing_pipelines),
-            key=attrgetter("run_order"),
+        return run_image_processing_pipelines(
+            ocr_request.image_processing_pipelines, (ocr_request.image,), ocr_request
         )
-        for pipeline_cls in sorted_ipp:
-            pipeline = pipeline_cls(images, ocr_request)
-            if pipeline.should_process():
-                images = pipeline.process()
-        return images
 
     @classmethod
     @abstractmethod
     def recognize(cls, ocr_request: OcrRequest) -> OcrResult:
         """Perform the given ocr request and return the result."""
 
+    @classmethod
+    def recognize_many(cls, ocr_requests: t.Sequence[OcrRequest]) -> list[OcrResult]:
+        """
+        Perform the given ocr requests and return their results, in the same order.
+        Engines that recognize several images at once faster than one by one override this.
+        """
+        return [cls.recognize(ocr_request) for ocr_request in ocr_requests]
+
     @classmethod
     def scan_to_text(
         cls,
         doc: "BaseDocument",
         output_file: t.PathLike,
         ocr_options: "OcrOptions",
+        num_workers: t.Optional[int] = None,
     ):
+        """
+        Recognize the pages of the document in a pool of worker processes, and write their text
+        to the output file in page order, yielding the index of each page once it is written.
+        Recognized pages are recorded in a journal next to the output file, so that an
+        interrupted scan resumes from the pages that were not recognized yet.
+        """
         if not cls.check():
             raise RuntimeError(f"OCR Engine {cls} is not available.")
         total = len(doc)
-        out = StringIO()
-
-        def recognize_page(page):
-            image = page.get_image(ocr_options.zoom_factor)
-            ocr_req = OcrRequest(
-                languages=ocr_options.languages, image=image, cookie=page.number
-            )
-            return cls.preprocess_and_recognize(ocr_req)
-
+        journal = ScanJournal.for_output_file(
+            output_file, cls._get_scan_info(doc, ocr_options)
+        )
+        recognized_pages = journal.load()
+        if recognized_pages:
+            log.info(f"Resuming the scan of {doc.uri} from its journal.")
+        pending_pages = [idx for idx in range(total) if idx not in recognized_pages]
+        num_workers = min(num_workers or os.cpu_count() or 1, max(total, 1))
+        # Smaller batches keep all of the workers busy on short documents
+        batch_size = max(1, min(SCAN_BATCH_SIZE, len(pending_pages) // num_workers))
+        pending = peekable(chunked(pending_pages, batch_size))
+        # Pages recognized ahead of the page being written wait in memory until it is written,
+        # so no pages are submitted beyond this distance from it
+        max_pages_ahead = num_workers * SCAN_BATCHES_AHEAD_PER_WORKER * batch_size
+        pool = ProcessPoolExecutor(
+            num_workers,
+            initializer=_init_scan_worker,
+            initargs=(cls, doc),
+        )
+        running = {}
+        next_page = 0
         try:
-            with ThreadPoolExecutor(4) as pool:
-                for (idx, res) in enumerate(pool.map(recognize_page, doc)):
-                    out.write(
-                        f"Page {res.cookie}{NEWLINE}{res.recognized_text}{NEWLINE}\f{NEWLINE}"
-                    )
-                    yield idx
             with open(output_file, "w", encoding="utf8") as file:
-                file.write(out.getvalue())
+                while next_page < total:
+                    while len(running) < (num_workers * SCAN_BATCHES_AHEAD_PER_WORKER):
+                        page_indexes = pending.peek(None)
+                        if (page_indexes is None) or (
+                            page_indexes[0] >= next_page + max_pages_ahead
+                        ):
+                            break
+                        next(pending)
+                        future = pool.submit(
+                            _recognize_pages,
+                            page_indexes,
+                            ocr_options.languages,
+                            ocr_options.zoom_factor,
+                        )
+                        running[future] = page_indexes
+                    if next_page not in recognized_pages:
+                        done, __ = wait(running, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            page_indexes = running.pop(future)
+                            texts = future.result()
+                            for (page_index, text) in zip(page_indexes, texts):
+                                recognized_pages[page_index] = text
+                                journal.record(page_index, text)
+                    while next_page in recognized_pages:
+                        text = recognized_pages.pop(next_page)
+                        file.write(
+                            f"Page {next_page + 1}{NEWLINE}{text}{NEWLINE}\f{NEWLINE}"
+                        )
+                        file.flush()
+                        yield next_page
+                        next_page += 1
+            journal.remove()
         finally:
-            out.close()
-            doc.close()
+            pool.shutdown(wait=True, cancel_futures=True)
+            journal.close()
+
+    @classmethod
+    def _get_scan_info(cls, doc: "BaseDocument", ocr_options: "OcrOptions") -> dict:
+        """Identifies a scan, so that only the journal of the same scan is resumed."""
+        try:
+            modified_at = os.stat(doc.uri.path).st_mtime_ns
+        except (OSError, ValueError):
+            modified_at = None
+        return {
+            "document": doc.uri.to_uri_string(),
+            "modified_at": modified_at,
+            "engine": cls.name,
+            "languages": [lang.identifier for lang in ocr_options.languages],
+            "zoom_factor": ocr_options.zoom_factor,
+        }
 
     @classmethod
     def get_sorted_languages(cls):
@@ -152,3 +280,29 @@ class BaseOcrEngine(metaclass=ABCMeta):
             langs.remove(current_lang)
             langs.insert(0, current_lang)
         return langs
+
+
+def _init_scan_worker(engine_cls: t.Type[BaseOcrEngine], doc: "BaseDocument"):
+    """Open the document once in each worker process of a scan."""
+    # Engines locate their executables and data when checked
+    engine_cls.check()
+    _scan_worker_context.update(engine_cls=engine_cls, document=doc)
+
+
+def _recognize_pages(
+    page_indexes: list[int], languages: list[LocaleInfo], zoom_factor: float
+) -> list[str]:
+    engine_cls = _scan_worker_context["engine_cls"]
+    document = _scan_worker_context["document"]
+    ocr_requests = [
+        OcrRequest(
+            languages=languages,
+            image=document[page_index].get_image(zoom_factor),
+            cookie=page_index,
+        )
+        for page_index in page_indexes
+    ]
+    return [
+        ocr_result.recognized_text
+        for ocr_result in engine_cls.preprocess_and_recognize_many(ocr_requests)
+    ]
@@ -6,6 +6,9 @@ import re
 import cv2
 import numpy as np
 
+# Images skewed by less than this number of degrees are not rotated
+MIN_SKEW_ANGLE = 0.1
+
 
 # function to resize the image without distortion i.e resizing with ratios
 def image_resize(image: np.ndarray, width=None, height=None, inter=cv2.INTER_CUBIC):
@@ -215,8 +218,12 @@ def correct_skew(image):
     # find median of the angles
     median_angle = get_median_angle(otsu)
 
-    # rotating the image
-    rotated_image = rotate(image, corrected_angle(median_angle), (255, 255, 255))
+    # rotating the image, unless it is not skewed
+    skew_angle = corrected_angle(median_angle)
+    if abs(skew_angle) < MIN_SKEW_ANGLE:
+        rotated_image = image
+    else:
+        rotated_image = rotate(image, skew_angle, (255, 255, 255))
     # after rotating the image using above function, the image is rotated
     # such that the text is alligned along any one of the 4 axes i.e 0, 90, 180 or 270
     # so we are going to use tesseract's image_to_osd function to set it right
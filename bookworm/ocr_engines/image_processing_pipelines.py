@@ -5,9 +5,10 @@ from __future__ import annotations
 from abc import ABCMeta, abstractmethod
 from dataclasses import dataclass, field
 from io import BytesIO
+from operator import attrgetter
 
 from lazy_import import lazy_module
-from PIL import Image, ImageEnhance, ImageOps
+from PIL import Image, ImageEnhance
 
 from bookworm import typehints as t
 from bookworm.image_io import ImageIO
@@ -42,6 +43,82 @@ class ImageProcessingPipeline(metaclass=ABCMeta):
         yield from (self.process_image(img) for img in self.images)
 
 
+class ArrayProcessingPipeline(ImageProcessingPipeline):
+    """
+    Processes the grayscale array of each image.
+    Consecutive array pipelines are fused, see `FusedImageProcessingPipeline`.
+    """
+
+    @abstractmethod
+    def process_array(self, array, out=None):
+        """
+        Process the given grayscale array. Write the result to `out`, if it is given and the result
+        has the same shape, or return a new array. Return the given array itself if processing it
+        would not change it.
+        """
+
+    def process_image(self, image) -> ImageIO:
+        return ImageIO.from_cv2(self.process_array(image.to_cv2()))
+
+
+@dataclass
+class FusedImageProcessingPipeline(ImageProcessingPipeline):
+    """
+    Runs several array pipelines in one pass over each image. The image is converted to grayscale
+    once, and the stages write to two buffers in turn, rather than allocating one array each.
+    """
+
+    stages: t.Tuple[ArrayProcessingPipeline] = ()
+
+    def should_process(self) -> bool:
+        return bool(self.stages)
+
+    def process_image(self, image) -> ImageIO:
+        return ImageIO.from_cv2(self.process_array(image.to_cv2()))
+
+    def process_array(self, array):
+        # The input may be a view of the caller's image, so only buffers allocated here are written to
+        buffers = []
+        for stage in self.stages:
+            buffers = [buf for buf in buffers if buf.shape == array.shape]
+            out = next((buf for buf in buffers if buf is not array), None)
+            if out is None:
+                out = np.empty_like(array)
+                buffers.append(out)
+            result = stage.process_array(array, out)
+            if (result is not array) and (result is not out):
+                buffers.append(result)
+            array = result
+        return array
+
+
+def run_image_processing_pipelines(
+    pipeline_classes: t.Iterable[t.Type[ImageProcessingPipeline]],
+    images: t.Iterable[ImageIO],
+    ocr_request: "OcrRequest",
+) -> t.Iterable[ImageIO]:
+    """Apply the given pipelines in their run order, fusing consecutive array pipelines."""
+    fused_stages = []
+
+    def _apply_fused_stages(images):
+        pipeline = FusedImageProcessingPipeline(
+            images, ocr_request, stages=tuple(fused_stages)
+        )
+        fused_stages.clear()
+        return pipeline.process() if pipeline.should_process() else images
+
+    for pipeline_cls in sorted(pipeline_classes, key=attrgetter("run_order")):
+        pipeline = pipeline_cls(images, ocr_request)
+        if not pipeline.should_process():
+            continue
+        if isinstance(pipeline, ArrayProcessingPipeline):
+            fused_stages.append(pipeline)
+            continue
+        pipeline.images = images = _apply_fused_stages(images)
+        images = pipeline.process()
+    return _apply_fused_stages(images)
+
+
 class TwoInOneScanProcessingPipeline(ImageProcessingPipeline):
     """Splits the given page into two pages and processes each page separately."""
 
@@ -52,7 +129,7 @@ class TwoInOneScanProcessingPipeline(ImageProcessingPipeline):
 
     def process(self) -> t.Tuple[ImageIO]:
         for image in self.images:
-            img = Image.frombytes("RGB", (image.width, image.height), image.data)
+            img = image.to_pil()
             w, h = image.width, image.height
             pg_left = img.crop((0, 0, w / 2, h))
             pg_right = img.crop((w / 2, 0, w, h))
@@ -60,14 +137,11 @@ class TwoInOneScanProcessingPipeline(ImageProcessingPipeline):
             if self.ocr_request.language.is_rtl:
                 pages = (pg_right, pg_left)
             for pg in pages:
-                new_image = image.__class__(
-                    data=pg.convert("RGB").tobytes(), width=pg.width, height=pg.height
-                )
-                yield new_image
+                yield ImageIO.from_pil(pg)
 
 
-class DPIProcessingPipeline(ImageProcessingPipeline):
-    """Change the pixel dencity of the given images using PIL."""
+class DPIProcessingPipeline(ArrayProcessingPipeline):
+    """Change the pixel dencity of the given images."""
 
     run_order = 20
     DPI_300_SIZE = 1024
@@ -75,27 +149,22 @@ class DPIProcessingPipeline(ImageProcessingPipeline):
     def should_process(self) -> bool:
         return True
 
-    def _cv2_based_resizing(self, image):
-        w, h = image.size
-        factor = max(1, float(self.DPI_300_SIZE / w))
-        nw, nh = int(factor * w), int(factor * h)
-        cv2img = image.to_cv2()
-        img = cv2.resize(cv2img, (nw, nh), cv2.INTER_CUBIC)
-        return image.from_cv2(img)
-
-    def process_image(self, image):
-        img = image.to_pil()
-        w, h = image.size
+    def process_array(self, array, out=None):
+        h, w = array.shape
         if "scaling_factor" in self.args:
             factor = self.args["scaling_factor"]
         else:
             factor = max(1, float(self.DPI_300_SIZE / w))
-        return ImageIO.from_pil(
-            img.resize((int(factor * w), int(factor * h)), resample=Image.LANCZOS)
+        if factor == 1:
+            return array
+        return cv2.resize(
+            array,
+            (int(factor * w), int(factor * h)),
+            interpolation=cv2.INTER_LANCZOS4,
         )
 
 
-class ThresholdProcessingPipeline(ImageProcessingPipeline):
+class ThresholdProcessingPipeline(ArrayProcessingPipeline):
     """Binarize the given images using opencv."""
 
     run_order = 30
@@ -103,13 +172,18 @@ class ThresholdProcessingPipeline(ImageProcessingPipeline):
     def should_process(self) -> bool:
         return True
 
-    def process_image(self, image):
-        img = image.to_cv2().astype(np.uint8)
-        ret, th = cv2.threshold(img, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
-        return ImageIO.from_cv2(th)
+    def process_array(self, array, out=None):
+        histogram = cv2.calcHist([array], [0], None, [256], [0, 256])
+        if not histogram[1:255].any():
+            # Already binarized
+            return array
+        ret, th = cv2.threshold(
+            array, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU, dst=out
+        )
+        return th
 
 
-class DeskewProcessingPipeline(ImageProcessingPipeline):
+class DeskewProcessingPipeline(ArrayProcessingPipeline):
     """Deskews the given image."""
 
     run_order = 40
@@ -117,31 +191,27 @@ class DeskewProcessingPipeline(ImageProcessingPipeline):
     def should_process(self) -> bool:
         return True
 
-    def process_image(self, image):
-        img = image.to_cv2().astype(np.uint8)
-        desk_img = cv2_utils.correct_skew(img)
-        return ImageIO.from_cv2(desk_img)
+    def process_array(self, array, out=None):
+        return cv2_utils.correct_skew(array)
 
 
-class BlurProcessingPipeline(ImageProcessingPipeline):
+class BlurProcessingPipeline(ArrayProcessingPipeline):
     """Blurs the given image to remove noise."""
 
     run_order = 50
+    KERNEL_SIZE = (1, 1)
 
     def should_process(self) -> bool:
         return True
 
-    def image_smoothening(self, img):
-        blur = cv2.GaussianBlur(img, (1, 1), 0)
-        return blur
-
-    def process_image(self, image):
-        img = image.to_cv2().astype(np.uint8)
-        img = self.image_smoothening(img)
-        return ImageIO.from_cv2(img)
+    def process_array(self, array, out=None):
+        if self.KERNEL_SIZE == (1, 1):
+            # A single pixel kernel leaves the image as is
+            return array
+        return cv2.GaussianBlur(array, self.KERNEL_SIZE, 0, dst=out)
 
 
-class DilationProcessingPipeline(ImageProcessingPipeline):
+class DilationProcessingPipeline(ArrayProcessingPipeline):
     """Dilates the given image."""
 
     run_order = 60
@@ -149,14 +219,12 @@ class DilationProcessingPipeline(ImageProcessingPipeline):
     def should_process(self) -> bool:
         return True
 
-    def process_image(self, image):
-        img = image.to_cv2().astype(np.uint8)
+    def process_array(self, array, out=None):
         kernel = np.ones((5, 5), np.uint8)
-        img = cv2.dilate(img, kernel, iterations=1)
-        return ImageIO.from_cv2(img)
+        return cv2.dilate(array, kernel, dst=out, iterations=1)
 
 
-class ErosionProcessingPipeline(ImageProcessingPipeline):
+class ErosionProcessingPipeline(ArrayProcessingPipeline):
     """Applys erosion to the given image."""
 
     run_order = 70
@@ -164,11 +232,9 @@ class ErosionProcessingPipeline(ImageProcessingPipeline):
     def should_process(self) -> bool:
         return True
 
-    def process_image(self, image):
-        img = image.to_cv2().astype(np.uint8)
+    def process_array(self, array, out=None):
         kernel = np.ones((5, 5), np.uint8)
-        img = cv2.erode(img, kernel, iterations=1)
-        return ImageIO.from_cv2(img)
+        return cv2.erode(array, kernel, dst=out, iterations=1)
 
 
 class ConcatImagesProcessingPipeline(ImageProcessingPipeline):
@@ -210,15 +276,14 @@ class DebugProcessingPipeline(ImageProcessingPipeline):
         return image
 
 
-class InvertColourProcessingPipeline(ImageProcessingPipeline):
+class InvertColourProcessingPipeline(ArrayProcessingPipeline):
     """Invert the given images."""
 
     def should_process(self) -> bool:
         return True
 
-    def process_image(self, image):
-        img = cv2.bitwise_not(image.to_cv2())
-        return ImageIO.from_cv2(img)
+    def process_array(self, array, out=None):
+        return cv2.bitwise_not(array, dst=out)
 
 
 class SharpenColourProcessingPipeline(ImageProcessingPipeline):
@@ -242,11 +307,11 @@ class RotationProcessingPipeline(ImageProcessingPipeline):
         return self.ROTATION not in self.ROTATION_METHODS
 
     def process_image(self, image):
-        img = Image.frombytes("RGB", (image.width, image.height), image.data)
         rotation = self.args.get("rotation", self.ROTATION)
-        rotator = ImageOps.flip if rotation == "VERTICAL" else ImageOps.mirror
-        image.data = rotator(img).convert("RGB").tobytes()
-        return image
+        pixels = image.to_array()
+        # Flipping a numpy view does not copy the pixels, only making it contiguous does
+        flipped = pixels[::-1] if rotation == "VERTICAL" else pixels[:, ::-1]
+        return ImageIO.from_array(flipped, mode=image.mode)
 
 
 class DrainProcessingPipeline(ImageProcessingPipeline):
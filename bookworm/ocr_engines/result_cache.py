@@ -0,0 +1,68 @@
+# coding: utf-8
+
+"""
+A persistent cache of recognized text, keyed by a hash of the image that was recognized
+and everything else that affects the result: the engine and its version, the languages,
+and the image processing pipelines. Recognizing a page that was recognized before,
+in any document, is then a lookup.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from functools import lru_cache
+
+from diskcache import Cache
+
+from bookworm import typehints as t
+from bookworm.logger import logger
+from bookworm.paths import home_data_path
+
+log = logger.getChild(__name__)
+# Bump this when preprocessing changes in a way that invalidates cached results
+OCR_RESULT_CACHE_VERSION = 1
+OCR_RESULT_CACHE_SIZE_LIMIT = 256 * 1024**2
+
+
+@lru_cache(maxsize=None)
+def get_ocr_result_cache_store() -> Cache:
+    """Return the process-wide disk cache used to store recognized text."""
+    return Cache(
+        os.fspath(home_data_path(".ocr_result_cache")),
+        size_limit=OCR_RESULT_CACHE_SIZE_LIMIT,
+        eviction_policy="least-recently-used",
+    )
+
+
+def hash_image(image: "ImageIO") -> str:
+    """Return the hex digest of the size, colour mode, and pixels of the given image."""
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(f"{image.width}x{image.height}:{image.mode}".encode("ascii"))
+    hasher.update(image.data)
+    return hasher.hexdigest()
+
+
+def get_ocr_cache_key(
+    engine_cls: t.Type["BaseOcrEngine"], ocr_request: "OcrRequest"
+) -> t.Optional[str]:
+    """Return the key of the result of the given request, or None if it should not be cached."""
+    try:
+        engine_version = engine_cls.get_engine_version()
+    except Exception:
+        log.exception(f"Failed to get the version of {engine_cls}", exc_info=True)
+        return
+    pipelines = sorted(
+        f"{pipeline_cls.__module__}.{pipeline_cls.__qualname__}"
+        for pipeline_cls in ocr_request.image_processing_pipelines
+    )
+    return ":".join(
+        (
+            str(OCR_RESULT_CACHE_VERSION),
+            engine_cls.name,
+            engine_version,
+            "+".join(lang.identifier for lang in ocr_request.languages),
+            ",".join(pipelines),
+            ocr_request.image_digest,
+        )
+    )
@@ -0,0 +1,90 @@
+# coding: utf-8
+
+"""
+Records the text of each page recognized while scanning a document to a text file,
+so that an interrupted scan can be resumed without recognizing those pages again.
+"""
+
+from __future__ import annotations
+
+import os
+from contextlib import suppress
+
+import ujson
+
+from bookworm import typehints as t
+from bookworm.logger import logger
+
+log = logger.getChild(__name__)
+SCAN_JOURNAL_FILE_SUFFIX = ".journal"
+
+
+class ScanJournal:
+    """
+    A JSON lines file whose first line describes the scan (the document, the engine and its options),
+    followed by one line for each recognized page, in the order the pages were recognized.
+    The journal of a different scan is discarded rather than resumed.
+    """
+
+    def __init__(self, journal_path: t.PathLike, scan_info: dict[str, t.Any]):
+        self.journal_path = os.fspath(journal_path)
+        self.scan_info = scan_info
+        self._file = None
+        self._is_resumable = False
+
+    @classmethod
+    def for_output_file(
+        cls, output_file: t.PathLike, scan_info: dict[str, t.Any]
+    ) -> ScanJournal:
+        return cls(os.fspath(output_file) + SCAN_JOURNAL_FILE_SUFFIX, scan_info)
+
+    def load(self) -> dict[int, str]:
+        """Return the text of the pages recognized by a previous run of the same scan."""
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return {}
+        try:
+            scan_info = ujson.loads(lines[0])
+        except (IndexError, ValueError):
+            scan_info = None
+        if scan_info != self.scan_info:
+            log.debug(
+                f"Discarding the journal of a different scan: {self.journal_path}"
+            )
+            return {}
+        self._is_resumable = True
+        pages = {}
+        for line in lines[1:]:
+            try:
+                entry = ujson.loads(line)
+            except ValueError:
+                # A partially written last line
+                continue
+            pages[entry["page"]] = entry["text"]
+        return pages
+
+    def record(self, page_index: int, text: str):
+        if self._file is None:
+            if self._is_resumable:
+                self._file = open(self.journal_path, "a", encoding="utf-8")
+                # Start on a new line, in case the last line was partially written
+                self._file.write("\n")
+            else:
+                self._file = open(self.journal_path, "w", encoding="utf-8")
+                self._file.write(ujson.dumps(self.scan_info, ensure_ascii=False) + "\n")
+        entry = {"page": page_index, "text": text}
+        self._file.write(ujson.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """Delete the journal, once the scan is complete."""
+        self.close()
+        with suppress(FileNotFoundError):
+            os.remove(self.journal_path)
@@ -43,6 +43,10 @@ class TesseractOcrEngine(BaseOcrEngine):
             return ".".join(str(i) for i in info.version[:4])
         raise RuntimeError("Could not find tesseract executable")
 
+    @classmethod
+    def get_engine_version(cls) -> str:
+        return cls.get_tesseract_version()
+
     @classmethod
     def get_recognition_languages(cls) -> t.List[LocaleInfo]:
         langs = []
@@ -53,15 +57,42 @@ class TesseractOcrEngine(BaseOcrEngine):
                 continue
         return langs
 
+    @classmethod
+    def _get_recognition_languages_arg(cls, ocr_request: OcrRequest) -> str:
+        return "+".join(lang.given_locale_name for lang in ocr_request.languages)
+
     @classmethod
     def recognize(cls, ocr_request: OcrRequest) -> OcrResult:
-        recog_languages = "+".join(
-            lang.given_locale_name for lang in ocr_request.languages
-        )
         recognized_text = pytesseract.image_to_string(
-            ocr_request.image.to_pil(), recog_languages, nice=1
+            ocr_request.image.to_pil(),
+            cls._get_recognition_languages_arg(ocr_request),
+            nice=1,
         )
         return OcrResult(
             recognized_text=recognized_text,
             ocr_request=ocr_request,
         )
+
+    @classmethod
+    def recognize_many(cls, ocr_requests: t.Sequence[OcrRequest]) -> list[OcrResult]:
+        """
+        Run tesseract once for each set of recognition languages, rather than once for each image,
+        so that it starts and loads the language data once.
+        """
+        requests_by_languages = {}
+        for (index, ocr_request) in enumerate(ocr_requests):
+            recog_languages = cls._get_recognition_languages_arg(ocr_request)
+            requests_by_languages.setdefault(recog_languages, []).append(index)
+        results = [None] * len(ocr_requests)
+        for (recog_languages, indexes) in requests_by_languages.items():
+            recognized_texts = pytesseract.images_to_strings(
+                [ocr_requests[index].image.to_pil() for index in indexes],
+                recog_languages,
+                nice=1,
+            )
+            for (index, recognized_text) in zip(indexes, recognized_texts):
+                results[index] = OcrResult(
+                    recognized_text=recognized_text,
+                    ocr_request=ocr_requests[index],
+                )
+        return results
@@ -7,7 +7,6 @@ from io import BytesIO, StringIO
 from pathlib import Path
 
 from more_itertools import chunked
-from PIL import Image
 
 from bookworm import app
 from bookworm import typehints as t
@@ -60,13 +59,8 @@ class TesseractOcrEngine(BaseOcrEngine):
 
     @classmethod
     def recognize(cls, ocr_request: OcrRequest) -> OcrResult:
-        img = Image.frombytes(
-            "RGB",
-            (ocr_request.image.width, ocr_request.image.height),
-            ocr_request.image.data,
-        )
         recognized_text = cls._libtesseract.image_to_string(
-            img, ocr_request.language.given_locale_name
+            ocr_request.image.to_pil(), ocr_request.language.given_locale_name
         )
         return OcrResult(
             recognized_text=recognized_text,
@@ -12,9 +12,10 @@ from functools import wraps
 from glob import iglob
 from io import BytesIO
 from os import environ, extsep, linesep, remove
+from os.path import join as join_path
 from os.path import normcase, normpath, realpath
 from pkgutil import find_loader
-from tempfile import NamedTemporaryFile
+from tempfile import NamedTemporaryFile, TemporaryDirectory
 from time import sleep
 
 try:
@@ -34,6 +35,10 @@ if pandas_installed:
     import pandas as pd
 
 DEFAULT_ENCODING = "utf-8"
+# Tesseract separates the text of the pages of multi-page inputs with this
+PAGE_SEPARATOR = "\f"
+# Images in these modes are saved uncompressed, which is faster to write and to read
+PNM_MODES = {"1", "L", "RGB"}
 LANG_PATTERN = re.compile("^[a-z_]+$")
 RGB_MODE = "RGB"
 SUPPORTED_FORMATS = {
@@ -422,6 +427,49 @@ def image_to_string(
     }[output_type]()
 
 
+def images_to_strings(
+    images,
+    lang=None,
+    config="",
+    nice=0,
+    timeout=0,
+):
+    """
+    Returns the text of each of the provided images, recognized by a single Tesseract run,
+    which starts Tesseract and loads its language data once for all of the images
+    """
+    if not images:
+        return []
+    with TemporaryDirectory(prefix="tess_") as temp_dir:
+        input_filenames = []
+        for index, image in enumerate(images):
+            image, extension = prepare(image)
+            if image.mode in PNM_MODES:
+                image.format, extension = "PPM", "pnm"
+            input_filename = join_path(temp_dir, f"page_{index}{extsep}{extension}")
+            image.save(input_filename, format=image.format)
+            input_filenames.append(input_filename)
+        # Tesseract treats an input that is not an image as a list of images
+        list_filename = join_path(temp_dir, f"images{extsep}txt")
+        with open(list_filename, "w", encoding=DEFAULT_ENCODING) as list_file:
+            list_file.write("\n".join(input_filenames))
+        output_filename_base = join_path(temp_dir, "output")
+        run_tesseract(
+            list_filename, output_filename_base, "txt", lang, config, nice, timeout
+        )
+        with open(output_filename_base + extsep + "txt", "rb") as output_file:
+            output = output_file.read().decode(DEFAULT_ENCODING)
+    texts = output.split(PAGE_SEPARATOR)
+    # Depending on its version, Tesseract writes the separator after each page, or between pages
+    if (len(texts) == len(images) + 1) and not texts[-1]:
+        texts.pop()
+    if len(texts) != len(images):
+        raise TesseractError(
+            -1, f"Expected the text of {len(images)} images, got {len(texts)}"
+        )
+    return texts
+
+
 def image_to_pdf_or_hocr(
     image,
     lang=None,
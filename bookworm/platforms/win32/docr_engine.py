@@ -37,6 +37,11 @@ class DocrEngine(BaseOcrEngine):
     def check(cls) -> bool:
         return platform.version().startswith("10") and _ocr_available
 
+    @classmethod
+    def get_engine_version(cls) -> str:
+        # The recognition models are updated along with windows
+        return platform.version()
+
     @classmethod
     def get_recognition_languages(cls) -> t.List[LocaleInfo]:
         return [
@@ -48,7 +53,9 @@ class DocrEngine(BaseOcrEngine):
     def recognize(cls, ocr_request: OcrRequest) -> OcrResult:
         docr_eng = Win10DocrEngine(ocr_request.language.given_locale_name)
         image = ocr_request.image.as_rgba()
-        recognized_text = docr_eng.recognize(image.data, image.width, image.height)
+        recognized_text = docr_eng.recognize(
+            image.tobytes(), image.width, image.height
+        )
         return OcrResult(
             recognized_text=recognized_text,
             ocr_request=ocr_request,
@@ -3,6 +3,7 @@
 import os
 import string
 from contextlib import suppress
+from functools import partial
 from pathlib import Path
 
 from selectolax.parser import HTMLParser
@@ -10,14 +11,14 @@ from selectolax.parser import HTMLParser
 from bookworm import app, config
 from bookworm import typehints as t
 from bookworm.commandline_handler import run_subcommand_in_a_new_process
-from bookworm.database import DocumentPositionInfo
+from bookworm.database import DocumentPositionInfo, reading_position_store
 from bookworm.document import (ArchiveContainsMultipleDocuments,
                                ArchiveContainsNoDocumentsError, BaseDocument,
                                BasePage, ChangeDocument)
 from bookworm.document import DocumentCapability as DC
 from bookworm.document import (DocumentEncryptedError, DocumentError,
                                DocumentIOError, PaginationError, Section)
-from bookworm.document.formats import *
+from bookworm.document.formats import iter_document_formats
 from bookworm.document.uri import DocumentUri
 from bookworm.i18n import is_rtl
 from bookworm.logger import logger
@@ -25,6 +26,7 @@ from bookworm.signals import (reader_book_loaded, reader_book_unloaded,
                               reader_page_changed, reader_section_changed,
                               reading_position_change)
 from bookworm.structured_text import SemanticElementType, TextStructureMetadata
+from bookworm.utils import gui_thread_safe
 
 log = logger.getChild(__name__)
 
@@ -35,7 +37,8 @@ PASS_THROUGH__DOCUMENT_EXCEPTIONS = {
 
 
 def get_document_format_info():
-    return BaseDocument.document_classes
+    """Map the supported formats to their `DocumentFormatInfo`, without importing their backends."""
+    return {format_info.format: format_info for format_info in iter_document_formats()}
 
 
 class ReaderError(Exception):
@@ -66,12 +69,13 @@ class UriResolver:
         else:
             self.uri = uri
         self.num_fallbacks = num_fallbacks
-        doc_format_info = get_document_format_info()
-        if (doc_format := self.uri.format) not in doc_format_info:
+        self.document_cls = BaseDocument.get_document_class_given_format(
+            self.uri.format
+        )
+        if self.document_cls is None:
             raise UnsupportedDocumentError(
                 f"Could not open document from uri {self.uri}. The format is not supported."
             )
-        self.document_cls = doc_format_info[doc_format]
 
     def __repr__(self):
         return f"UriResolver(uri={self.uri})"
@@ -138,6 +142,17 @@ class EBookReader:
     def set_document(self, document):
         self.document = document
         self.current_book = self.document.metadata
+        if (page_prefetcher := document.create_page_prefetcher()) is not None:
+            document.page_prefetcher = page_prefetcher
+            reader_page_changed.connect(page_prefetcher.on_page_changed, sender=self)
+        # Show the first page without waiting for huge outlines
+        document.load_toc_tree_in_background()
+        if not document.is_toc_tree_ready():
+            document.add_toc_tree_ready_callback(
+                partial(self._on_toc_tree_ready, document)
+            )
+        # Lets structural navigation move across pages
+        document.build_structure_index_in_background()
         self.__state.setdefault("current_page_index", -1)
         self.set_view_parameters()
         self.current_page = 0
@@ -163,7 +178,7 @@ class EBookReader:
                 log.exception(
                     "Failed to restore last saved reading position", exc_info=True
                 )
-        if self.active_section is None:
+        if (self.active_section is None) and self.document.is_toc_tree_ready():
             self.__state.setdefault(
                 "active_section",
                 self.document.get_section_at_position(self.view.get_insertion_point()),
@@ -173,7 +188,21 @@ class EBookReader:
     def set_view_parameters(self):
         self.view.set_title(self.get_view_title(include_author=True))
         self.view.set_text_direction(self.document.language.is_rtl)
-        self.view.add_toc_tree(self.document.toc_tree)
+        if self.document.is_toc_tree_ready():
+            self.view.add_toc_tree(self.document.toc_tree)
+
+    @gui_thread_safe
+    def _on_toc_tree_ready(self, document):
+        if (document is not self.document) or (not self.document.is_toc_tree_ready()):
+            return
+        try:
+            self.view.add_toc_tree(self.document.toc_tree)
+        except:
+            log.exception("Failed to build the table of content", exc_info=True)
+            return
+        section = self.document[self.current_page].section
+        self.__state["active_section"] = section
+        self.view.tocTreeSetSelection(section)
 
     def load(self, uri: DocumentUri):
         document = UriResolver(uri).read_document()
@@ -199,7 +228,8 @@ class EBookReader:
     def save_current_position(self):
         if self.stored_document_info is None:
             return
-        self.stored_document_info.save_position(
+        reading_position_store.set_position(
+            self.stored_document_info,
             self.current_page,
             self.view.get_insertion_point(),
         )
@@ -238,7 +268,9 @@ class EBookReader:
             )
         self.__state["current_page_index"] = value
         page = self.document[value]
-        if not self.document.is_single_page_document():
+        if (
+            not self.document.is_single_page_document()
+        ) and self.document.is_toc_tree_ready():
             self.active_section = page.section
         self.view.set_state_on_page_change(page)
         # if config.conf["appearance"]["apply_text_styles"] and DC.TEXT_STYLE in self.document.capabilities:
@@ -247,7 +279,7 @@ class EBookReader:
 
     def get_current_page_object(self) -> BasePage:
         """Return the current page."""
-        return self.document.get_page(self.current_page)
+        return self.document[self.current_page]
 
     def go_to_page(
         self, page_number: int, pos: int = 0, set_focus_to_text_ctrl: bool = True
@@ -285,9 +317,13 @@ class EBookReader:
                 else:
                     return False
         elif unit == "section":
+            if self.active_section is None:
+                # The table of content is not ready yet
+                return False
             this_section = self.active_section
-            target = "simple_next" if to == "next" else "simple_prev"
-            self.active_section = getattr(self.active_section, target)
+            toc_index = self.document.toc_index
+            target = toc_index.simple_next if to == "next" else toc_index.simple_prev
+            self.active_section = target(self.active_section)
             if this_section.is_root and to == "next":
                 self.active_section = this_section.first_child
             navigated = this_section is not self.active_section
@@ -386,9 +422,24 @@ class EBookReader:
         return pos_getter(element_type, anchor=anchor)
 
     def get_semantic_element(self, element_type, forward, anchor):
-        return self._get_semantic_element_from_page(
-            self.get_current_page_object(), element_type, forward, anchor
+        """
+        Return ((start, stop), actual element type) of the nearest element of the given type.
+        Once the structure index of the document is built, the element may be in another page,
+        in which case the reader moves to that page first.
+        """
+        if (structure_index := self.document.get_structure_index()) is None:
+            return self._get_semantic_element_from_page(
+                self.get_current_page_object(), element_type, forward, anchor
+            )
+        element = structure_index.get_element(
+            element_type, forward, self.current_page, anchor
         )
+        if element is None:
+            return
+        page_index, text_range, actual_element_type = element
+        if page_index != self.current_page:
+            self.go_to_page(page_index, text_range[0])
+        return text_range, actual_element_type
 
     def iter_semantic_ranges_for_elements_of_type(self, element_type):
         semantics = TextStructureMetadata(
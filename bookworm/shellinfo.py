@@ -36,9 +36,9 @@ class SupportedFileFormat:
 def get_ext_info(supported="*"):
     doctypes = {}
     shell_integratable_docs = [
-        doc_cls
-        for doc_cls in get_document_format_info().values()
-        if (not doc_cls.__internal__) and (doc_cls.extensions is not None)
+        format_info
+        for format_info in get_document_format_info().values()
+        if (not format_info.internal) and format_info.extensions
     ]
     for cls in shell_integratable_docs:
         for ext in cls.extensions:
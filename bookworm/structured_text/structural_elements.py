@@ -83,17 +83,14 @@ class TextStructureMetadata:
             yield rngs
 
     def get_range(self, element_ranges, forward, anchor):
-        element_ranges.sort()
-        if not forward:
-            element_ranges.reverse()
-        for start, stop in element_ranges:
-            condition = (
-                start > anchor
-                if forward
-                else (start < anchor) and not (start <= anchor <= stop)
-            )
-            if condition:
-                return start, stop
+        # A single pass, instead of sorting the ranges, which are shared with the page, on every call
+        if forward:
+            candidates = (rng for rng in element_ranges if rng[0] > anchor)
+            return min(candidates, default=None)
+        candidates = (
+            rng for rng in element_ranges if (rng[0] < anchor) and (rng[1] < anchor)
+        )
+        return max(candidates, default=None)
 
     def get_element(self, element_type, forward, anchor):
         if element_type is SemanticElementType.HEADING:
@@ -190,3 +190,9 @@ class StructuredHtmlParser(Inscriptis):
             ]
         )
         return parsed.html
+
+    def get_tables_markup(self) -> list[str]:
+        return [
+            self.get_table_markup(table_index)
+            for table_index in range(len(self._table_elements))
+        ]
@@ -266,12 +266,13 @@ class TextToSpeechService(BookwormService):
                 if is_single_page_document:
                     text_pos = sum(text_range.astuple()) / 2
                     sect = self.reader.document.get_section_at_position(text_pos)
-                    if _last_known_section != sect:
+                    if _last_known_section is not sect:
                         if (_last_known_section is not None) and (
                             sect.parent is not _last_known_section
                         ):
                             self.configure_end_of_section_utterance(
-                                utterance, sect.simple_prev
+                                utterance,
+                                self.reader.document.toc_index.simple_prev(sect),
                             )
                         _last_known_section = sect
                 utterance.add_bookmark(
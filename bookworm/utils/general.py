@@ -95,10 +95,9 @@ def gui_thread_safe(func):
 
 
 def generate_file_md5(filepath):
-    hasher = hashlib.md5()
-    for chunk in open(filepath, "rb"):
-        hasher.update(chunk)
-    return hasher.hexdigest()
+    from bookworm.fingerprint import get_file_fingerprint
+
+    return get_file_fingerprint(filepath, algorithm="md5")
 
 
 def generate_sha1hash(content):
@@ -1,8 +1,20 @@
 from pathlib import Path
 
 import pytest
+from diskcache import Cache
 
 
 @pytest.fixture(scope="function", autouse=True)
 def asset():
     yield lambda filename: str(Path(__file__).parent / "assets" / filename)
+
+
+@pytest.fixture
+def fingerprint_store(tmp_path, monkeypatch):
+    """Memoize file fingerprints in a temporary cache, rather than in the user's data folder."""
+    from bookworm import fingerprint
+
+    store = Cache(str(tmp_path / "fingerprints"))
+    monkeypatch.setattr(fingerprint, "get_fingerprint_store", lambda: store)
+    yield store
+    store.close()
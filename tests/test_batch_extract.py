@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from bookworm.batch_extract import (ExtractionJournal, ExtractionResult,
+                                    ExtractionStatus, ExtractionSummary,
+                                    plan_extraction_jobs)
+
+
+def test_plan_extraction_jobs_mirrors_input_folders(tmp_path):
+    input_folder = tmp_path / "library"
+    (input_folder / "novels").mkdir(parents=True)
+    (input_folder / "book.pdf").write_bytes(b"%PDF")
+    (input_folder / "novels" / "story.epub").write_bytes(b"PK")
+    (input_folder / "notes.unknown").write_bytes(b"")
+    output_folder = tmp_path / "output"
+    jobs = plan_extraction_jobs(
+        [os.fspath(input_folder), os.fspath(input_folder / "book.pdf")],
+        output_folder,
+        "jsonl",
+        compress=True,
+    )
+    targets = sorted(
+        os.path.relpath(job.target, output_folder.resolve()) for job in jobs
+    )
+    assert targets == [
+        "book.pdf.jsonl.gz",
+        os.path.join("novels", "story.epub.jsonl.gz"),
+    ]
+
+
+def test_extraction_journal_skips_unchanged_documents(tmp_path):
+    source = tmp_path / "book.pdf"
+    source.write_bytes(b"%PDF")
+    target = tmp_path / "book.pdf.txt"
+    target.write_text("text")
+    [job] = plan_extraction_jobs([os.fspath(source)], tmp_path, "txt")
+    journal_path = tmp_path / "journal"
+    journal = ExtractionJournal(journal_path)
+    journal.record(
+        ExtractionResult(job=job, status=ExtractionStatus.EXTRACTED, num_pages=3)
+    )
+    journal.close()
+    resumed_journal = ExtractionJournal(journal_path)
+    resumed_journal.load()
+    assert resumed_journal.is_extracted(job)
+    source.write_bytes(b"%PDF-changed")
+    assert not resumed_journal.is_extracted(job)
+
+
+def test_extraction_summary():
+    summary = ExtractionSummary()
+    for status in ExtractionStatus:
+        summary.add_result(ExtractionResult(job=None, status=status, num_pages=2))
+    assert (summary.files_extracted, summary.num_pages) == (1, 2)
+    assert (summary.files_skipped, summary.files_failed) == (1, 1)
+    assert summary.files_timed_out == 1
+    assert not summary.is_successful
+
+
+def test_plan_extraction_jobs_keeps_globbed_folders(tmp_path):
+    for folder in ("a", "b"):
+        (tmp_path / "library" / folder).mkdir(parents=True)
+        (tmp_path / "library" / folder / "book.pdf").write_bytes(b"%PDF")
+    output_folder = tmp_path / "output"
+    jobs = plan_extraction_jobs(
+        [os.fspath(tmp_path / "library" / "**" / "*.pdf")], output_folder, "txt"
+    )
+    targets = sorted(
+        os.path.relpath(job.target, output_folder.resolve()) for job in jobs
+    )
+    assert targets == [
+        os.path.join("a", "book.pdf.txt"),
+        os.path.join("b", "book.pdf.txt"),
+    ]
+    with pytest.raises(ValueError):
+        plan_extraction_jobs(
+            [
+                os.fspath(tmp_path / "library" / "a" / "book.pdf"),
+                os.fspath(tmp_path / "library" / "b" / "book.pdf"),
+            ],
+            output_folder,
+            "txt",
+        )
@@ -0,0 +1,111 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from diskcache import Cache
+
+from bookworm.bookshelf.local_bookshelf import tasks
+from bookworm.bookshelf.local_bookshelf.models import (
+    DEFAULT_BOOKSHELF_DATABASE_FILE,
+    BaseModel,
+    Document,
+    DocumentFingerprint,
+    database,
+)
+from bookworm.document import cache
+from bookworm.document.uri import DocumentUri
+
+
+@pytest.fixture
+def bookshelf(tmp_path, monkeypatch, fingerprint_store):
+    if not database.is_closed():
+        database.close()
+    database.init(os.fspath(tmp_path / "bookshelf.sqlite"))
+    BaseModel.create_all()
+    content_store = Cache(str(tmp_path / "content_cache"))
+    monkeypatch.setattr(cache, "get_content_cache_store", lambda: content_store)
+    # Extract in threads, which share the test database
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(tasks, "local_bookshelf_process_executor", executor)
+    yield tmp_path
+    executor.shutdown()
+    content_store.close()
+    database.close()
+    database.init(os.fspath(DEFAULT_BOOKSHELF_DATABASE_FILE))
+
+
+def _write_document(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    html = f"<html><head><title>{path.stem}</title></head><body><p>{text}</p></body>"
+    path.write_text(f"{html}</html>", encoding="utf-8")
+    return path
+
+
+def test_ingest_documents(bookshelf):
+    paths = [
+        _write_document(bookshelf / "library" / f"book{idx}.html", f"Book number {idx}")
+        for idx in range(3)
+    ]
+    uris = [DocumentUri.from_filename(path) for path in paths]
+    stats = tasks.ingest_documents(uris, None, (), should_add_to_fts=True)
+    assert stats.documents_added == 3
+    assert stats.documents_failed == 0
+    assert stats.pages_added == 3
+    assert stats.transactions == 1
+    assert Document.select().count() == 3
+    # Documents already in the bookshelf are skipped
+    stats = tasks.ingest_documents(uris, None, (), should_add_to_fts=True)
+    assert (stats.documents_added, stats.documents_skipped) == (0, 3)
+    assert Document.select().count() == 3
+
+
+def test_sync_folder_to_bookshelf(bookshelf):
+    library = (bookshelf / "library").resolve()
+    first = _write_document(library / "first.html", "The first book")
+    second = _write_document(library / "nested" / "second.html", "The second book")
+    stats = tasks.sync_folder_to_bookshelf(library, None, should_add_to_fts=True)
+    assert stats.documents_added == 2
+    assert Document.select().count() == 2
+    # Nothing changed
+    stats = tasks.sync_folder_to_bookshelf(library, None, should_add_to_fts=True)
+    assert (stats.documents_added, stats.documents_unchanged) == (0, 2)
+    # Touched, but not modified
+    stat_result = first.stat()
+    os.utime(first, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10**9))
+    stats = tasks.sync_folder_to_bookshelf(library, None, should_add_to_fts=True)
+    assert (stats.documents_added, stats.documents_unchanged) == (0, 2)
+    fingerprint = DocumentFingerprint.get(DocumentFingerprint.path == str(first))
+    assert fingerprint.mtime_ns == first.stat().st_mtime_ns
+    # Modified
+    _write_document(second, "The second book, revised and expanded")
+    stats = tasks.sync_folder_to_bookshelf(library, None, should_add_to_fts=True)
+    assert (stats.documents_added, stats.documents_unchanged) == (1, 1)
+    assert Document.select().count() == 2
+    # Removed
+    first.unlink()
+    stats = tasks.sync_folder_to_bookshelf(library, None, should_add_to_fts=True)
+    assert (stats.documents_removed, stats.documents_unchanged) == (1, 1)
+    assert Document.select().count() == 1
+    assert (
+        DocumentFingerprint.get_or_none(DocumentFingerprint.path == str(first)) is None
+    )
+
+
+def test_sync_keeps_documents_under_unreadable_folders(bookshelf, monkeypatch):
+    library = (bookshelf / "library").resolve()
+    _write_document(library / "first.html", "The first book")
+    _write_document(library / "shared" / "second.html", "The second book")
+    tasks.sync_folder_to_bookshelf(library, None, should_add_to_fts=True)
+    assert Document.select().count() == 2
+    scandir = os.scandir
+
+    def failing_scandir(path):
+        if os.fspath(path) == os.fspath(library / "shared"):
+            raise PermissionError(path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", failing_scandir)
+    stats = tasks.sync_folder_to_bookshelf(library, None, should_add_to_fts=True)
+    assert (stats.documents_removed, stats.documents_unchanged) == (0, 1)
+    assert Document.select().count() == 2
+    assert DocumentFingerprint.select().count() == 2
@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+import pytest
+from diskcache import Cache
+
+from bookworm.document import cache
+from bookworm.document.base import BasePage
+from bookworm.document.cache import DocumentContentCache
+from bookworm.document.features import ReadingMode
+from bookworm.structured_text import SemanticElementType
+
+
+class CountingPage(BasePage):
+    calls = []
+
+    def get_text(self):
+        self.calls.append("get_text")
+        return f"Text of page {self.index}"
+
+    def get_label(self):
+        self.calls.append("get_label")
+        return f"p{self.index}"
+
+    def get_semantic_structure(self):
+        self.calls.append("get_semantic_structure")
+        return {SemanticElementType.HEADING_1: [(0, 4)]}
+
+
+class FakeDocument:
+    format = "pdf"
+    reading_options = SimpleNamespace(reading_mode=ReadingMode.DEFAULT)
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.uri = SimpleNamespace(view_args={})
+        self.content_cache = DocumentContentCache.for_document(self)
+
+    def get_file_system_path(self):
+        return self.filename
+
+
+@pytest.fixture
+def content_store(tmp_path, monkeypatch, fingerprint_store):
+    store = Cache(str(tmp_path / "content_cache"))
+    monkeypatch.setattr(cache, "get_content_cache_store", lambda: store)
+    CountingPage.calls.clear()
+    yield store
+    store.close()
+
+
+def _read_page(document, index):
+    page = CountingPage(document, index)
+    return (page.get_text(), page.get_label(), page.get_semantic_structure())
+
+
+def test_cached_page_content_is_served_from_the_store(tmp_path, content_store):
+    filename = tmp_path / "book.pdf"
+    filename.write_bytes(b"first version")
+    content = _read_page(FakeDocument(filename), 1)
+    assert len(CountingPage.calls) == 3
+    assert len(content_store) == 3
+    # Reopening the unchanged file reads the content from the store
+    assert _read_page(FakeDocument(filename), 1) == content
+    assert len(CountingPage.calls) == 3
+    assert _read_page(FakeDocument(filename), 2)[0] == "Text of page 2"
+    assert len(CountingPage.calls) == 6
+
+
+def test_cached_page_content_is_invalidated_when_the_file_changes(
+    tmp_path, content_store
+):
+    filename = tmp_path / "book.pdf"
+    filename.write_bytes(b"first version")
+    first_document = FakeDocument(filename)
+    _read_page(first_document, 0)
+    filename.write_bytes(b"second, longer version")
+    second_document = FakeDocument(filename)
+    assert (
+        second_document.content_cache.document_key
+        != first_document.content_cache.document_key
+    )
+    _read_page(second_document, 0)
+    assert CountingPage.calls == ["get_text", "get_label", "get_semantic_structure"] * 2
+    assert len(content_store) == 6
+
+
+def test_empty_store_is_used(tmp_path):
+    with Cache(str(tmp_path / "content_cache")) as store:
+        assert DocumentContentCache("key", store=store).store is store
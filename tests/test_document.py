@@ -1,7 +1,9 @@
 import pytest
 
 from bookworm.document import create_document
+from bookworm.document.structure_index import DocumentStructureIndex
 from bookworm.document.uri import DocumentUri
+from bookworm.structured_text import SemanticElementType
 
 
 def test_epub_metadata(asset):
@@ -39,3 +41,24 @@ def test_epub_document_section_at_text_position(asset):
     for (text_position, section_title) in position_to_section_title.items():
         section = epub.get_section_at_position(text_position)
         assert section.title == section_title
+
+
+def test_epub_structure_index_matches_the_merged_structure(asset):
+    uri = DocumentUri.from_filename(asset("epub30-spec.epub"))
+    epub = create_document(uri)
+    structure_index = epub.get_structure_index()
+    merged_index = DocumentStructureIndex.from_semantic_structures(
+        [(0, epub.get_document_semantic_structure())]
+    )
+    element_types = (
+        SemanticElementType.HEADING,
+        SemanticElementType.LINK,
+        SemanticElementType.LIST,
+        SemanticElementType.TABLE,
+    )
+    for element_type in element_types:
+        for anchor in range(0, len(epub.get_content()), 4999):
+            for forward in (True, False):
+                assert structure_index.get_element(
+                    element_type, forward, 0, anchor
+                ) == merged_index.get_element(element_type, forward, 0, anchor)
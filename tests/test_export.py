@@ -0,0 +1,118 @@
+import gzip
+import os
+from types import SimpleNamespace
+
+import pytest
+import ujson
+
+from bookworm.document.operations import (
+    JsonLinesExportWriter,
+    PageExportWriter,
+    export_to_plain_text,
+    strip_export_file_extension,
+)
+
+
+class FakePage:
+    def __init__(self, index):
+        self.index = index
+        self.number = index + 1
+        self.section = SimpleNamespace(title=f"Chapter {index // 2 + 1}")
+
+    def get_label(self):
+        return f"p{self.number}"
+
+
+class FakeDocument:
+    format = "pdf"
+    metadata = SimpleNamespace(title="A Book", author="An Author")
+    toc_tree = SimpleNamespace(
+        children=[
+            SimpleNamespace(
+                title="Chapter 1",
+                pager=SimpleNamespace(first=0, last=1),
+                text_range=None,
+                children=[],
+            ),
+        ]
+    )
+
+    def __init__(self, pages, fail_at=None):
+        self.pages = pages
+        self.fail_at = fail_at
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __getitem__(self, index):
+        return FakePage(index)
+
+    def get_page_content(self, index):
+        if index == self.fail_at:
+            raise RuntimeError("Failed to read page")
+        return self.pages[index]
+
+
+def _export(doc, filename):
+    return list(export_to_plain_text(doc, filename))
+
+
+def test_plain_text_export(tmp_path):
+    target = tmp_path / "book.txt"
+    assert _export(FakeDocument(["First page", "Second page"]), target) == [1, 2]
+    assert target.read_text(encoding="utf8") == (
+        f"A Book\n{'-' * 30}\nFirst page\n\f\nSecond page\n\f\n"
+    )
+
+
+def test_compressed_json_lines_export(tmp_path):
+    target = tmp_path / "book.jsonl.gz"
+    _export(FakeDocument(["First page", "Second page"]), target)
+    with gzip.open(target, "rt", encoding="utf8") as file:
+        records = [ujson.loads(line) for line in file]
+    assert [record["type"] for record in records] == [
+        "document",
+        "section",
+        "page",
+        "page",
+    ]
+    assert records[0]["num_pages"] == 2
+    assert (records[1]["first_page"], records[1]["last_page"]) == (0, 1)
+    assert records[3] == {
+        "type": "page",
+        "index": 1,
+        "number": 2,
+        "label": "p2",
+        "section": "Chapter 1",
+        "text": "Second page",
+    }
+
+
+def test_failed_export_leaves_the_target_as_is(tmp_path):
+    target = tmp_path / "book.txt"
+    target.write_text("Previous export", encoding="utf8")
+    with pytest.raises(RuntimeError):
+        _export(FakeDocument(["First page", "Second page"], fail_at=1), target)
+    assert target.read_text(encoding="utf8") == "Previous export"
+    assert os.listdir(tmp_path) == ["book.txt"]
+
+
+def test_page_export_writers_implement_write_page():
+    with pytest.raises(TypeError):
+        PageExportWriter(None)
+    assert JsonLinesExportWriter(None).file is None
+
+
+@pytest.mark.parametrize(
+    "filename, expected",
+    [
+        ("book", "book"),
+        ("book.txt", "book"),
+        ("Book.TXT.gz", "Book"),
+        ("book.jsonl", "book"),
+        ("book.gz", "book"),
+        ("my.notes", "my.notes"),
+    ],
+)
+def test_strip_export_file_extension(filename, expected):
+    assert strip_export_file_extension(filename) == expected
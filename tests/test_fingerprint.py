@@ -0,0 +1,25 @@
+import hashlib
+
+from bookworm.fingerprint import get_file_fingerprint, hash_file
+
+
+def test_hash_file(tmp_path):
+    content = b"bookworm\n" * 1000000
+    filename = tmp_path / "content.bin"
+    filename.write_bytes(content)
+    assert hash_file(filename) == hashlib.sha1(content).hexdigest()
+    assert hash_file(filename, "md5") == hashlib.md5(content).hexdigest()
+    empty_filename = tmp_path / "empty.bin"
+    empty_filename.write_bytes(b"")
+    assert hash_file(empty_filename) == hashlib.sha1().hexdigest()
+
+
+def test_file_fingerprint_changes_with_content(tmp_path, fingerprint_store):
+    filename = tmp_path / "document.txt"
+    filename.write_bytes(b"first")
+    first_fingerprint = get_file_fingerprint(filename)
+    assert get_file_fingerprint(filename) == first_fingerprint
+    assert len(fingerprint_store) == 1
+    filename.write_bytes(b"second version")
+    assert get_file_fingerprint(filename) == hashlib.sha1(b"second version").hexdigest()
+    assert len(fingerprint_store) == 2
@@ -0,0 +1,110 @@
+import pytest
+
+from bookworm.document import Pager, Section
+from bookworm.document.formats.fitz import build_outline_tree
+
+MAX_PAGE = 19
+
+
+def build_outline_tree_recursively(root_item, outline, max_page):
+    """The former builder, which looks up the next entry and the parent of each entry."""
+    _last_entry = None
+    for index, (level, title, start_page, infodict) in enumerate(outline):
+        try:
+            curr_index = index
+            next_item = outline[curr_index + 1]
+            while next_item[0] != level:
+                curr_index += 1
+                next_item = outline[curr_index]
+        except IndexError:
+            next_item = None
+        first_page = start_page - 1
+        last_page = max_page if next_item is None else next_item[2] - 2
+        if first_page < 0:
+            first_page = 0 if _last_entry is None else _last_entry.pager.last
+        if last_page < first_page:
+            last_page += 1
+        if not all(p >= 0 for p in (first_page, last_page)):
+            continue
+        if first_page > last_page:
+            continue
+        sect = Section(
+            title=title,
+            pager=Pager(first=first_page, last=last_page),
+            data={"html_file": infodict.get("name")},
+        )
+        if level == 1:
+            root_item.append(sect)
+            _last_entry = sect
+            continue
+        elif not root_item:
+            continue
+        parent = root_item.children[-1]
+        parent_lvl = level - 1
+        while True:
+            if (parent_lvl > 1) and parent.children:
+                parent = parent.children[-1]
+                parent_lvl -= 1
+                continue
+            parent.append(sect)
+            _last_entry = sect
+            break
+    return root_item
+
+
+def _make_root():
+    return Section(
+        title="Book", pager=Pager(first=0, last=MAX_PAGE), data={"html_file": None}
+    )
+
+
+def _dump(section):
+    return (
+        section.title,
+        section.pager.first,
+        section.pager.last,
+        section.data,
+        [_dump(child) for child in section.children],
+    )
+
+
+NESTED_OUTLINE = [
+    [1, "Part 1", 1, {"name": "part-1"}],
+    [2, "Chapter 1", 1, {}],
+    [3, "Section 1.1", 2, {}],
+    [3, "Section 1.2", 3, {}],
+    [2, "Chapter 2", 5, {}],
+    [1, "Part 2", 8, {}],
+    [2, "Chapter 3", 9, {}],
+    [3, "Section 3.1", 12, {}],
+    [1, "Appendix", 15, {}],
+]
+SKIPPED_LEVELS_OUTLINE = [
+    [2, "Orphan before the first part", 1, {}],
+    [1, "Part 1", 1, {}],
+    [3, "Section without a chapter", 2, {}],
+    [2, "Chapter 1", 3, {}],
+    [4, "Deep section", 4, {}],
+    [3, "Section 1.1", 5, {}],
+    [2, "Chapter without a page", -1, {}],
+    [1, "Part 2", 10, {}],
+    [4, "Deep section of part 2", 11, {}],
+    [2, "Chapter 2", 12, {}],
+    [2, "Chapter on the same page", 12, {}],
+]
+
+
+@pytest.mark.parametrize("outline", [[], NESTED_OUTLINE, SKIPPED_LEVELS_OUTLINE])
+def test_build_outline_tree_matches_the_recursive_builder(outline):
+    tree = build_outline_tree(_make_root(), outline, MAX_PAGE)
+    expected = build_outline_tree_recursively(_make_root(), outline, MAX_PAGE)
+    assert _dump(tree) == _dump(expected)
+
+
+def test_build_outline_tree_nests_entries():
+    tree = build_outline_tree(_make_root(), NESTED_OUTLINE, MAX_PAGE)
+    assert [child.title for child in tree] == ["Part 1", "Part 2", "Appendix"]
+    chapter_1 = tree[0][0]
+    assert [child.title for child in chapter_1] == ["Section 1.1", "Section 1.2"]
+    assert (chapter_1.pager.first, chapter_1.pager.last) == (0, 3)
+    assert (tree[2].pager.first, tree[2].pager.last) == (14, MAX_PAGE)
@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+from bookworm.document.formats import (
+    DOCUMENT_FORMATS,
+    get_format_given_extension,
+)
+
+
+def test_format_registry_matches_document_classes():
+    formats = [format_info.format for format_info in DOCUMENT_FORMATS]
+    assert len(formats) == len(set(formats))
+    for format_info in DOCUMENT_FORMATS:
+        document_cls = format_info.load_class()
+        assert document_cls.format == format_info.format
+        assert tuple(document_cls.extensions or ()) == format_info.extensions
+        assert document_cls.__internal__ == format_info.internal
+
+
+def test_get_format_given_extension():
+    assert get_format_given_extension("*.pdf") == "pdf"
+    assert get_format_given_extension("*.azw3") == "mobi"
+    assert get_format_given_extension("*.unknown") is None
+
+
+def test_document_backends_are_imported_lazily():
+    code = (
+        "import sys, bookworm.document; "
+        "assert 'bookworm.document.formats.pdf' not in sys.modules; "
+        "assert 'fitz' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,55 @@
+import numpy as np
+
+from bookworm.image_io import ImageIO
+
+
+def _make_rgb_image():
+    pixels = np.arange(4 * 3 * 3, dtype=np.uint8).reshape((4, 3, 3))
+    return pixels, ImageIO(data=pixels.tobytes(), width=3, height=4)
+
+
+def test_image_io_views_do_not_copy_pixels():
+    pixels, image = _make_rgb_image()
+    assert np.array_equal(image.to_array(), pixels)
+    assert not image.to_array().flags.owndata
+    gray = ImageIO.from_cv2(image.to_cv2())
+    assert gray.mode == "L"
+    assert np.shares_memory(gray.to_array(), gray.data)
+    assert np.array_equal(np.asarray(gray.to_pil()), gray.to_array())
+
+
+def test_image_io_converts_colour_modes():
+    pixels, image = _make_rgb_image()
+    rgba = image.as_rgba()
+    assert rgba.mode == "RGBA"
+    assert (rgba.to_array()[..., 3] == 255).all()
+    assert np.array_equal(rgba.as_rgb().to_array(), pixels)
+    gray = ImageIO.from_array(pixels[..., 0])
+    assert gray.mode == "L"
+    assert np.array_equal(gray.as_rgb().to_array()[..., 2], pixels[..., 0])
+    assert gray.nbytes == 12
+
+
+def test_image_io_converts_cv2_colour_images_to_rgb():
+    bgr = np.zeros((2, 2, 3), dtype=np.uint8)
+    bgr[..., 0] = 255
+    image = ImageIO.from_cv2(bgr)
+    assert image.mode == "RGB"
+    assert (image.to_array()[..., 2] == 255).all()
+    assert (image.to_array()[..., :2] == 0).all()
+    bgra = np.dstack([bgr, np.full((2, 2), 128, dtype=np.uint8)])
+    image = ImageIO.from_cv2(bgra)
+    assert image.mode == "RGBA"
+    assert image.to_array()[0, 0].tolist() == [0, 0, 255, 128]
+
+
+def test_image_io_fitz_pixmap_round_trip():
+    pixels, image = _make_rgb_image()
+    for img in (image, ImageIO.from_array(pixels), image.as_rgba(), image.as_rgb()):
+        restored = ImageIO.from_fitz_pixmap(img.to_fitz_pixmap())
+        assert (restored.size, restored.mode) == (img.size, img.mode)
+        assert restored.tobytes() == img.tobytes()
+    gray = ImageIO.from_array(pixels[..., 0])
+    restored = ImageIO.from_fitz_pixmap(gray.to_fitz_pixmap())
+    assert restored.mode == "L"
+    assert np.array_equal(restored.to_array(), gray.to_array())
@@ -0,0 +1,46 @@
+import numpy as np
+
+from bookworm.image_io import ImageIO
+from bookworm.ocr_engines.image_processing_pipelines import (
+    DilationProcessingPipeline,
+    DPIProcessingPipeline,
+    ErosionProcessingPipeline,
+    ThresholdProcessingPipeline,
+    run_image_processing_pipelines,
+)
+
+PIPELINES = (
+    DPIProcessingPipeline,
+    ThresholdProcessingPipeline,
+    DilationProcessingPipeline,
+    ErosionProcessingPipeline,
+)
+
+
+def _make_scan(binarized):
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(180, 250, size=(60, 40), dtype=np.uint8)
+    pixels[10:50:8, 5:35] = 20
+    if binarized:
+        pixels = np.where(pixels > 127, 255, 0).astype(np.uint8)
+    return ImageIO.from_array(pixels)
+
+
+def test_fused_pipelines_match_staged_pipelines():
+    image = _make_scan(binarized=False)
+    images = (image,)
+    for pipeline_cls in PIPELINES:
+        pipeline = pipeline_cls(images, None)
+        images = tuple(pipeline.process_image(img) for img in images)
+    (fused,) = run_image_processing_pipelines(PIPELINES, (image,), None)
+    assert fused.size == images[0].size
+    assert np.array_equal(fused.to_array(), images[0].to_array())
+    # The input image is left as is
+    assert np.array_equal(image.to_array(), _make_scan(binarized=False).to_array())
+
+
+def test_no_op_stages_are_skipped():
+    pixels = _make_scan(binarized=True).to_array()
+    assert ThresholdProcessingPipeline((), None).process_array(pixels) is pixels
+    dpi = DPIProcessingPipeline((), None, args={"scaling_factor": 1})
+    assert dpi.process_array(pixels) is pixels
@@ -0,0 +1,48 @@
+from bookworm.document.memory_cache import DocumentMemoryCache
+
+
+def test_memory_cache_evicts_least_recently_used_entries_over_budget():
+    cache = DocumentMemoryCache(budget=100)
+    cache.set("a", "first", size=40)
+    cache.set("b", "second", size=40)
+    assert cache.get("a") == "first"
+    cache.set("c", "third", size=40)
+    assert "b" not in cache
+    assert cache.get("a") == "first"
+    assert cache.get("c") == "third"
+    assert cache.size == 80
+    assert cache.stats.evictions == 1
+    # Values larger than the budget are never cached
+    cache.set("d", "huge", size=101)
+    assert "d" not in cache
+    assert len(cache) == 2
+
+
+def test_memory_cache_counters():
+    cache = DocumentMemoryCache()
+    calls = []
+
+    def compute():
+        calls.append(None)
+        return "text"
+
+    assert cache.get_or_compute(("text", 0), compute) == "text"
+    assert cache.get_or_compute(("text", 0), compute) == "text"
+    assert cache.get("missing") is None
+    assert len(calls) == 1
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+
+
+def test_memory_cache_invalidation():
+    cache = DocumentMemoryCache()
+    cache.set(("page", 0), object())
+    cache.set(("image", 0, 1.0), b"pixels")
+    cache.invalidate(lambda key: key[0] == "image")
+    assert ("image", 0, 1.0) not in cache
+    assert ("page", 0) in cache
+    cache.close()
+    assert len(cache) == 0
+    assert cache.size == 0
+    # A closed cache computes values without keeping them
+    assert cache.get_or_compute(("page", 1), object) is not None
+    assert len(cache) == 0
@@ -0,0 +1,69 @@
+import numpy as np
+
+from bookworm.image_io import ImageIO
+from bookworm.ocr_engines import base
+from bookworm.ocr_engines.base import BaseOcrEngine, OcrRequest, OcrResult
+from bookworm.ocr_engines.image_processing_pipelines import (
+    TwoInOneScanProcessingPipeline,
+)
+
+
+class FakeLanguage:
+    identifier = "en"
+    is_rtl = False
+
+
+class FakeOcrEngine(BaseOcrEngine):
+    name = "fake"
+    batches = []
+
+    @classmethod
+    def check(cls):
+        return True
+
+    @classmethod
+    def get_recognition_languages(cls):
+        return [FakeLanguage()]
+
+    @classmethod
+    def recognize(cls, ocr_request):
+        return OcrResult(
+            recognized_text=str(ocr_request.image.width), ocr_request=ocr_request
+        )
+
+    @classmethod
+    def recognize_many(cls, ocr_requests):
+        cls.batches.append(len(ocr_requests))
+        return super().recognize_many(ocr_requests)
+
+
+class FakeCacheStore(dict):
+    def set(self, key, value):
+        self[key] = value
+
+
+def _make_request(width, pipelines=()):
+    return OcrRequest(
+        languages=[FakeLanguage()],
+        image=ImageIO.from_array(np.zeros((20, width), dtype=np.uint8)),
+        image_processing_pipelines=pipelines,
+    )
+
+
+def test_preprocess_and_recognize_many_batches_uncached_images(monkeypatch):
+    store = FakeCacheStore()
+    monkeypatch.setattr(base, "get_ocr_result_cache_store", lambda: store)
+    cached_result = FakeOcrEngine.preprocess_and_recognize(_make_request(10))
+    assert cached_result.recognized_text == "10"
+    FakeOcrEngine.batches.clear()
+    requests = [
+        _make_request(12),
+        _make_request(10),
+        _make_request(16, pipelines=(TwoInOneScanProcessingPipeline,)),
+    ]
+    results = FakeOcrEngine.preprocess_and_recognize_many(requests)
+    assert [result.recognized_text for result in results] == ["12", "10", "8\n8"]
+    assert [result.ocr_request for result in results] == requests
+    # The cached image is not recognized again, and the rest are recognized at once
+    assert FakeOcrEngine.batches == [3]
+    assert len(store) == 3
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from bookworm.image_io import ImageIO
+from bookworm.ocr_engines.result_cache import get_ocr_cache_key, hash_image
+
+
+class FakeOcrEngine:
+    name = "fake"
+    version = "1.0"
+
+    @classmethod
+    def get_engine_version(cls):
+        return cls.version
+
+
+def _make_request(pixels, languages=("en",), pipelines=()):
+    image = ImageIO.from_array(pixels)
+    return SimpleNamespace(
+        languages=[SimpleNamespace(identifier=lang) for lang in languages],
+        image_processing_pipelines=pipelines,
+        image_digest=hash_image(image),
+    )
+
+
+def test_ocr_cache_key_covers_the_image_and_options():
+    pixels = np.zeros((20, 10), dtype=np.uint8)
+    key = get_ocr_cache_key(FakeOcrEngine, _make_request(pixels))
+    assert key == get_ocr_cache_key(FakeOcrEngine, _make_request(pixels.copy()))
+    changed_pixels = pixels.copy()
+    changed_pixels[5, 5] = 255
+    other_keys = {
+        get_ocr_cache_key(FakeOcrEngine, _make_request(changed_pixels)),
+        get_ocr_cache_key(FakeOcrEngine, _make_request(pixels.reshape((10, 20)))),
+        get_ocr_cache_key(FakeOcrEngine, _make_request(pixels, languages=("ar",))),
+        get_ocr_cache_key(
+            FakeOcrEngine, _make_request(pixels, pipelines=(FakeOcrEngine,))
+        ),
+    }
+    assert len(other_keys) == 4
+    assert key not in other_keys
+    FakeOcrEngine.version = "2.0"
+    assert get_ocr_cache_key(FakeOcrEngine, _make_request(pixels)) != key
@@ -0,0 +1,25 @@
+import pickle
+
+from bookworm.document.page_labels import PageLabelIndex
+
+
+def test_page_label_index_from_rules():
+    rules = [
+        {"startpage": 0, "prefix": "", "style": "r", "firstpagenum": 1},
+        {"startpage": 4, "prefix": "", "style": "D", "firstpagenum": 1},
+        {"startpage": 8, "prefix": "A-", "style": "D", "firstpagenum": 36},
+        {"startpage": 10, "prefix": "", "style": "a", "firstpagenum": 26},
+    ]
+    index = PageLabelIndex.from_rules(rules, num_pages=12)
+    assert index.labels == (
+        *("i", "ii", "iii", "iv"),
+        *("1", "2", "3", "4"),
+        *("A-36", "A-37"),
+        *("z", "aa"),
+    )
+    assert index.get_page_index("III") == 2
+    assert index.get_page_index(" a-37 ") == 9
+    assert index.get_page_index("xii") is None
+    assert index.get_label(8) == "A-36"
+    assert index.get_label(100) == ""
+    assert pickle.loads(pickle.dumps(index)).get_page_index("aa") == 11
@@ -0,0 +1,71 @@
+import time
+
+from bookworm.document.prefetch import PagePrefetcher
+
+
+class FakePage:
+    def __init__(self, index, delay):
+        self.index = index
+        self.delay = delay
+
+    def get_text(self):
+        time.sleep(self.delay)
+        return f"Text of page {self.index}"
+
+    def get_image(self, zoom_factor):
+        return f"Image of page {self.index} at {zoom_factor}"
+
+
+class FakeDocument:
+    def __init__(self, num_pages, delay=0):
+        self.num_pages = num_pages
+        self.delay = delay
+
+    def __len__(self):
+        return self.num_pages
+
+    def __getitem__(self, index):
+        return FakePage(index, self.delay)
+
+
+def _wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_page_prefetcher_prefetches_pages_around_the_current_page():
+    prefetcher = PagePrefetcher(FakeDocument(10), distance=1)
+    assert prefetcher.get_text(4) is None
+    prefetcher.prefetch_around(4)
+    _wait_for(lambda: prefetcher._process is None)
+    assert [prefetcher.get_text(idx) for idx in (3, 4, 5)] == [
+        "Text of page 3",
+        "Text of page 4",
+        "Text of page 5",
+    ]
+    assert prefetcher.get_text(6) is None
+    # Images are prefetched once they are viewed
+    assert prefetcher.get_image(5, 1.5) is None
+    prefetcher.prefetch_around(5)
+    _wait_for(lambda: prefetcher._process is None)
+    assert prefetcher.get_text(6) == "Text of page 6"
+    assert prefetcher.get_image(6, 1.5) == "Image of page 6 at 1.5"
+    assert prefetcher.get_image(6, 2.0) is None
+    prefetcher.close()
+
+
+def test_page_prefetcher_close_cancels_prefetching():
+    prefetcher = PagePrefetcher(FakeDocument(100, delay=0.2), distance=10)
+    prefetcher.prefetch_around(50)
+    process = prefetcher._process
+    _wait_for(lambda: prefetcher.get_text(50) is not None)
+    prefetcher.close()
+    assert process.is_cancelled()
+    assert prefetcher.get_text(50) is None
+    # Nothing is prefetched after closing
+    prefetcher.prefetch_around(0)
+    assert prefetcher._process is None
+    time.sleep(0.5)
+    assert prefetcher._cache == {}
@@ -0,0 +1,59 @@
+import json
+
+import db_magic as db
+import pytest
+
+from bookworm.database.models import DocumentPositionInfo
+from bookworm.database.position_store import ReadingPositionStore
+from bookworm.document.uri import DocumentUri
+
+
+@pytest.fixture
+def position_store(tmp_path):
+    db.Model.setup_database(f"sqlite:///{tmp_path / 'database.sqlite'}", create=True)
+    yield ReadingPositionStore(journal_path=tmp_path / "reading_positions.journal")
+    db.Model.session.remove()
+
+
+def _add_document(path):
+    uri = DocumentUri(format="pdf", path=path, openner_args={})
+    position_info = DocumentPositionInfo(title=path, uri=uri)
+    session = DocumentPositionInfo.session
+    session.add(position_info)
+    session.commit()
+    return position_info
+
+
+def test_position_store_commits_positions_in_one_flush(position_store):
+    first = _add_document("/books/first.pdf")
+    second = _add_document("/books/second.pdf")
+    for pos in range(100):
+        position_store.set_position(first, 0, pos)
+    position_store.set_position(second, 3, 7)
+    position_store.flush()
+    assert position_store.commit_count == 1
+    DocumentPositionInfo.session.expire_all()
+    assert first.get_last_position() == (0, 99)
+    assert second.get_last_position() == (3, 7)
+
+
+def test_position_store_recovers_the_journal(position_store):
+    first = _add_document("/books/first.pdf")
+    journal_path = position_store.get_journal_path()
+    uri_string = first.uri.to_uri_string()
+    entries = [
+        {"uri": uri_string, "page": 0, "pos": 10},
+        {"page": 0, "pos": 20},
+        {"uri": "not a document uri", "page": 0, "pos": 30},
+        {"uri": uri_string, "page": 1, "pos": 40},
+    ]
+    with open(journal_path, "w", encoding="utf-8") as file:
+        for entry in entries:
+            file.write(json.dumps(entry) + "\n")
+        file.write('{"uri": "bkw://pdf/books/fi')
+    position_store.recover()
+    DocumentPositionInfo.session.expire_all()
+    assert first.get_last_position() == (1, 40)
+    assert position_store.commit_count == 1
+    with pytest.raises(FileNotFoundError):
+        open(journal_path)
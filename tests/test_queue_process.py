@@ -1,6 +1,11 @@
 import pytest
 
-from bookworm.concurrency import QueueProcess
+import bookworm.concurrency
+from bookworm.concurrency import (
+    QueueProcess,
+    WarmWorkerPool,
+    iter_queue_processes_in_order,
+)
 
 
 def _produce_sqrts(numbers):
@@ -21,3 +26,76 @@ def test_queue_process():
     process_iterator = iter(QueueProcess(target=_produce_sqrts, args=(invalid_input,)))
     with pytest.raises(ValueError):
         next(process_iterator)
+
+
+def test_iter_queue_processes_in_order():
+    shards = [[1, 4, 9], [16, 25], [36, 49, 64]]
+    processes = [QueueProcess(target=_produce_sqrts, args=(shard,)) for shard in shards]
+    assert list(iter_queue_processes_in_order(processes)) == [1, 2, 3, 4, 5, 6, 7, 8]
+
+
+class _CachedObject:
+    unpickled_count = 0
+
+    def __init__(self, key):
+        self.key = key
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        _CachedObject.unpickled_count += 1
+
+    def get_worker_cache_key(self):
+        return self.key
+
+
+def _produce_worker_state(obj):
+    import os
+
+    yield (os.getpid(), id(obj), _CachedObject.unpickled_count)
+
+
+def test_warm_worker_pool_keeps_objects_open():
+    pool = WarmWorkerPool(num_workers=1)
+    pool.start()
+    previous_pool = bookworm.concurrency.warm_worker_pool
+    bookworm.concurrency.warm_worker_pool = pool
+    try:
+        obj = _CachedObject("key")
+        first = list(QueueProcess(target=_produce_worker_state, args=(obj,)))
+        second = list(QueueProcess(target=_produce_worker_state, args=(obj,)))
+        assert first == second
+        # The object was unpickled only once, in the worker process
+        assert first[0][2] == 1
+        # Failures are reported, and the worker is reused afterwards
+        with pytest.raises(ValueError):
+            list(QueueProcess(target=_produce_sqrts, args=((-1,),)))
+        assert set(QueueProcess(target=_produce_sqrts, args=([1, 4],))) == {1, 2}
+    finally:
+        bookworm.concurrency.warm_worker_pool = previous_pool
+        pool.shutdown()
+
+
+def test_warm_worker_pool_reuses_open_documents(asset, tmp_path):
+    from bookworm.document import DocumentUri, create_document
+    from bookworm.document.operations import export_to_plain_text
+
+    pool = WarmWorkerPool(num_workers=1)
+    pool.start()
+    previous_pool = bookworm.concurrency.warm_worker_pool
+    bookworm.concurrency.warm_worker_pool = pool
+    document = create_document(DocumentUri.from_filename(asset("tagged_sample.pdf")))
+    try:
+        exported_texts = []
+        for filename in ("first.txt", "second.txt"):
+            target = tmp_path / filename
+            pages = list(
+                QueueProcess(target=export_to_plain_text, args=(document, target))
+            )
+            assert pages == list(range(1, len(document) + 1))
+            exported_texts.append(target.read_text(encoding="utf-8"))
+        # The second operation ran on the document kept open by the first one
+        assert exported_texts[0] and (exported_texts[0] == exported_texts[1])
+    finally:
+        document.close()
+        bookworm.concurrency.warm_worker_pool = previous_pool
+        pool.shutdown()
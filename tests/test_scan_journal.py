@@ -0,0 +1,37 @@
+from bookworm.ocr_engines.scan_journal import ScanJournal
+
+SCAN_INFO = {"document": "file:///book.pdf", "engine": "tesseract", "zoom_factor": 2}
+
+
+def test_scan_journal_resumes_the_same_scan(tmp_path):
+    output_file = tmp_path / "book.txt"
+    journal = ScanJournal.for_output_file(output_file, SCAN_INFO)
+    assert journal.load() == {}
+    journal.record(3, "Third")
+    journal.record(0, "First")
+    journal.close()
+    # A partially written entry, as left by an interrupted scan
+    with open(journal.journal_path, "a", encoding="utf-8") as file:
+        file.write('{"page": 1, "te')
+    resumed_journal = ScanJournal.for_output_file(output_file, SCAN_INFO)
+    assert resumed_journal.load() == {0: "First", 3: "Third"}
+    resumed_journal.record(1, "Second")
+    resumed_journal.close()
+    assert ScanJournal.for_output_file(output_file, SCAN_INFO).load() == {
+        0: "First",
+        1: "Second",
+        3: "Third",
+    }
+    resumed_journal.remove()
+    assert not (tmp_path / "book.txt.journal").exists()
+
+
+def test_scan_journal_discards_a_different_scan(tmp_path):
+    journal = ScanJournal(tmp_path / "journal", SCAN_INFO)
+    journal.record(0, "First")
+    journal.close()
+    other_journal = ScanJournal(tmp_path / "journal", {**SCAN_INFO, "zoom_factor": 3})
+    assert other_journal.load() == {}
+    other_journal.record(1, "Second")
+    other_journal.close()
+    assert ScanJournal(tmp_path / "journal", SCAN_INFO).load() == {}
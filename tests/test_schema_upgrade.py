@@ -0,0 +1,69 @@
+import sqlite3
+
+import sqlalchemy as sa
+from sqlalchemy.orm import sessionmaker
+
+from bookworm.database.schema import upgrade_database_schema
+
+EPUB_URI = "bkw://epub/books/novel.epub"
+PDF_URI = "bkw://pdf/books/paper.pdf"
+
+
+def _create_database(filename, with_annotations):
+    connection = sqlite3.connect(filename)
+    connection.execute(
+        "CREATE TABLE book (id INTEGER PRIMARY KEY, title TEXT, uri TEXT)"
+    )
+    connection.execute(
+        "CREATE TABLE document_position_info "
+        "(id INTEGER PRIMARY KEY, title TEXT, uri TEXT, last_page INTEGER, last_position INTEGER)"
+    )
+    connection.executemany(
+        "INSERT INTO book VALUES (?, ?, ?)",
+        [(1, "Novel", EPUB_URI), (2, "Paper", PDF_URI)],
+    )
+    connection.executemany(
+        "INSERT INTO document_position_info VALUES (?, ?, ?, ?, ?)",
+        [(1, "Novel", EPUB_URI, 0, 5000), (2, "Paper", PDF_URI, 3, 120)],
+    )
+    if with_annotations:
+        connection.execute(
+            "CREATE TABLE quote (id INTEGER PRIMARY KEY, book_id INTEGER, "
+            "position INTEGER, start_pos INTEGER, end_pos INTEGER)"
+        )
+        connection.executemany(
+            "INSERT INTO quote VALUES (?, ?, ?, ?, ?)",
+            [(1, 1, 4000, 4000, 4100), (2, 2, 50, 50, 60)],
+        )
+    connection.commit()
+    connection.close()
+
+
+def _upgrade(filename):
+    session = sessionmaker(sa.create_engine(f"sqlite:///{filename}"))()
+    upgrade_database_schema(session)
+    session.close()
+
+
+def test_upgrade_resets_epub_positions(tmp_path):
+    filename = tmp_path / "database.sqlite"
+    _create_database(filename, with_annotations=True)
+    _upgrade(filename)
+    connection = sqlite3.connect(filename)
+    assert connection.execute(
+        "SELECT uri, last_page, last_position FROM document_position_info ORDER BY id"
+    ).fetchall() == [(EPUB_URI, 0, 0), (PDF_URI, 3, 120)]
+    assert connection.execute(
+        "SELECT position, start_pos, end_pos FROM quote ORDER BY id"
+    ).fetchall() == [(0, 0, 0), (50, 50, 60)]
+    assert connection.execute("PRAGMA user_version").fetchone() == (1,)
+
+
+def test_upgrade_without_annotation_tables(tmp_path):
+    filename = tmp_path / "database.sqlite"
+    _create_database(filename, with_annotations=False)
+    _upgrade(filename)
+    connection = sqlite3.connect(filename)
+    assert connection.execute(
+        "SELECT last_position FROM document_position_info ORDER BY id"
+    ).fetchall() == [(0,), (120,)]
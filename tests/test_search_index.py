@@ -0,0 +1,34 @@
+import pytest
+
+from bookworm.document.search_index import DocumentSearchIndex
+
+
+def test_search_index_candidate_pages():
+    index = DocumentSearchIndex()
+    index.add_page(0, "The quick brown fox")
+    index.add_page(1, "jumps over the lazy dog")
+    index.add_page(2, "Foxes are quick")
+    assert index.get_candidate_pages("the", whole_word=True) == {0, 1}
+    assert index.get_candidate_pages("fox", whole_word=True) == {0}
+    assert index.get_candidate_pages("fox", whole_word=False) == {0, 2}
+    assert index.get_candidate_pages("quick brown", whole_word=True) == {0}
+    assert index.get_candidate_pages("...", whole_word=False) is None
+    assert list(index.get_word_positions("lazy", 1)) == [15]
+
+
+def test_substring_lookup_matches_scanning_the_vocabulary():
+    index = DocumentSearchIndex()
+    index.add_page(0, "Unbelievable reliability of the relay")
+    index.add_page(1, "A lie, believed by the liar")
+    index.add_page(2, "Believers relied on it")
+    for substring in ("l", "li", "lie", "elie", "relia", "believ", "x", "xyzw"):
+        expected = {
+            page
+            for (token, pages) in index.postings.items()
+            if substring in token
+            for page in pages
+        }
+        assert index.get_pages_containing_substring(substring) == expected
+    # Pages added after a lookup are found by later lookups
+    index.add_page(3, "Disbelief")
+    assert index.get_pages_containing_substring("belie") == {0, 1, 2, 3}
@@ -5,8 +5,11 @@ import pytest
 import ujson
 
 from bookworm.document import create_document
-from bookworm.document.serde import dump_toc_tree, load_toc_tree
+from bookworm.document.serde import (StructuredTextData, dump_toc_tree,
+                                     load_toc_tree, pack, unpack)
 from bookworm.document.uri import DocumentUri
+from bookworm.structured_text.structured_html_parser import \
+    StructuredHtmlParser
 
 
 def test_serde_toc_tree(asset):
@@ -41,3 +44,19 @@ def test_wire_serde(asset, library):
         constructed.iter_children(), epub_document.toc_tree.iter_children()
     )
     assert all(t.title == s.title for (t, s) in compare_pairs)
+
+
+def test_structured_text_data_serde():
+    parser = StructuredHtmlParser.from_string(
+        "<html><body><h1 id='top'>Title</h1>"
+        "<p>See <a href='#top'>the top</a>.</p>"
+        "<table><tr><td>cell</td></tr></table></body></html>"
+    )
+    text_data = StructuredTextData.from_parser(parser)
+
+    constructed = StructuredTextData.from_dict(unpack(pack(text_data.to_dict())))
+    assert constructed.text == text_data.text
+    assert constructed.semantic_elements == text_data.semantic_elements
+    assert constructed.link_targets == text_data.link_targets
+    assert constructed.html_id_ranges == text_data.html_id_ranges
+    assert constructed.tables == text_data.tables
@@ -0,0 +1,44 @@
+import pickle
+
+from bookworm.concurrency import QueueProcess
+from bookworm.document.operations import SearchRequest, search_single_page_document
+from bookworm.document.shared_payload import SharedPayload
+from bookworm.structured_text import TextRange
+
+
+def _read_shared_text(payload):
+    yield payload.get_text()
+
+
+def test_shared_payload_is_pickled_by_name():
+    text = "Shared text \N{ARABIC LETTER ALEF} " * 1000
+    payload = SharedPayload.publish_text(text)
+    try:
+        pickled = pickle.dumps(payload)
+        assert len(pickled) < 200
+        attached = pickle.loads(pickled)
+        assert attached.get_text() == text
+        attached.close()
+        assert list(QueueProcess(target=_read_shared_text, args=(payload,))) == [text]
+    finally:
+        payload.close()
+
+
+def test_search_shared_single_page_content():
+    content = SharedPayload.publish_text("The first term, and the second term.")
+    request = SearchRequest(
+        term="term",
+        is_regex=False,
+        case_sensitive=False,
+        whole_word=True,
+        text_range=TextRange(11, 36),
+    )
+    try:
+        results = [
+            result
+            for results in search_single_page_document(content, request)
+            for result in results
+        ]
+        assert [result.position for result in results] == [31]
+    finally:
+        content.close()
@@ -0,0 +1,87 @@
+import pickle
+
+from bookworm.document.structure_index import DocumentStructureIndex
+from bookworm.structured_text import SemanticElementType, TextStructureMetadata
+
+
+PAGE_STRUCTURES = [
+    (0, {SemanticElementType.HEADING_1: [(0, 10)], SemanticElementType.LINK: []}),
+    (1, {SemanticElementType.LINK: [(30, 40), (5, 15)]}),
+    (
+        2,
+        {
+            SemanticElementType.HEADING_2: [(50, 60)],
+            SemanticElementType.TABLE: [(0, 100)],
+        },
+    ),
+    (3, {}),
+    (4, {SemanticElementType.HEADING_1: [(20, 25)]}),
+]
+
+
+def test_structure_index_crosses_pages():
+    index = DocumentStructureIndex.from_semantic_structures(PAGE_STRUCTURES)
+    link = SemanticElementType.LINK
+    assert index.get_element(link, True, 0, 5) == (1, (5, 15), link)
+    assert index.get_element(link, True, 1, 5) == (1, (30, 40), link)
+    assert index.get_element(link, True, 1, 30) is None
+    assert index.get_element(link, False, 4, 0) == (1, (30, 40), link)
+    assert index.get_element(link, False, 1, 5) is None
+    assert index.get_element(SemanticElementType.QUOTE, True, 0, 0) is None
+
+
+def test_structure_index_headings_span_all_levels():
+    index = DocumentStructureIndex.from_semantic_structures(PAGE_STRUCTURES)
+    heading = SemanticElementType.HEADING
+    assert index.get_element(heading, True, 0, 0) == (
+        2,
+        (50, 60),
+        SemanticElementType.HEADING_2,
+    )
+    assert index.get_element(heading, True, 2, 50) == (
+        4,
+        (20, 25),
+        SemanticElementType.HEADING_1,
+    )
+    assert index.get_element(SemanticElementType.HEADING_1, True, 0, 0) == (
+        4,
+        (20, 25),
+        SemanticElementType.HEADING_1,
+    )
+
+
+def test_structure_index_skips_elements_containing_the_anchor():
+    index = DocumentStructureIndex.from_semantic_structures(PAGE_STRUCTURES)
+    table = SemanticElementType.TABLE
+    assert index.get_element(table, False, 2, 50) is None
+    assert index.get_element(table, False, 3, 0) == (2, (0, 100), table)
+
+
+def test_structure_index_matches_the_page_structure():
+    structure = {
+        SemanticElementType.LIST: [(40, 50), (0, 30), (10, 20)],
+        SemanticElementType.HEADING_3: [(60, 70)],
+    }
+    index = DocumentStructureIndex.from_semantic_structures([(0, structure)])
+    semantics = TextStructureMetadata(structure)
+    for element_type in (SemanticElementType.LIST, SemanticElementType.HEADING):
+        for anchor in range(0, 80, 5):
+            for forward in (True, False):
+                expected = semantics.get_element(element_type, forward, anchor)
+                found = index.get_element(element_type, forward, 0, anchor)
+                if expected is None:
+                    assert found is None
+                else:
+                    (start, stop), actual_type = expected
+                    assert found == (0, (start, stop), actual_type)
+
+
+def test_structure_index_pickling():
+    index = DocumentStructureIndex.from_semantic_structures(PAGE_STRUCTURES)
+    restored = pickle.loads(pickle.dumps(index))
+    assert len(restored) == len(index) == 6
+    assert restored.get_element(SemanticElementType.LINK, True, 0, 0) == (
+        1,
+        (5, 15),
+        SemanticElementType.LINK,
+    )
@@ -0,0 +1,53 @@
+from bookworm.document import Pager, Section
+from bookworm.document.toc_index import TocIndex
+from bookworm.structured_text import TextRange
+
+
+def make_toc_tree():
+    chapter_1 = Section(
+        title="Chapter 1",
+        pager=Pager(0, 9),
+        text_range=TextRange(0, 99),
+        children=[
+            Section(title="1.1", pager=Pager(2, 4), text_range=TextRange(20, 49)),
+            Section(title="1.2", pager=Pager(5, 9), text_range=TextRange(50, 99)),
+        ],
+    )
+    chapter_2 = Section(
+        title="Chapter 2", pager=Pager(10, 19), text_range=TextRange(100, 199)
+    )
+    return Section(
+        title="Book",
+        pager=Pager(0, 19),
+        text_range=TextRange(0, 199),
+        children=[chapter_1, chapter_2],
+    )
+
+
+def test_toc_index_lookups():
+    toc_tree = make_toc_tree()
+    index = TocIndex(toc_tree)
+    assert index.get_section_at_page(0).title == "Chapter 1"
+    assert index.get_section_at_page(3).title == "1.1"
+    assert index.get_section_at_page(9).title == "1.2"
+    assert index.get_section_at_page(15).title == "Chapter 2"
+    assert index.get_section_at_page(25) is toc_tree
+    assert index.get_section_at_position(10).title == "Chapter 1"
+    assert index.get_section_at_position(49).title == "1.1"
+    assert index.get_section_at_position(150).title == "Chapter 2"
+    assert index.get_section_by_start_position(60).title == "1.2"
+    assert index.get_section_by_start_position(500).title == "Chapter 2"
+
+
+def test_toc_index_navigation():
+    toc_tree = make_toc_tree()
+    index = TocIndex(toc_tree)
+    chapter_1, chapter_2 = toc_tree.children
+    section_1_1, section_1_2 = chapter_1.children
+    assert index.next_sibling(section_1_1) is section_1_2
+    assert index.prev_sibling(chapter_2) is chapter_1
+    assert index.simple_next(section_1_2) is chapter_2
+    assert index.simple_prev(section_1_1) is chapter_1
+    assert index.simple_next(chapter_2) is None
+    assert index.next_in_order(section_1_2) is chapter_2
+    assert index.prev_in_order(chapter_1) is toc_tree